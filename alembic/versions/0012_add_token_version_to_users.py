@@ -0,0 +1,27 @@
+"""Add token_version to users (JWT revocation, principal cache key)
+
+Revision ID: 0012_add_token_version
+Revises: 0011_dashboard_notif_goals_expense
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012_add_token_version"
+down_revision = "0011_dashboard_notif_goals_expense"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "token_version")
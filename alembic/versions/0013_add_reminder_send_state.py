@@ -0,0 +1,40 @@
+"""Add reminder_send_state (idempotent, resumable reminder runs)
+
+Revision ID: 0013_reminder_send_state
+Revises: 0012_add_token_version
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0013_reminder_send_state"
+down_revision = "0012_add_token_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "reminder_send_state",
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("last_sent_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_run_date", sa.Date(), nullable=False),
+    )
+    op.create_index(
+        "ix_reminder_send_state_last_run_date",
+        "reminder_send_state",
+        ["last_run_date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reminder_send_state_last_run_date", table_name="reminder_send_state")
+    op.drop_table("reminder_send_state")
@@ -0,0 +1,39 @@
+"""Add weekly_reports (precomputed weekly digest)
+
+Revision ID: 0014_weekly_reports
+Revises: 0013_reminder_send_state
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0014_weekly_reports"
+down_revision = "0013_reminder_send_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "weekly_reports",
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("period_end", sa.Date(), primary_key=True),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("summary", sa.JSON(), nullable=False),
+        sa.Column("insight", sa.Text(), nullable=True),
+        sa.Column("generated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_weekly_reports_period_end", "weekly_reports", ["period_end"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_weekly_reports_period_end", table_name="weekly_reports")
+    op.drop_table("weekly_reports")
@@ -0,0 +1,32 @@
+"""Add timezone to focus_sessions (local hour-of-day aggregates)
+
+Revision ID: 0015_focus_session_timezone
+Revises: 0014_weekly_reports
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0015_focus_session_timezone"
+down_revision = "0014_weekly_reports"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "focus_sessions",
+        sa.Column("timezone", sa.String(length=64), nullable=False, server_default="UTC"),
+    )
+    # Existing sessions: best guess is the user's default timezone
+    op.execute(
+        "UPDATE focus_sessions SET timezone = COALESCE("
+        "(SELECT default_timezone FROM users WHERE users.id = focus_sessions.user_id), 'UTC')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("focus_sessions", "timezone")
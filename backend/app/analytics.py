@@ -1,29 +1,25 @@
 from __future__ import annotations
 
 from datetime import date, datetime, timedelta
-from typing import Any, List
+from typing import Any, Callable, Iterable, List, NamedTuple
 
-import numpy as np
-import pandas as pd
+from sqlalchemy import select
 
 from . import models
+from .core.lazy import lazy_import
+from .ml.rules import FrameStats, Measure, Rule, Slopes, Split, WeekdaySplit, evaluate_rules, rule
 
-try:
-    import statsmodels.api as sm
-except ImportError:  # pragma: no cover - optional runtime dependency
-    sm = None
+# Imported on first use: keeps API and CLI startup free of the numeric stack
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
-try:
-    from sklearn.linear_model import LinearRegression
-except ImportError:  # pragma: no cover - optional runtime dependency
-    LinearRegression = None
 
-
-def _entries_to_df(entries, numeric_fields, sum_fields=None):
+def _entries_to_df(entries, numeric_fields, sum_fields=None, by_user=False):
     sum_fields = set(sum_fields or [])
     rows = []
     for entry in entries:
-        row = {"date": entry.local_date}
+        row = {"user_id": entry.user_id} if by_user else {}
+        row["date"] = entry.local_date
         for field in numeric_fields:
             row[field] = getattr(entry, field)
         rows.append(row)
@@ -36,108 +32,176 @@ def _entries_to_df(entries, numeric_fields, sum_fields=None):
         field: ("sum" if field in sum_fields else "mean")
         for field in numeric_fields
     }
-    return df.groupby("date", as_index=False).agg(agg)
-
-
-def build_daily_dataframe(db, user_id: int | None = None) -> pd.DataFrame:
-    health_query = db.query(models.HealthEntry)
-    finance_query = db.query(models.FinanceEntry)
-    productivity_query = db.query(models.ProductivityEntry)
-    learning_query = db.query(models.LearningEntry)
-
-    if user_id is not None:
-        health_query = health_query.filter(models.HealthEntry.user_id == user_id)
-        finance_query = finance_query.filter(models.FinanceEntry.user_id == user_id)
-        productivity_query = productivity_query.filter(models.ProductivityEntry.user_id == user_id)
-        learning_query = learning_query.filter(models.LearningEntry.user_id == user_id)
-
-    health_entries = health_query.all()
-    finance_entries = finance_query.all()
-    productivity_entries = productivity_query.all()
-    learning_entries = learning_query.all()
-
-    health_df = _entries_to_df(
-        health_entries,
-        [
-            "sleep_hours",
-            "energy_level",
-            "weight_kg",
-            "wellbeing",
-            "steps",
-            "heart_rate_avg",
+    return df.groupby(["user_id", "date"] if by_user else "date", as_index=False).agg(agg)
+
+
+DAILY_SOURCE_MODELS = (
+    models.HealthEntry,
+    models.FinanceEntry,
+    models.ProductivityEntry,
+    models.LearningEntry,
+    models.FocusSession,
+)
+
+# Numeric fields read from each daily source, and those summed per day (the rest are averaged)
+_DAILY_SOURCE_FIELDS = {
+    models.HealthEntry: (
+        (
+            "sleep_hours", "energy_level", "weight_kg", "wellbeing", "steps", "heart_rate_avg",
             "workout_minutes",
-        ],
-        sum_fields=["steps", "workout_minutes"],
-    )
-    finance_df = _entries_to_df(
-        finance_entries,
-        [
-            "income",
-            "expense_food",
-            "expense_transport",
-            "expense_health",
-            "expense_other",
-        ],
-        sum_fields=[
-            "income",
-            "expense_food",
-            "expense_transport",
-            "expense_health",
-            "expense_other",
-        ],
-    )
-    productivity_df = _entries_to_df(
-        productivity_entries,
-        ["deep_work_hours", "tasks_completed", "focus_level"],
-        sum_fields=["deep_work_hours", "tasks_completed"],
-    )
-    # Aggregate focus_sessions (Pomodoro/timers) into session_deep_work_hours; combine with entry deep_work_hours
-    if user_id is not None:
-        focus_sessions = (
-            db.query(models.FocusSession)
-            .filter(models.FocusSession.user_id == user_id)
-            .all()
+        ),
+        ("steps", "workout_minutes"),
+    ),
+    models.FinanceEntry: (
+        ("income", "expense_food", "expense_transport", "expense_health", "expense_other"),
+        ("income", "expense_food", "expense_transport", "expense_health", "expense_other"),
+    ),
+    models.ProductivityEntry: (
+        ("deep_work_hours", "tasks_completed", "focus_level"),
+        ("deep_work_hours", "tasks_completed"),
+    ),
+    models.LearningEntry: (("study_hours",), ("study_hours",)),
+    models.FocusSession: (("duration_minutes",), ("duration_minutes",)),
+}
+_SESSION_COLUMNS = ("session_deep_work_hours", "total_deep_work_hours")
+
+
+def _daily_source_statements(
+    user_id: int | None, start: date | None = None, end: date | None = None
+):
+    statements = []
+    for model in DAILY_SOURCE_MODELS:
+        stmt = select(model)
+        if user_id is not None:
+            stmt = stmt.where(model.user_id == user_id)
+        if start is not None:
+            stmt = stmt.where(model.local_date >= start)
+        if end is not None:
+            stmt = stmt.where(model.local_date <= end)
+        statements.append(stmt)
+    return statements
+
+
+def build_daily_dataframe(
+    db, user_id: int | None = None, start: date | None = None, end: date | None = None
+) -> pd.DataFrame:
+    """Daily frame (one row per local_date); `start` / `end` bound local_date in SQL."""
+    loaded = [
+        db.execute(stmt).scalars().all() for stmt in _daily_source_statements(user_id, start, end)
+    ]
+    return _daily_dataframe_from_entries(*loaded)
+
+
+async def build_daily_dataframe_async(
+    db, user_id: int | None = None, start: date | None = None, end: date | None = None
+) -> pd.DataFrame:
+    """build_daily_dataframe for an AsyncSession (the async API stack)."""
+    loaded = [
+        (await db.execute(stmt)).scalars().all()
+        for stmt in _daily_source_statements(user_id, start, end)
+    ]
+    return _daily_dataframe_from_entries(*loaded)
+
+
+class PopulationFrame(NamedTuple):
+    """Daily rows of many users, sorted by (user_id, date).
+
+    `columns` lists, per user, the metric columns their own build_daily_dataframe frame would
+    have (sources they have no entries in are absent there, not NaN).
+    """
+
+    df: pd.DataFrame
+    columns: dict[int, list[str]]
+
+
+def build_population_dataframe(
+    db, user_ids: Iterable[int], start: date | None = None, end: date | None = None
+) -> PopulationFrame:
+    """Daily frames of many users from one columnar query per source (no ORM objects)."""
+    user_ids = list(user_ids)
+    loaded = []
+    for model in DAILY_SOURCE_MODELS:
+        fields, _ = _DAILY_SOURCE_FIELDS[model]
+        stmt = select(model.user_id, model.local_date, *(getattr(model, f) for f in fields)).where(
+            model.user_id.in_(user_ids)
         )
-    else:
-        focus_sessions = db.query(models.FocusSession).all()
+        if start is not None:
+            stmt = stmt.where(model.local_date >= start)
+        if end is not None:
+            stmt = stmt.where(model.local_date <= end)
+        loaded.append(db.execute(stmt).all())
+    df = _daily_dataframe_from_entries(*loaded, by_user=True)
+
+    has = [{row.user_id for row in rows} for rows in loaded]
+    health, finance, productivity, learning, sessions = has
+    columns: dict[int, list[str]] = {}
+    for user_id in set().union(*has):
+        names = []
+        by_model = (health, finance, productivity | sessions, learning)
+        for model, users in zip(DAILY_SOURCE_MODELS[:4], by_model, strict=True):
+            if user_id in users:
+                names.extend(_DAILY_SOURCE_FIELDS[model][0])
+                if model is models.ProductivityEntry and user_id in sessions:
+                    names.extend(_SESSION_COLUMNS)
+        columns[user_id] = names
+    return PopulationFrame(df, columns)
+
+
+def _daily_dataframe_from_entries(
+    health_entries,
+    finance_entries,
+    productivity_entries,
+    learning_entries,
+    focus_sessions,
+    by_user=False,
+) -> pd.DataFrame:
+    keys = ["user_id", "date"] if by_user else ["date"]
+    health_df, finance_df, productivity_df, learning_df = (
+        _entries_to_df(entries, *_DAILY_SOURCE_FIELDS[model], by_user=by_user)
+        for entries, model in zip(
+            (health_entries, finance_entries, productivity_entries, learning_entries),
+            DAILY_SOURCE_MODELS[:4],
+            strict=True,
+        )
+    )
+    # Aggregate focus_sessions (Pomodoro/timers) into session_deep_work_hours;
+    # combine with entry deep_work_hours
     if focus_sessions:
-        sessions_rows = [{"date": s.local_date, "duration_minutes": s.duration_minutes} for s in focus_sessions]
-        sessions_df = (
-            pd.DataFrame(sessions_rows)
-            .groupby("date", as_index=False)["duration_minutes"]
-            .sum()
+        sessions_df = _entries_to_df(
+            focus_sessions, *_DAILY_SOURCE_FIELDS[models.FocusSession], by_user=by_user
         )
         sessions_df["session_deep_work_hours"] = sessions_df["duration_minutes"] / 60.0
-        sessions_df = sessions_df[["date", "session_deep_work_hours"]]
+        sessions_df = sessions_df[[*keys, "session_deep_work_hours"]]
         if not productivity_df.empty:
-            productivity_df = productivity_df.merge(sessions_df, on="date", how="outer")
+            with_entries = productivity_df["user_id"].unique() if by_user else None
+            productivity_df = productivity_df.merge(sessions_df, on=keys, how="outer")
+            if by_user:
+                # Users with sessions only get zeros, as in their own frame
+                sessions_only = ~productivity_df["user_id"].isin(with_entries)
+                entry_columns = ["deep_work_hours", "tasks_completed", "focus_level"]
+                productivity_df.loc[sessions_only, entry_columns] = 0
         else:
             productivity_df = sessions_df.copy()
             productivity_df["deep_work_hours"] = 0.0
             productivity_df["tasks_completed"] = 0
             productivity_df["focus_level"] = 0.0
-        productivity_df["session_deep_work_hours"] = productivity_df["session_deep_work_hours"].fillna(0)
+        session_hours = productivity_df["session_deep_work_hours"].fillna(0)
+        productivity_df["session_deep_work_hours"] = session_hours
         productivity_df["total_deep_work_hours"] = (
-            productivity_df["deep_work_hours"].fillna(0) + productivity_df["session_deep_work_hours"]
+            productivity_df["deep_work_hours"].fillna(0) + session_hours
         )
 
-    learning_df = _entries_to_df(
-        learning_entries,
-        ["study_hours"],
-        sum_fields=["study_hours"],
-    )
-
     frames = [health_df, finance_df, productivity_df, learning_df]
     merged = None
     for frame in frames:
         if frame.empty:
             continue
-        merged = frame if merged is None else merged.merge(frame, on="date", how="outer")
+        merged = frame if merged is None else merged.merge(frame, on=keys, how="outer")
 
     if merged is None:
         return pd.DataFrame()
 
-    return merged.sort_values("date").reset_index(drop=True)
+    return merged.sort_values(keys).reset_index(drop=True)
 
 
 def compute_correlations(
@@ -154,20 +218,34 @@ def compute_correlations(
         return []
 
     corr = numeric.corr(numeric_only=True)
+    present = numeric.notna().to_numpy(dtype=float)
+    return _correlation_items(
+        list(corr.columns), corr.to_numpy(), present.T @ present, min_samples, min_abs, max_items
+    )
+
+
+def _correlation_items(
+    columns: List[str],
+    corr: np.ndarray,
+    sample_sizes: np.ndarray,
+    min_samples: int = 5,
+    min_abs: float = 0.3,
+    max_items: int = 12,
+) -> List[dict]:
+    """Strongest column pairs from (columns x columns) correlation and sample-size matrices."""
     pairs = []
-    columns = list(corr.columns)
     for i, col_a in enumerate(columns):
-        for col_b in columns[i + 1 :]:
-            value = corr.loc[col_a, col_b]
-            if pd.isna(value):
+        for j in range(i + 1, len(columns)):
+            value = corr[i, j]
+            if np.isnan(value):
                 continue
-            sample_size = numeric[[col_a, col_b]].dropna().shape[0]
+            sample_size = sample_sizes[i, j]
             if sample_size < min_samples or abs(value) < min_abs:
                 continue
             pairs.append(
                 {
                     "metric_a": col_a,
-                    "metric_b": col_b,
+                    "metric_b": columns[j],
                     "correlation": float(round(value, 3)),
                     "sample_size": int(sample_size),
                 }
@@ -177,85 +255,42 @@ def compute_correlations(
     return pairs[:max_items]
 
 
-def _sleep_vs_productivity_insight(df: pd.DataFrame):
-    if "sleep_hours" not in df.columns or "deep_work_hours" not in df.columns:
-        return None
-
-    filtered = df[["sleep_hours", "deep_work_hours"]].dropna()
-    if len(filtered) < 6:
-        return None
-
-    low_sleep = filtered[filtered["sleep_hours"] < 6]
-    high_sleep = filtered[filtered["sleep_hours"] >= 7]
-    if len(low_sleep) < 3 or len(high_sleep) < 3:
-        return None
-
-    avg_low = low_sleep["deep_work_hours"].mean()
-    avg_high = high_sleep["deep_work_hours"].mean()
-    if avg_high <= 0:
-        return None
-
-    drop_pct = (1 - avg_low / avg_high) * 100
-    if drop_pct < 15:
-        return None
-
-    return (
-        f"When you sleep under 6h, deep work drops by "
-        f"{drop_pct:.0f}% compared to 7h+."
-    )
-
-
-def _sleep_energy_trend_insight(df: pd.DataFrame):
-    if "sleep_hours" not in df.columns or "energy_level" not in df.columns:
-        return None
-
-    filtered = df[["sleep_hours", "energy_level"]].dropna()
-    if len(filtered) < 6:
-        return None
-
-    if sm is not None:
-        x = sm.add_constant(filtered["sleep_hours"])
-        model = sm.OLS(filtered["energy_level"], x).fit()
-        slope = model.params.get("sleep_hours", 0)
-        if slope > 0.25:
-            return (
-                "Energy rises with more sleep (linear trend detected). "
-                f"+{slope:.2f} energy per extra hour."
-            )
-
-    if LinearRegression is not None:
-        x = filtered[["sleep_hours"]]
-        y = filtered["energy_level"]
-        model = LinearRegression().fit(x, y)
-        slope = model.coef_[0]
-        if slope > 0.25:
-            return (
-                "Energy rises with more sleep (trend). "
-                f"+{slope:.2f} energy per extra hour."
-            )
-
-    return None
-
-
-def _finance_wellbeing_insight(df: pd.DataFrame):
-    if "expense_food" not in df.columns or "wellbeing" not in df.columns:
-        return None
-
-    filtered = df[["expense_food", "wellbeing"]].dropna()
-    if len(filtered) < 6:
-        return None
-
-    corr = filtered["expense_food"].corr(filtered["wellbeing"])
-    if corr is None or np.isnan(corr):
-        return None
-
-    if corr < -0.35:
-        return (
-            "Food spending tends to align with lower wellbeing "
-            f"(r={corr:.2f})."
-        )
-
-    return None
+def _cell_sums(cells: np.ndarray, size: int, weights: np.ndarray | None = None) -> np.ndarray:
+    """Count (or sum of `weights`) per cell id 0..size-1."""
+    return np.bincount(cells, weights=weights, minlength=size)
+
+
+def grouped_correlations(
+    groups: np.ndarray, values: np.ndarray, n_groups: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Pairwise Pearson r of every column pair within each group, as pandas' corr computes it.
+
+    `groups` is (rows,) ints 0..n_groups-1; `values` is (rows, columns) floats with NaN =
+    missing, pairs use rows where both are present. Returns (sample_sizes, corr), each
+    (n_groups, columns, columns); corr is NaN where a column is constant or n < 2.
+    """
+    columns = values.shape[1]
+    present = ~np.isnan(values)
+    sizes = np.zeros((n_groups, columns, columns))
+    corr = np.full((n_groups, columns, columns), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Column i against all later columns at once: cells are (group, j) pairs
+        for i in range(columns - 1):
+            k = columns - i - 1
+            both = present[:, i, None] & present[:, i + 1:]
+            cells = (groups[:, None] * k + np.arange(k))[both]
+            x = np.broadcast_to(values[:, i, None], both.shape)[both]
+            y = values[:, i + 1:][both]
+            size = n_groups * k
+            n = _cell_sums(cells, size)
+            dx = x - (_cell_sums(cells, size, x) / n)[cells]
+            dy = y - (_cell_sums(cells, size, y) / n)[cells]
+            divisor = np.sqrt(_cell_sums(cells, size, dx * dx) * _cell_sums(cells, size, dy * dy))
+            r = _cell_sums(cells, size, dx * dy)
+            r = np.where(divisor > 0, np.clip(r / divisor, -1.0, 1.0), np.nan)
+            sizes[:, i, i + 1:] = sizes[:, i + 1:, i] = n.reshape(n_groups, k)
+            corr[:, i, i + 1:] = corr[:, i + 1:, i] = r.reshape(n_groups, k)
+    return sizes, corr
 
 
 WEEKDAY_NAMES = [
@@ -269,35 +304,119 @@ def best_worst_weekday(
     metric: str,
     higher_is_better: bool = True,
     min_days_per_weekday: int = 2,
+    stats: FrameStats | None = None,
 ) -> dict | None:
-    """Return best and worst weekday for a metric (aggregation by weekday)."""
+    """Return best and worst weekday for a metric (aggregation by weekday).
+
+    Reads the per-weekday means from the frame's weekday table (all columns in one pass);
+    pass `stats` to share it across metrics.
+    """
     if metric not in df.columns or df.empty:
         return None
-    series = df[["date", metric]].dropna()
-    if len(series) < 7:
+    table = (stats or FrameStats(df)).get(("weekday_table",))
+    if table is None:
         return None
-    series = series.copy()
-    series["date"] = pd.to_datetime(series["date"])
-    series["weekday"] = series["date"].dt.dayofweek  # 0=Mon, 6=Sun
-    agg = series.groupby("weekday")[metric].agg(["mean", "count"])
-    agg = agg[agg["count"] >= min_days_per_weekday]
-    if len(agg) < 2:
+    counts = table.counts[:, table.columns[metric]]
+    if counts.sum() < 7:
         return None
-    if higher_is_better:
-        best_idx = agg["mean"].idxmax()
-        worst_idx = agg["mean"].idxmin()
-    else:
-        best_idx = agg["mean"].idxmin()
-        worst_idx = agg["mean"].idxmax()
+    weekdays = np.flatnonzero(counts >= min_days_per_weekday)
+    if len(weekdays) < 2:
+        return None
+    means = table.means[weekdays, table.columns[metric]]
+    high, low = means.argmax(), means.argmin()
+    best, worst = (high, low) if higher_is_better else (low, high)
     return {
         "metric": metric,
-        "best_weekday": WEEKDAY_NAMES[int(best_idx)],
-        "worst_weekday": WEEKDAY_NAMES[int(worst_idx)],
-        "best_value": float(round(agg.loc[best_idx, "mean"], 2)),
-        "worst_value": float(round(agg.loc[worst_idx, "mean"], 2)),
+        "best_weekday": WEEKDAY_NAMES[int(weekdays[best])],
+        "worst_weekday": WEEKDAY_NAMES[int(weekdays[worst])],
+        "best_value": float(round(means[best], 2)),
+        "worst_value": float(round(means[worst], 2)),
     }
 
 
+TREND_WINDOWS = (14, 30)
+
+
+def _window_slopes(
+    values: np.ndarray, windows: tuple[int, ...], starts: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """OLS slopes for every column of `values` and every window in one pass.
+
+    `values` has one row per day in date order and one column per metric (NaN = not logged).
+    A column's x is the index of its logged points; window w uses its last w points.
+    Returns (slope, points, flat), each shaped (len(windows), columns). With `starts` (first
+    row of each group, rows sorted by group and date) every group is fitted on its own rows
+    and the results are (len(windows), groups, columns).
+    """
+    grouped = starts is not None
+    starts = np.asarray(starts if grouped else [0])
+    valid = ~np.isnan(values)
+    sizes = np.diff(np.append(starts, len(values)))
+    cumulative = np.cumsum(valid, axis=0)
+    before = np.vstack([np.zeros((1, values.shape[1]), dtype=int), cumulative])[starts]
+    x = (cumulative - np.repeat(before, sizes, axis=0)) - 1.0
+    # 1 = latest point
+    from_end = np.repeat(np.add.reduceat(valid, starts, axis=0), sizes, axis=0) - x
+    mask = valid & (from_end <= np.asarray(windows, dtype=float)[:, None, None])
+    y = np.where(valid, values, 0.0)
+
+    def per_group(a: np.ndarray, ufunc=np.add) -> np.ndarray:
+        return ufunc.reduceat(a, starts, axis=1)
+
+    points = per_group(mask.astype(int))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = per_group(mask * x) / points
+        mean_y = per_group(mask * y) / points
+        dx = np.where(mask, x - np.repeat(mean_x, sizes, axis=1), 0.0)
+        dy = np.where(mask, y - np.repeat(mean_y, sizes, axis=1), 0.0)
+        slope = per_group(dx * dy) / per_group(dx * dx)
+    lowest = per_group(np.where(mask, y, np.inf), np.minimum)
+    flat = lowest == per_group(np.where(mask, y, -np.inf), np.maximum)
+    if not grouped:
+        return slope[:, 0], points[:, 0], flat[:, 0]
+    return slope, points, flat
+
+
+def _trend_items(
+    metrics: List[str],
+    windows: tuple[int, ...],
+    slopes: np.ndarray,
+    points: np.ndarray,
+    flat: np.ndarray,
+    min_points: int = 5,
+) -> dict[int, List[dict]]:
+    """{days: [trend, ...]} from _window_slopes results whose columns are `metrics`."""
+    trends: dict[int, List[dict]] = {days: [] for days in windows}
+    for w, days in enumerate(windows):
+        for m, metric in enumerate(metrics):
+            if points[w, m] < min_points:
+                continue
+            slope = 0.0 if flat[w, m] else float(slopes[w, m])
+            if abs(slope) < 1e-6:
+                direction = "neutral"
+            else:
+                direction = "up" if slope > 0 else "down"
+            trends[days].append(
+                {"metric": metric, "slope": round(slope, 4), "direction": direction, "days": days}
+            )
+    return trends
+
+
+def linear_trends(
+    df: pd.DataFrame,
+    metrics: List[str],
+    windows: tuple[int, ...] = TREND_WINDOWS,
+    min_points: int = 5,
+) -> dict[int, List[dict]]:
+    """linear_trend for several metrics and windows at once: {days: [trend, ...]}, metric order."""
+    metrics = [m for m in metrics if m in df.columns]
+    if df.empty or not metrics:
+        return {days: [] for days in windows}
+    ordered = df if df["date"].is_monotonic_increasing else df.sort_values("date")
+    values = ordered[metrics].to_numpy(dtype=float, na_value=np.nan)
+    return _trend_items(metrics, windows, *_window_slopes(values, windows), min_points)
+
+
 def linear_trend(
     df: pd.DataFrame,
     metric: str,
@@ -305,114 +424,87 @@ def linear_trend(
     min_points: int = 5,
 ) -> dict | None:
     """Simple linear trend over last N days: slope and direction (up/down/neutral)."""
-    if metric not in df.columns or df.empty:
+    found = linear_trends(df, [metric], (days,), min_points)[days]
+    return found[0] if found else None
+
+
+INSIGHT_RULES: List[Rule] = []
+
+
+@rule(INSIGHT_RULES, ("split", "sleep_hours", "deep_work_hours", 6, 7))
+def _sleep_vs_productivity(split: Split):
+    if split.n < 6 or split.low_n < 3 or split.high_n < 3 or split.high_mean <= 0:
         return None
-    series = df[["date", metric]].dropna().sort_values("date").tail(days)
-    if len(series) < min_points:
+    drop_pct = (1 - split.low_mean / split.high_mean) * 100
+    if drop_pct < 15:
         return None
-    series = series.reset_index(drop=True)
-    x = np.arange(len(series))
-    y = series[metric].values.astype(float)
-    if np.all(y == y[0]):
-        return {"metric": metric, "slope": 0.0, "direction": "neutral", "days": days}
-    if LinearRegression is not None:
-        model = LinearRegression().fit(x.reshape(-1, 1), y)
-        slope = float(model.coef_[0])
-    else:
-        slope = float(np.polyfit(x, y, 1)[0])
-    if abs(slope) < 1e-6:
-        direction = "neutral"
-    else:
-        direction = "up" if slope > 0 else "down"
-    return {
-        "metric": metric,
-        "slope": round(slope, 4),
-        "direction": direction,
-        "days": days,
-    }
+    return (
+        f"When you sleep under 6h, deep work drops by "
+        f"{drop_pct:.0f}% compared to 7h+."
+    )
 
 
-def _expenses_vs_income_trend_insight(df: pd.DataFrame):
-    """Expenses grow faster than income (linear trend comparison)."""
-    expense_cols = [c for c in df.columns if c.startswith("expense_")]
-    if not expense_cols or "income" not in df.columns:
-        return None
-    df = df.copy()
-    df["_total_expense"] = df[expense_cols].sum(axis=1)
-    sample = df[["date", "income", "_total_expense"]].dropna()
-    if len(sample) < 10:
+@rule(INSIGHT_RULES, ("slope", "sleep_hours", "energy_level"))
+def _sleep_energy_trend(fit: Measure):
+    if fit.n < 6 or not fit.value > 0.25:
         return None
-    sample = sample.sort_values("date").tail(30)
-    if len(sample) < 10:
+    return (
+        "Energy rises with more sleep (linear trend detected). "
+        f"+{fit.value:.2f} energy per extra hour."
+    )
+
+
+@rule(INSIGHT_RULES, ("corr", "expense_food", "wellbeing"))
+def _finance_wellbeing(corr: Measure):
+    if corr.n < 6 or not corr.value < -0.35:
         return None
-    x = np.arange(len(sample))
-    inc_slope = float(np.polyfit(x, sample["income"].values, 1)[0])
-    exp_slope = float(np.polyfit(x, sample["_total_expense"].values, 1)[0])
-    if inc_slope <= 0 or exp_slope <= inc_slope:
+    return (
+        "Food spending tends to align with lower wellbeing "
+        f"(r={corr.value:.2f})."
+    )
+
+
+@rule(INSIGHT_RULES, ("expense_income_slopes", 30))
+def _expenses_vs_income_trend(slopes: Slopes):
+    """Expenses grow faster than income (linear trend comparison)."""
+    if slopes.n < 10 or not slopes.income > 0 or not slopes.expense > slopes.income:
         return None
-    pct = (exp_slope / inc_slope - 1) * 100
+    pct = (slopes.expense / slopes.income - 1) * 100
     return (
         f"Expenses are growing faster than income over the last 30 days "
         f"(expenses trend ~{pct:.0f}% steeper)."
     )
 
 
-def _sleep_after_weekend_insight(df: pd.DataFrame):
+@rule(INSIGHT_RULES, ("weekday_split", "sleep_hours", 0))
+def _sleep_after_weekend(monday: WeekdaySplit):
     """Sleep is worse after weekends (e.g. Monday vs other days)."""
-    if "sleep_hours" not in df.columns or df.empty:
+    if monday.day_n < 3 or monday.other_n < 10:
         return None
-    df = df.copy()
-    df["date"] = pd.to_datetime(df["date"])
-    df["weekday"] = df["date"].dt.dayofweek
-    mon = df[df["weekday"] == 0]["sleep_hours"].dropna()
-    other = df[df["weekday"] != 0]["sleep_hours"].dropna()
-    if len(mon) < 3 or len(other) < 10:
+    if monday.day_mean >= monday.other_mean - 0.2:
         return None
-    mon_avg = mon.mean()
-    other_avg = other.mean()
-    if mon_avg >= other_avg - 0.2:
-        return None
-    diff = other_avg - mon_avg
+    diff = monday.other_mean - monday.day_mean
     return (
-        f"Sleep is worse after weekends: Monday avg {mon_avg:.1f}h vs "
-        f"{other_avg:.1f}h on other days (−{diff:.1f}h)."
+        f"Sleep is worse after weekends: Monday avg {monday.day_mean:.1f}h vs "
+        f"{monday.other_mean:.1f}h on other days (−{diff:.1f}h)."
     )
 
 
-def _focus_higher_with_sleep_insight(df: pd.DataFrame):
+@rule(INSIGHT_RULES, ("split", "sleep_hours", "focus_level", 6, 6))
+def _focus_higher_with_sleep(split: Split):
     """Focus is higher on days with >6h sleep."""
-    if "focus_level" not in df.columns or "sleep_hours" not in df.columns:
-        return None
-    low = df[df["sleep_hours"] < 6][["sleep_hours", "focus_level"]].dropna()
-    high = df[df["sleep_hours"] >= 6][["sleep_hours", "focus_level"]].dropna()
-    if len(low) < 3 or len(high) < 3:
-        return None
-    f_low = low["focus_level"].mean()
-    f_high = high["focus_level"].mean()
-    if f_high <= f_low + 0.3:
+    if split.low_n < 3 or split.high_n < 3 or split.high_mean <= split.low_mean + 0.3:
         return None
     return (
-        f"Focus is higher on days with ≥6h sleep: {f_high:.1f} vs {f_low:.1f} "
+        f"Focus is higher on days with ≥6h sleep: {split.high_mean:.1f} vs {split.low_mean:.1f} "
         "on days with less sleep."
     )
 
 
-def generate_insights(df: pd.DataFrame) -> List[dict]:
-    insights = []
-
-    for candidate in (
-        _sleep_vs_productivity_insight,
-        _sleep_energy_trend_insight,
-        _finance_wellbeing_insight,
-        _expenses_vs_income_trend_insight,
-        _sleep_after_weekend_insight,
-        _focus_higher_with_sleep_insight,
-    ):
-        message = candidate(df)
-        if message:
-            insights.append({"message": message, "severity": "info"})
-        if len(insights) >= 4:
-            break
+def generate_insights(df: pd.DataFrame, stats: FrameStats | None = None) -> List[dict]:
+    """Up to 4 insights from INSIGHT_RULES (pass `stats` to share statistics with other rules)."""
+    stats = stats or FrameStats(df)
+    insights = evaluate_rules(INSIGHT_RULES, stats, limit=4)
 
     if not insights and not df.empty:
         insights.append(
@@ -433,13 +525,13 @@ def insights_payload(db, user_id: int | None = None):
     }
 
 
-def trend_this_month(df: pd.DataFrame) -> List[dict]:
+def trend_this_month(df: pd.DataFrame, today: date | None = None) -> List[dict]:
     """Compare key metrics: this month vs previous month → direction up/down/neutral."""
     if df.empty or "date" not in df.columns:
         return []
     df = df.copy()
     df["date"] = pd.to_datetime(df["date"])
-    today = pd.Timestamp.now().normalize()
+    today = pd.Timestamp(today) if today else pd.Timestamp.now().normalize()
     this_month_start = today.replace(day=1)
     prev_month_end = this_month_start - timedelta(days=1)
     prev_month_start = prev_month_end.replace(day=1)
@@ -505,50 +597,57 @@ def trend_this_month(df: pd.DataFrame) -> List[dict]:
     return result
 
 
-def insight_of_the_week(df: pd.DataFrame, goals: List[dict] | None = None) -> str | None:
+def insight_of_the_week(
+    df: pd.DataFrame, goals: List[dict] | None = None, stats: FrameStats | None = None
+) -> str | None:
     """Single highlighted insight: first from insights or recommendations."""
     from .ml.recommender import generate_recommendations
 
-    insights = generate_insights(df)
+    stats = stats or FrameStats(df)
+    insights = generate_insights(df, stats)
     if insights:
         return insights[0].get("message")
-    recs = generate_recommendations(df, goals=goals or [])
+    recs = generate_recommendations(df, goals=goals or [], stats=stats)
     if recs:
         return recs[0].get("message")
     return None
 
 
-def weekday_and_trends_payload(df: pd.DataFrame) -> dict:
-    """Best/worst weekday for sleep and productivity; linear trends 14/30 days."""
+def weekday_and_trends_payload(
+    df: pd.DataFrame,
+    extra_metrics: tuple[str, ...] = (),
+    stats: FrameStats | None = None,
+    trends: dict[int, List[dict]] | None = None,
+) -> dict:
+    """Best/worst weekday for sleep and productivity (plus `extra_metrics`); trends 14/30 days.
+
+    Pass `trends` when they were already fitted (population_payloads fits all users at once).
+    """
     payload: dict[str, Any] = {
         "best_worst_weekday": [],
         "trends_14": [],
         "trends_30": [],
     }
+    stats = stats or FrameStats(df)
     for metric, higher in [("sleep_hours", True), ("deep_work_hours", True), ("weight_kg", False)]:
         if metric in df.columns:
-            bw = best_worst_weekday(df, metric, higher_is_better=higher)
+            bw = best_worst_weekday(df, metric, higher_is_better=higher, stats=stats)
             if bw:
                 payload["best_worst_weekday"].append(bw)
-    for metric in ("sleep_hours", "deep_work_hours", "weight_kg"):
-        if metric in df.columns:
-            for d in (14, 30):
-                t = linear_trend(df, metric, days=d)
-                if t:
-                    payload[f"trends_{d}"].append(t)
-    expense_cols = [c for c in df.columns if c.startswith("expense_")]
-    if expense_cols:
-        df_temp = df.copy()
-        df_temp["total_expense"] = df_temp[expense_cols].sum(axis=1)
-        for d in (14, 30):
-            t = linear_trend(df_temp, "total_expense", days=d)
-            if t:
-                payload[f"trends_{d}"].append(t)
-    if "income" in df.columns:
-        for d in (14, 30):
-            t = linear_trend(df, "income", days=d)
-            if t:
-                payload[f"trends_{d}"].append(t)
+    for metric in extra_metrics:
+        bw = best_worst_weekday(df, metric, higher_is_better=True, stats=stats)
+        if bw:
+            payload["best_worst_weekday"].append(bw)
+    if trends is None:
+        metrics = ["sleep_hours", "deep_work_hours", "weight_kg"]
+        expense_cols = [c for c in df.columns if c.startswith("expense_")]
+        if expense_cols:
+            df = df.assign(total_expense=df[expense_cols].sum(axis=1))
+            metrics.append("total_expense")
+        metrics.extend(["income", *extra_metrics])
+        trends = linear_trends(df, metrics, TREND_WINDOWS)
+    for days, window_trends in trends.items():
+        payload[f"trends_{days}"] = window_trends
     return payload
 
 
@@ -561,37 +660,53 @@ def weekly_digest(df: pd.DataFrame, period_start: date, period_end: date) -> dic
         if "sleep_hours" in df.columns:
             summary["health"] = {
                 "sleep_avg": round(float(df["sleep_hours"].mean()), 1),
-                "energy_avg": round(float(df["energy_level"].mean()), 1) if "energy_level" in df.columns else None,
-                "wellbeing_avg": round(float(df["wellbeing"].mean()), 1) if "wellbeing" in df.columns else None,
+                "energy_avg": (
+                    round(float(df["energy_level"].mean()), 1)
+                    if "energy_level" in df.columns else None
+                ),
+                "wellbeing_avg": (
+                    round(float(df["wellbeing"].mean()), 1) if "wellbeing" in df.columns else None
+                ),
             }
         expense_cols = [c for c in df.columns if c.startswith("expense_")]
         if "income" in df.columns:
             summary["finance"] = {
                 "income_total": round(float(df["income"].sum()), 0),
-                "expense_total": round(float(df[expense_cols].sum().sum()), 0) if expense_cols else 0,
+                "expense_total": (
+                    round(float(df[expense_cols].sum().sum()), 0) if expense_cols else 0
+                ),
             }
         if "deep_work_hours" in df.columns:
             prod = {
                 "deep_work_total": round(float(df["deep_work_hours"].sum()), 1),
-                "tasks_total": int(df["tasks_completed"].sum()) if "tasks_completed" in df.columns else None,
-                "focus_avg": round(float(df["focus_level"].mean()), 1) if "focus_level" in df.columns else None,
+                "tasks_total": (
+                    int(df["tasks_completed"].sum()) if "tasks_completed" in df.columns else None
+                ),
+                "focus_avg": (
+                    round(float(df["focus_level"].mean()), 1)
+                    if "focus_level" in df.columns else None
+                ),
             }
-            if "session_deep_work_hours" in df.columns:
-                prod["session_deep_work_total"] = round(float(df["session_deep_work_hours"].sum()), 1)
-            if "total_deep_work_hours" in df.columns:
-                prod["total_deep_work_total"] = round(float(df["total_deep_work_hours"].sum()), 1)
+            for column, key in (
+                ("session_deep_work_hours", "session_deep_work_total"),
+                ("total_deep_work_hours", "total_deep_work_total"),
+            ):
+                if column in df.columns:
+                    prod[key] = round(float(df[column].sum()), 1)
             summary["productivity"] = prod
         if "study_hours" in df.columns:
             summary["learning"] = {
                 "study_total": round(float(df["study_hours"].sum()), 1),
             }
-    insights = generate_insights(df)
-    recs = generate_recommendations(df, goals=None)
+    stats = FrameStats(df)
+    insights = generate_insights(df, stats)
     insight = None
     if insights:
         insight = insights[0].get("message")
-    elif recs:
-        insight = recs[0].get("message")
+    else:
+        recs = generate_recommendations(df, goals=None, stats=stats)
+        if recs:
+            insight = recs[0].get("message")
     return {
         "period_start": period_start,
         "period_end": period_end,
@@ -601,67 +716,279 @@ def weekly_digest(df: pd.DataFrame, period_start: date, period_end: date) -> dic
     }
 
 
-def focus_by_category(db, user_id: int) -> List[dict]:
-    """Aggregate productivity entries by focus_category (sum deep_work_hours). 'На что уходит время'."""
-    from sqlalchemy import func
+def weekly_report_for_user(db, user_id: int, period_end: date | None = None) -> dict:
+    """weekly_digest over the 7 days ending `period_end` (default today)."""
+    period_end = period_end or date.today()
+    period_start = period_end - timedelta(days=6)
+    df = build_daily_dataframe(db, user_id=user_id, start=period_start, end=period_end)
+    return weekly_digest(df, period_start, period_end)
+
+
+def _previous_month_start(today: date) -> date:
+    return (today.replace(day=1) - timedelta(days=1)).replace(day=1)
 
-    rows = (
-        db.query(models.ProductivityEntry.focus_category, func.sum(models.ProductivityEntry.deep_work_hours).label("hours"))
-        .filter(
-            models.ProductivityEntry.user_id == user_id,
-            models.ProductivityEntry.focus_category.isnot(None),
-            models.ProductivityEntry.focus_category != "",
+
+# First local_date each payload reads, given today (None = the whole history). Callers load
+# only that window; build_daily_dataframe bounds it in SQL.
+PAYLOAD_WINDOWS: dict[str, Callable[[date], date | None]] = {
+    "correlations": lambda today: None,
+    "insights": lambda today: None,
+    "recommendations": lambda today: None,
+    "insight_of_the_week": lambda today: None,
+    # Best/worst weekday averages all history; trends use the last 14/30 logged days
+    "weekday_trends": lambda today: None,
+    "trend_this_month": _previous_month_start,
+    "weekly_report": lambda today: today - timedelta(days=6),
+}
+
+
+def payload_window_start(names: Iterable[str], today: date | None = None) -> date | None:
+    """First local_date the named payloads need together (the union of their windows)."""
+    today = today or date.today()
+    starts = [PAYLOAD_WINDOWS[name](today) for name in names]
+    if not starts or None in starts:
+        return None
+    return min(starts)
+
+
+def build_payload_dataframe(
+    db, user_id: int, *names: str, today: date | None = None
+) -> pd.DataFrame:
+    """Daily frame covering just the window the named payloads need."""
+    return build_daily_dataframe(db, user_id=user_id, start=payload_window_start(names, today))
+
+
+def _bundle_recommendations(df, stats, goals, today):
+    from .ml.recommender import recommendations_payload
+
+    return recommendations_payload(df, goals=goals, stats=stats)
+
+
+_BUNDLE_BUILDERS: dict[str, Callable[..., dict]] = {
+    "correlations": lambda df, stats, goals, today: {"correlations": compute_correlations(df)},
+    "insights": lambda df, stats, goals, today: {
+        "generated_at": datetime.utcnow(),
+        "insights": generate_insights(df, stats),
+    },
+    "recommendations": _bundle_recommendations,
+    "trend_this_month": lambda df, stats, goals, today: {"metrics": trend_this_month(df, today)},
+    "insight_of_the_week": lambda df, stats, goals, today: {
+        "insight": insight_of_the_week(df, goals=goals, stats=stats),
+    },
+    "weekday_trends": lambda df, stats, goals, today: weekday_and_trends_payload(df, stats=stats),
+}
+BUNDLE_PAYLOADS = tuple(_BUNDLE_BUILDERS)
+
+
+def payload_bundle(
+    db,
+    user_id: int,
+    names: Iterable[str],
+    goals: List[dict] | None = None,
+    today: date | None = None,
+) -> dict[str, dict]:
+    """Several payloads from one load of the union of their windows.
+
+    Each payload still sees only its own window; payloads with the same window share one
+    FrameStats (weekday table, correlations, ...).
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    today = today or date.today()
+    df = build_payload_dataframe(db, user_id, *names, today=today)
+    windows: dict[date | None, tuple[pd.DataFrame, FrameStats]] = {}
+    bundle = {}
+    for name in names:
+        start = PAYLOAD_WINDOWS[name](today)
+        if start not in windows:
+            frame = df
+            if start is not None and not df.empty:
+                frame = df[df["date"] >= start].reset_index(drop=True)
+            windows[start] = (frame, FrameStats(frame))
+        frame, stats = windows[start]
+        bundle[name] = _BUNDLE_BUILDERS[name](frame, stats, goals or [], today)
+    return bundle
+
+
+# Payloads population_payloads precomputes (the whole-history ones; cache keys as the endpoints)
+POPULATION_PAYLOADS = (
+    "correlations", "insights", "recommendations", "insight_of_the_week", "weekday_trends"
+)
+_POPULATION_TREND_METRICS = (
+    "sleep_hours", "deep_work_hours", "weight_kg", "total_expense", "income"
+)
+
+
+def population_payloads(
+    population: PopulationFrame, goals: dict[int, List[dict]] | None = None
+) -> dict[int, dict[str, dict]]:
+    """POPULATION_PAYLOADS for every user in `population`, as the single endpoints build them.
+
+    Weekday tables, pairwise correlations and 14/30-day trends come from grouped NumPy kernels
+    over all users' rows at once and are seeded into each user's FrameStats; recommendations
+    are scored for all users in one matrix operation. Insight rules still run per user, over
+    those shared statistics.
+    """
+    from .ml.recommender import batch_recommendations
+    from .ml.rules import WeekdayTable, weekday_aggregate
+
+    df = population.df
+    if df.empty:
+        return {}
+    goals = goals or {}
+    user_ids, starts = np.unique(df["user_id"].to_numpy(), return_index=True)
+    ends = np.append(starts[1:], len(df))
+    groups = np.repeat(np.arange(len(user_ids)), ends - starts)
+    columns = [c for c in df.columns if c not in ("user_id", "date")]
+    index = {name: i for i, name in enumerate(columns)}
+    values = df[columns].to_numpy(dtype=float, na_value=np.nan)
+    dates = df["date"].to_numpy()
+    weekdays = pd.to_datetime(df["date"]).dt.dayofweek.to_numpy()
+    counts, sums, means = weekday_aggregate(weekdays, values, groups, len(user_ids))
+    sample_sizes, corr = grouped_correlations(groups, values, len(user_ids))
+
+    expense_cols = [index[c] for c in columns if c.startswith("expense_")]
+    trend_columns = {
+        "total_expense": (
+            np.nan_to_num(values[:, expense_cols]).sum(axis=1) if expense_cols else None
+        ),
+        **{m: values[:, index[m]] for m in _POPULATION_TREND_METRICS if m in index},
+    }
+    trend_metrics = [m for m in _POPULATION_TREND_METRICS if trend_columns.get(m) is not None]
+    trend_values = np.column_stack(
+        [trend_columns[m] for m in trend_metrics] or [np.empty((len(df), 0))]
+    )
+    slopes, points, flat = _window_slopes(trend_values, TREND_WINDOWS, starts)
+
+    generated_at = datetime.utcnow()
+    frames, payloads = [], {}
+    for g, user_id in enumerate(user_ids.tolist()):
+        names = population.columns[user_id]
+        rows = slice(starts[g], ends[g])
+        columns_of_user = {name: values[rows, index[name]] for name in names}
+        frame = pd.DataFrame({"date": dates[rows], **columns_of_user})
+        stats = FrameStats(frame)
+        stats.seed(("weekday",), weekdays[rows])
+        for name, column in columns_of_user.items():
+            stats.seed(("column", name), column)
+        table = WeekdayTable({n: index[n] for n in names}, counts[g], sums[g], means[g])
+        stats.seed(("weekday_table",), table)
+        has_expenses = any(n.startswith("expense_") for n in names)
+        total_expense = trend_columns["total_expense"][rows] if has_expenses else None
+        stats.seed(("total_expense",), total_expense)
+        frames.append(stats)
+
+        cells = np.ix_([index[n] for n in names], [index[n] for n in names])
+        ks = [
+            k
+            for k, m in enumerate(trend_metrics)
+            if m in names or (m == "total_expense" and has_expenses)
+        ]
+        trends = _trend_items(
+            [trend_metrics[k] for k in ks],
+            TREND_WINDOWS,
+            slopes[:, g, ks],
+            points[:, g, ks],
+            flat[:, g, ks],
         )
-        .group_by(models.ProductivityEntry.focus_category)
-        .all()
+        payloads[user_id] = {
+            "correlations": {
+                "correlations": _correlation_items(names, corr[g][cells], sample_sizes[g][cells])
+                if len(frame) >= 5 else [],
+            },
+            "insights": {"generated_at": generated_at, "insights": generate_insights(frame, stats)},
+            "weekday_trends": weekday_and_trends_payload(frame, stats=stats, trends=trends),
+        }
+
+    ranked = batch_recommendations(frames, [goals.get(user_id) for user_id in user_ids.tolist()])
+    for user_id, recommendations in zip(user_ids.tolist(), ranked, strict=True):
+        user = payloads[user_id]
+        user["recommendations"] = {"generated_at": generated_at, "recommendations": recommendations}
+        first = user["insights"]["insights"] or recommendations
+        user["insight_of_the_week"] = {"insight": first[0].get("message") if first else None}
+    return payloads
+
+
+def focus_aggregates(db, user_id: int) -> dict:
+    """Focus sessions by local hour of week and deep work by category, in one round trip.
+
+    Sessions are grouped in SQL by (weekday of local_date, hour of recorded_at in the session's
+    timezone); top hours and the session total are derived from those at most 168 rows.
+    Returns the dashboard's session_deep_work_hours_total, top_hours, focus_by_category and
+    focus_heatmap (None when there is nothing to show).
+    """
+    from sqlalchemy import Integer, String, cast, func, literal_column, null, union_all
+
+    from .database import iso_weekday, local_hour
+
+    session, entry = models.FocusSession, models.ProductivityEntry
+    weekday = iso_weekday(session.local_date)
+    hour = local_hour(session.recorded_at, session.timezone)
+    by_hour_of_week = (
+        select(
+            literal_column("'hour'").label("kind"),
+            cast(null(), String).label("category"),
+            weekday.label("weekday"),
+            hour.label("hour"),
+            func.count().label("sessions"),
+            func.sum(session.duration_minutes).label("amount"),
+        )
+        .where(session.user_id == user_id)
+        .group_by(weekday, hour)
+    )
+    by_category = (
+        select(
+            literal_column("'category'"),
+            entry.focus_category,
+            cast(null(), Integer),
+            cast(null(), Integer),
+            func.count(),
+            func.sum(entry.deep_work_hours),
+        )
+        .where(
+            entry.user_id == user_id,
+            entry.focus_category.isnot(None),
+            entry.focus_category != "",
+        )
+        .group_by(entry.focus_category)
     )
-    return [{"category": str(cat), "hours": round(float(h), 1)} for cat, h in rows]
+
+    heatmap, categories = [], []
+    sessions_by_hour: dict[int, int] = {}
+    for kind, category, wd, h, count, amount in db.execute(union_all(by_hour_of_week, by_category)):
+        if kind == "hour":
+            heatmap.append(
+                {"weekday": int(wd), "hour": int(h), "sessions": int(count), "minutes": int(amount)}
+            )
+            sessions_by_hour[int(h)] = sessions_by_hour.get(int(h), 0) + int(count)
+        else:
+            categories.append({"category": str(category), "hours": round(float(amount), 1)})
+    heatmap.sort(key=lambda cell: (cell["weekday"], cell["hour"]))
+    categories.sort(key=lambda item: (-item["hours"], item["category"]))
+    top_hours = sorted(sessions_by_hour, key=lambda h: (-sessions_by_hour[h], h))[:5]
+    return {
+        "session_deep_work_hours_total": (
+            round(sum(cell["minutes"] for cell in heatmap) / 60.0, 1) if heatmap else None
+        ),
+        "top_hours": top_hours or None,
+        "focus_by_category": categories or None,
+        "focus_heatmap": heatmap or None,
+    }
 
 
 def productivity_dashboard_payload(db, user_id: int, goals: List[dict] | None = None) -> dict:
-    """Best days/hours, focus by category, link to sleep/learning (insight)."""
+    """Best days/hours, focus heatmap and categories, link to sleep/learning (insight)."""
     df = build_daily_dataframe(db, user_id=user_id)
-    payload = weekday_and_trends_payload(df)
     # Add total_deep_work_hours (entries + sessions) when available
-    if "total_deep_work_hours" in df.columns:
-        bw = best_worst_weekday(df, "total_deep_work_hours", higher_is_better=True)
-        if bw:
-            payload["best_worst_weekday"].append(bw)
-        for d in (14, 30):
-            t = linear_trend(df, "total_deep_work_hours", days=d)
-            if t:
-                payload[f"trends_{d}"].append(t)
-
-    # Session deep work total (Pomodoro/timers aggregated)
-    session_total = None
-    if "session_deep_work_hours" in df.columns:
-        session_total = round(float(df["session_deep_work_hours"].sum()), 1)
-    payload["session_deep_work_hours_total"] = session_total
-
-    # Top hours of day (when user has most focus sessions; hour in UTC from recorded_at)
-    focus_sessions = (
-        db.query(models.FocusSession.recorded_at)
-        .filter(models.FocusSession.user_id == user_id)
-        .all()
-    )
-    if focus_sessions:
-        from collections import Counter
-        hours = []
-        for (recorded_at,) in focus_sessions:
-            if recorded_at is not None:
-                h = recorded_at.hour if hasattr(recorded_at, "hour") else recorded_at.replace(tzinfo=None).hour
-                hours.append(h)
-        if hours:
-            counts = Counter(hours)
-            top = sorted(counts.keys(), key=lambda h: (-counts[h], h))[:5]
-            payload["top_hours"] = top
-
-    # Focus by category
-    by_cat = focus_by_category(db, user_id)
-    if by_cat:
-        payload["focus_by_category"] = by_cat
+    extra = ("total_deep_work_hours",) if "total_deep_work_hours" in df.columns else ()
+    stats = FrameStats(df)
+    payload = weekday_and_trends_payload(df, extra_metrics=extra, stats=stats)
+
+    # Session total, top local hours, hour-of-week heatmap and focus by category (SQL aggregates)
+    payload.update(focus_aggregates(db, user_id))
 
     # One insight (sleep/productivity or recommendation)
-    payload["insight"] = insight_of_the_week(df, goals=goals or [])
+    payload["insight"] = insight_of_the_week(df, goals=goals or [], stats=stats)
 
     return payload
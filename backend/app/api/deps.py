@@ -2,11 +2,14 @@
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import models
 from ..core.security import decode_token
-from ..database import get_db
+from ..database import get_async_db, get_db, get_read_db, has_read_replica
+from ..services.principals import get_principal, get_principal_async
+from ..services.read_routing import USER_INFO_KEY, recently_wrote
 
 security = HTTPBearer(auto_error=False)
 
@@ -15,10 +18,12 @@ def get_db_session():
     yield from get_db()
 
 
-def get_current_user(
-    db: Session = Depends(get_db_session),
-    credentials: HTTPAuthorizationCredentials | None = Depends(security),
-):
+async def get_async_db_session():
+    async for db in get_async_db():
+        yield db
+
+
+def _token_subject(credentials: HTTPAuthorizationCredentials | None) -> tuple[int, int]:
     if not credentials:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     try:
@@ -26,10 +31,55 @@ def get_current_user(
         sub = payload.get("sub")
         if not sub:
             raise ValueError("No sub")
-        user_id = int(sub)
+        return int(sub), int(payload.get("ver", 0))
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.get(models.User, user_id)
+
+
+def get_current_user(
+    db: Session = Depends(get_db_session),
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+):
+    """Return a cached Principal snapshot; use get_current_user_record when the ORM row is needed."""
+    user_id, token_version = _token_subject(credentials)
+    principal = get_principal(db, user_id, token_version)
+    if not principal:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    db.info[USER_INFO_KEY] = principal.id
+    return principal
+
+
+def get_read_db_session(
+    db: Session = Depends(get_db_session),
+    user=Depends(get_current_user),
+):
+    """Session for read-only routes: the replica (DATABASE_READ_URL), or the primary when no
+    replica is configured or the user wrote within READ_YOUR_WRITES_SECONDS."""
+    if not has_read_replica() or recently_wrote(user.id):
+        yield db
+        return
+    yield from get_read_db()
+
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db_session),
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+):
+    """get_current_user for async routes (the database is awaited, not run in the threadpool)."""
+    user_id, token_version = _token_subject(credentials)
+    principal = await get_principal_async(db, user_id, token_version)
+    if not principal:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    db.sync_session.info[USER_INFO_KEY] = principal.id
+    return principal
+
+
+def get_current_user_record(
+    db: Session = Depends(get_db_session),
+    principal=Depends(get_current_user),
+) -> models.User:
+    """Load the users row for the authenticated principal (for routes that modify the user)."""
+    user = db.get(models.User, principal.id)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
@@ -1,10 +1,12 @@
 from fastapi import APIRouter
 
+from ..core.config import get_settings
 from .routes import (
     admin,
     analytics,
     auth,
     billing,
+    bulk,
     export,
     finance,
     goals,
@@ -16,18 +18,50 @@ from .routes import (
     reminders,
 )
 
-api_router = APIRouter()
-
-api_router.include_router(health.router)
-api_router.include_router(finance.router)
-api_router.include_router(productivity.router)
-api_router.include_router(learning.router)
-api_router.include_router(goals.router)
-api_router.include_router(analytics.router)
-api_router.include_router(export.router)
-api_router.include_router(reminders.router)
-api_router.include_router(auth.router)
-api_router.include_router(admin.router)
-api_router.include_router(integrations.router)
-api_router.include_router(billing.router)
-api_router.include_router(llm.router)
+
+def _without_routes(router: APIRouter, shadowed: set[tuple[str, str]]) -> APIRouter:
+    """Copy of `router` minus the (path, method) pairs served by the async routers."""
+
+    def served(route) -> bool:
+        methods = getattr(route, "methods", None)
+        return bool(methods) and all((route.path, method) in shadowed for method in methods)
+
+    filtered = APIRouter()
+    filtered.routes.extend(route for route in router.routes if not served(route))
+    return filtered
+
+
+def build_api_router(async_api: bool = False) -> APIRouter:
+    root = APIRouter()
+    shadowed: set[tuple[str, str]] = set()
+    if async_api:
+        from .routes import async_api as async_routes
+
+        for router in async_routes.routers:
+            root.include_router(router)
+            shadowed.update(
+                (route.path, method) for route in router.routes for method in route.methods
+            )
+
+    for router in (
+        health.router,
+        finance.router,
+        productivity.router,
+        learning.router,
+        goals.router,
+        analytics.router,
+        export.router,
+        reminders.router,
+        auth.router,
+        admin.router,
+        integrations.router,
+        billing.router,
+        llm.router,
+    ):
+        root.include_router(_without_routes(router, shadowed) if shadowed else router)
+    for router in bulk.routers:
+        root.include_router(router)
+    return root
+
+
+api_router = build_api_router(get_settings().async_api)
@@ -3,7 +3,10 @@ from sqlalchemy.orm import Session
 
 from ... import models, schemas
 from ...core.constants import ALLOWED_ROLES, ROLE_ADMIN
+from ...database import engine, pool_metrics, read_engine
+from ...services.cache import get_cache_client
 from ...services.users import set_user_role
+from ...tasks.population_analytics import spawn_population_analytics
 from ..deps import get_db_session, require_role
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -30,3 +33,36 @@ def update_user_role(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return set_user_role(db, user, payload.role)
+
+
+@router.get("/metrics/db-pool")
+def db_pool_metrics(_admin=Depends(require_role(ROLE_ADMIN))):
+    """Connection pool usage for the primary and (if configured) the read replica."""
+    payload = {"primary": pool_metrics(engine)}
+    if read_engine is not engine:
+        payload["replica"] = pool_metrics(read_engine)
+    return payload
+
+
+@router.post("/analytics/refresh", status_code=202)
+def refresh_analytics(
+    payload: schemas.AnalyticsRefreshRequest,
+    _admin=Depends(require_role(ROLE_ADMIN)),
+):
+    """Recompute cached analytics for the given users (default: all) in a separate process.
+
+    The results only live in Redis, so without REDIS_URL there is nothing to refresh (503).
+    """
+    if get_cache_client() is None:
+        raise HTTPException(status_code=503, detail="Analytics cache (Redis) is not configured")
+    pid = spawn_population_analytics(
+        payload.user_ids,
+        chunk_size=payload.chunk_size,
+        workers=payload.workers,
+        ttl_seconds=payload.ttl_seconds,
+    )
+    return {
+        "status": "scheduled",
+        "users": len(payload.user_ids) if payload.user_ids is not None else None,
+        "pid": pid,
+    }
@@ -1,19 +1,23 @@
-from fastapi import APIRouter, Depends
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from ... import analytics, schemas
+from ... import analytics, models, schemas
 from ...core.config import get_settings
 from ...ml.recommender import recommendations_payload
 from ...services.cache import get_json, set_json
 from ...services.goals import list_goals
-from ..deps import get_current_user, get_db_session
+from ..deps import get_current_user, get_read_db_session
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
 @router.get("/correlations", response_model=schemas.CorrelationsResponse)
 def correlations(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     settings = get_settings()
@@ -31,7 +35,7 @@ def correlations(
 
 @router.get("/insights", response_model=schemas.InsightsResponse)
 def insights(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     settings = get_settings()
@@ -49,10 +53,21 @@ def insights(
 
 @router.get("/weekly-report", response_model=schemas.WeeklyReportResponse)
 def weekly_report(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
-    from datetime import date, timedelta
+    # Precomputed by tasks/weekly_digest; computed on demand only when there is none this week
+    stored = db.scalars(
+        select(models.WeeklyReport)
+        .where(
+            models.WeeklyReport.user_id == user.id,
+            models.WeeklyReport.period_end >= date.today() - timedelta(days=6),
+        )
+        .order_by(models.WeeklyReport.period_end.desc())
+        .limit(1)
+    ).first()
+    if stored is not None:
+        return stored
 
     settings = get_settings()
     cache_key = f"weekly_report:{user.id}"
@@ -60,12 +75,7 @@ def weekly_report(
     if cached:
         return cached
 
-    df = analytics.build_daily_dataframe(db, user_id=user.id)
-    period_end = date.today()
-    period_start = period_end - timedelta(days=6)
-    if "date" in df.columns and not df.empty:
-        df = df[(df["date"] >= period_start) & (df["date"] <= period_end)]
-    payload = analytics.weekly_digest(df, period_start, period_end)
+    payload = analytics.weekly_report_for_user(db, user.id)
     cache_payload = {
         "period_start": payload["period_start"].isoformat(),
         "period_end": payload["period_end"].isoformat(),
@@ -79,7 +89,7 @@ def weekly_report(
 
 @router.get("/recommendations", response_model=schemas.RecommendationsResponse)
 def recommendations(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     settings = get_settings()
@@ -108,7 +118,7 @@ def recommendations(
 
 @router.get("/trend-this-month", response_model=schemas.TrendThisMonthResponse)
 def trend_this_month(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     settings = get_settings()
@@ -117,7 +127,7 @@ def trend_this_month(
     if cached:
         return cached
 
-    df = analytics.build_daily_dataframe(db, user_id=user.id)
+    df = analytics.build_payload_dataframe(db, user.id, "trend_this_month")
     metrics = analytics.trend_this_month(df)
     payload = {"metrics": metrics}
     set_json(cache_key, payload, settings.cache_ttl_seconds)
@@ -126,7 +136,7 @@ def trend_this_month(
 
 @router.get("/insight-of-the-week", response_model=schemas.InsightOfTheWeekResponse)
 def insight_of_the_week(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     settings = get_settings()
@@ -149,7 +159,7 @@ def insight_of_the_week(
 
 @router.get("/weekday-trends", response_model=schemas.WeekdayTrendsResponse)
 def weekday_trends(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     settings = get_settings()
@@ -166,7 +176,7 @@ def weekday_trends(
 
 @router.get("/productivity-dashboard", response_model=schemas.ProductivityDashboardResponse)
 def productivity_dashboard(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     """Best days/hours, focus by category, link to sleep/learning (insight)."""
@@ -184,3 +194,38 @@ def productivity_dashboard(
     payload = analytics.productivity_dashboard_payload(db, user_id=user.id, goals=goals)
     set_json(cache_key, payload, settings.cache_ttl_seconds)
     return payload
+
+
+@router.get("/bundle", response_model=schemas.AnalyticsBundleResponse)
+def bundle(
+    include: str = Query(",".join(analytics.BUNDLE_PAYLOADS), description="Comma-separated payloads"),
+    db: Session = Depends(get_read_db_session),
+    user=Depends(get_current_user),
+):
+    """Several analytics payloads at once: cached ones are reused, the rest are computed from
+    one load of the union of their date windows (same cache keys as the single endpoints)."""
+    settings = get_settings()
+    names = [name.strip() for name in include.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(analytics.BUNDLE_PAYLOADS))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown payloads: {', '.join(unknown)}")
+
+    payload = {}
+    missing = []
+    for name in names:
+        cached = get_json(f"{name}:{user.id}")
+        if cached:
+            payload[name] = cached
+        else:
+            missing.append(name)
+    if missing:
+        goals = None
+        if {"recommendations", "insight_of_the_week"} & set(missing):
+            goals = [
+                {"sphere": g.sphere, "title": g.title, "target_value": g.target_value, "target_metric": g.target_metric}
+                for g in list_goals(db, user.id)
+            ]
+        for name, computed in analytics.payload_bundle(db, user.id, missing, goals=goals).items():
+            payload[name] = jsonable_encoder(computed)
+            set_json(f"{name}:{user.id}", payload[name], settings.cache_ttl_seconds)
+    return payload
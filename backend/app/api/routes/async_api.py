@@ -0,0 +1,245 @@
+"""Async (AsyncSession) versions of the entry CRUD routes and the correlations endpoint.
+
+Mounted instead of the sync handlers when ASYNC_API=true (see api/router.py). Same paths,
+payloads and status codes as health.py / finance.py / productivity.py / learning.py; the
+handlers await the database instead of holding a threadpool thread per request; Redis and
+the pandas work run in worker threads so they do not stall the event loop.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ... import analytics, models, schemas
+from ...core.config import get_settings
+from ...services.cache import get_json_async, set_json_async
+from ...services.entries import apply_timestamp, apply_update, build_entries_query
+from ..deps import get_async_db_session, get_current_user_async
+
+
+@dataclass(frozen=True)
+class EntryRoutes:
+    prefix: str
+    model: type
+    create_schema: type
+    update_schema: type
+    read_schema: type
+    not_found: str
+    # Extra payload fields that are not model columns
+    extra_fields: frozenset = frozenset()
+    # Model columns filled from the payload by the handler (defaults, derived values)
+    prepare: Optional[Callable] = None
+
+
+def _prepare_health(record, entry) -> None:
+    record.entry_type = entry.entry_type or "day"
+
+
+def _prepare_productivity(record, entry) -> None:
+    if entry.completed_task_ids is not None:
+        record.tasks_completed = len(entry.completed_task_ids)
+
+
+ENTRY_ROUTES = (
+    EntryRoutes(
+        "/health",
+        models.HealthEntry,
+        schemas.HealthEntryCreate,
+        schemas.HealthEntryUpdate,
+        schemas.HealthEntryRead,
+        "Health entry not found",
+        prepare=_prepare_health,
+    ),
+    EntryRoutes(
+        "/finance",
+        models.FinanceEntry,
+        schemas.FinanceEntryCreate,
+        schemas.FinanceEntryUpdate,
+        schemas.FinanceEntryRead,
+        "Finance entry not found",
+    ),
+    EntryRoutes(
+        "/productivity",
+        models.ProductivityEntry,
+        schemas.ProductivityEntryCreate,
+        schemas.ProductivityEntryUpdate,
+        schemas.ProductivityEntryRead,
+        "Productivity entry not found",
+        extra_fields=frozenset({"completed_task_ids"}),
+        prepare=_prepare_productivity,
+    ),
+    EntryRoutes(
+        "/learning",
+        models.LearningEntry,
+        schemas.LearningEntryCreate,
+        schemas.LearningEntryUpdate,
+        schemas.LearningEntryRead,
+        "Learning entry not found",
+    ),
+)
+
+
+def _select(model):
+    stmt = select(model)
+    if model is models.ProductivityEntry:
+        # completed_task_ids is read from the relationship; lazy loads are not allowed here
+        stmt = stmt.options(selectinload(models.ProductivityEntry.completed_task_links))
+    return stmt
+
+
+async def _get_entry(db: AsyncSession, model, entry_id: int, user_id: int):
+    stmt = (
+        _select(model)
+        .where(model.id == entry_id, model.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    return (await db.execute(stmt)).scalars().first()
+
+
+async def _sync_completed_tasks(
+    db: AsyncSession, entry_id: int, task_ids: Optional[List[int]], user_id: int
+) -> Optional[int]:
+    """Async counterpart of productivity._sync_completed_tasks; returns the linked count."""
+    if task_ids is None:
+        return None
+    await db.execute(
+        delete(models.ProductivityEntryCompletedTask).where(
+            models.ProductivityEntryCompletedTask.entry_id == entry_id
+        )
+    )
+    if not task_ids:
+        return 0
+    result = await db.execute(
+        select(models.ProductivityTask.id).where(
+            models.ProductivityTask.user_id == user_id,
+            models.ProductivityTask.id.in_(task_ids),
+        )
+    )
+    valid_ids = set(result.scalars())
+    linked = [tid for tid in dict.fromkeys(task_ids) if tid in valid_ids]
+    db.add_all(
+        models.ProductivityEntryCompletedTask(entry_id=entry_id, task_id=tid) for tid in linked
+    )
+    return len(linked)
+
+
+def _entry_router(spec: EntryRoutes) -> APIRouter:
+    router = APIRouter(prefix=spec.prefix, tags=[spec.prefix.strip("/")])
+    model = spec.model
+    name = spec.prefix.strip("/")
+    excluded = {"recorded_at", "timezone"} | spec.extra_fields
+
+    async def create_entry(
+        entry: spec.create_schema,
+        db: AsyncSession = Depends(get_async_db_session),
+        user=Depends(get_current_user_async),
+    ):
+        record = model(user_id=user.id, **entry.model_dump(exclude=excluded))
+        if spec.prepare:
+            spec.prepare(record, entry)
+        apply_timestamp(record, entry.recorded_at, entry.timezone)
+        db.add(record)
+        await db.flush()
+        if "completed_task_ids" in spec.extra_fields:
+            await _sync_completed_tasks(db, record.id, entry.completed_task_ids, user.id)
+        await db.commit()
+        return await _get_entry(db, model, record.id, user.id)
+
+    async def list_entries(
+        response: Response,
+        start_date: Optional[date] = Query(None),
+        end_date: Optional[date] = Query(None),
+        offset: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=200),
+        db: AsyncSession = Depends(get_async_db_session),
+        user=Depends(get_current_user_async),
+    ):
+        base = build_entries_query(_select(model), model, start_date, end_date, user_id=user.id)
+        count = select(func.count()).select_from(model)
+        total = await db.scalar(
+            build_entries_query(count, model, start_date, end_date, user_id=user.id)
+        )
+        response.headers["X-Total-Count"] = str(total)
+        result = await db.execute(
+            base.order_by(model.local_date.desc(), model.id.desc()).offset(offset).limit(limit)
+        )
+        return result.scalars().all()
+
+    async def update_entry(
+        entry_id: int,
+        payload: spec.update_schema,
+        db: AsyncSession = Depends(get_async_db_session),
+        user=Depends(get_current_user_async),
+    ):
+        record = await _get_entry(db, model, entry_id, user.id)
+        if not record:
+            raise HTTPException(status_code=404, detail=spec.not_found)
+        column_fields = spec.update_schema(
+            **payload.model_dump(exclude_unset=True, exclude=spec.extra_fields)
+        )
+        apply_update(record, column_fields)
+        if getattr(payload, "completed_task_ids", None) is not None:
+            record.tasks_completed = await _sync_completed_tasks(
+                db, record.id, payload.completed_task_ids, user.id
+            )
+        await db.commit()
+        return await _get_entry(db, model, record.id, user.id)
+
+    async def delete_entry(
+        entry_id: int,
+        db: AsyncSession = Depends(get_async_db_session),
+        user=Depends(get_current_user_async),
+    ):
+        record = await _get_entry(db, model, entry_id, user.id)
+        if not record:
+            raise HTTPException(status_code=404, detail=spec.not_found)
+        await db.delete(record)
+        await db.commit()
+        return {"status": "deleted"}
+
+    router.add_api_route(
+        "", create_entry, methods=["POST"], response_model=spec.read_schema,
+        name=f"create_{name}_async",
+    )
+    router.add_api_route(
+        "", list_entries, methods=["GET"], response_model=List[spec.read_schema],
+        name=f"list_{name}_async",
+    )
+    router.add_api_route(
+        "/{entry_id}", update_entry, methods=["PUT"], response_model=spec.read_schema,
+        name=f"update_{name}_async",
+    )
+    router.add_api_route(
+        "/{entry_id}", delete_entry, methods=["DELETE"], name=f"delete_{name}_async",
+    )
+    return router
+
+
+analytics_router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@analytics_router.get("/correlations", response_model=schemas.CorrelationsResponse)
+async def correlations(
+    db: AsyncSession = Depends(get_async_db_session),
+    user=Depends(get_current_user_async),
+):
+    settings = get_settings()
+    cache_key = f"correlations:{user.id}"
+    cached = await get_json_async(cache_key)
+    if cached:
+        return cached
+
+    df = await analytics.build_daily_dataframe_async(db, user_id=user.id)
+    correlations_data = await run_in_threadpool(analytics.compute_correlations, df)
+    payload = {"correlations": correlations_data}
+    await set_json_async(cache_key, payload, settings.cache_ttl_seconds)
+    return payload
+
+
+routers = [_entry_router(spec) for spec in ENTRY_ROUTES] + [analytics_router]
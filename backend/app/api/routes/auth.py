@@ -12,7 +12,7 @@ from ...services.users import (
     reset_password_by_token,
     update_user_profile,
 )
-from ..deps import get_current_user, get_db_session
+from ..deps import get_current_user, get_current_user_record, get_db_session
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -36,7 +36,7 @@ def login_user(payload: schemas.UserLogin, db: Session = Depends(get_db_session)
     user = authenticate_user(db, payload.email, payload.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid login")
-    token = create_access_token(subject=str(user.id))
+    token = create_access_token(subject=str(user.id), token_version=user.token_version or 0)
     return {"access_token": token, "token_type": "bearer"}
 
 
@@ -48,7 +48,7 @@ def read_current_user(user=Depends(get_current_user)):
 @router.patch("/me", response_model=schemas.UserRead)
 def update_profile(
     payload: schemas.UserProfileUpdate,
-    user=Depends(get_current_user),
+    user=Depends(get_current_user_record),
     db: Session = Depends(get_db_session),
 ):
     data = payload.model_dump(exclude_unset=True) if hasattr(payload, "model_dump") else payload.dict(exclude_unset=True)
@@ -59,7 +59,7 @@ def update_profile(
 @router.post("/change-password", status_code=204)
 def change_password(
     payload: schemas.ChangePassword,
-    user=Depends(get_current_user),
+    user=Depends(get_current_user_record),
     db: Session = Depends(get_db_session),
 ):
     updated = change_password_service(
@@ -0,0 +1,146 @@
+"""Bulk entry ingestion: POST /health/bulk, /finance/bulk, /productivity/bulk, /learning/bulk.
+
+For migrations and backfills: one request carries up to BULK_MAX_ENTRIES entries as a JSON
+array or as NDJSON (Content-Type application/x-ndjson, one entry per line). Entries are
+validated in one pass with the sphere's create schema, timestamps are normalized as for
+single creates, and the valid ones are inserted with one executemany and one commit. The
+response has a result per item (created with its id, or invalid with its errors).
+
+With `?atomic=true` nothing is stored unless every entry is valid: the response is 422 with
+the invalid items' errors and the valid ones marked skipped. Served by the sync stack in
+both API modes; specs are shared with the async CRUD routes (async_api.ENTRY_ROUTES).
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from ... import models, schemas
+from ...core.config import get_settings
+from ...services.entries import (
+    bulk_entry_rows,
+    insert_entry_rows,
+    read_bulk_items,
+    validate_bulk_items,
+)
+from ..deps import get_current_user, get_db_session
+from .async_api import ENTRY_ROUTES, EntryRoutes
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def _is_ndjson(request: Request) -> bool:
+    return request.headers.get("content-type", "").split(";")[0].strip().lower() in NDJSON_TYPES
+
+
+def _too_many_entries(max_entries: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Too many entries (max {max_entries})")
+
+
+async def read_bulk_body(request: Request) -> bytes:
+    """Request body, read as a stream and cut off at MAX_IMPORT_FILE_SIZE_MB (413).
+
+    NDJSON bodies are also cut off (413) as soon as they exceed BULK_MAX_ENTRIES lines.
+    """
+    settings = get_settings()
+    limit = settings.max_import_file_size_bytes
+    max_entries = settings.bulk_max_entries if _is_ndjson(request) else None
+    chunks: list[bytes] = []
+    size = 0
+    lines = 0
+    pending = False  # the current, unterminated line has content
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail="Request body too large")
+        chunks.append(chunk)
+        if max_entries is None:
+            continue
+        *complete, tail = chunk.split(b"\n")
+        for line in complete:
+            lines += pending or bool(line.strip())
+            pending = False
+        pending = pending or bool(tail.strip())
+        if lines + pending > max_entries:
+            raise _too_many_entries(max_entries)
+    return b"".join(chunks)
+
+
+def _link_completed_tasks(db: Session, task_ids: dict[int, list[int]], user_id: int) -> None:
+    """Bulk productivity._sync_completed_tasks for new entries ({entry_id: task_ids})."""
+    requested = {tid for ids in task_ids.values() for tid in ids}
+    if not requested:
+        return
+    valid_ids = set(
+        db.scalars(
+            select(models.ProductivityTask.id).where(
+                models.ProductivityTask.user_id == user_id,
+                models.ProductivityTask.id.in_(requested),
+            )
+        )
+    )
+    links = [
+        {"entry_id": entry_id, "task_id": tid}
+        for entry_id, ids in task_ids.items()
+        for tid in dict.fromkeys(ids)
+        if tid in valid_ids
+    ]
+    if links:
+        db.execute(insert(models.ProductivityEntryCompletedTask), links)
+
+
+def _bulk_router(spec: EntryRoutes) -> APIRouter:
+    router = APIRouter(prefix=spec.prefix, tags=[spec.prefix.strip("/")])
+    name = spec.prefix.strip("/")
+    excluded = {"recorded_at", "timezone"} | spec.extra_fields
+
+    def create_bulk(
+        request: Request,
+        response: Response,
+        atomic: bool = Query(False, description="Store nothing unless every entry is valid"),
+        body: bytes = Depends(read_bulk_body),
+        db: Session = Depends(get_db_session),
+        user=Depends(get_current_user),
+    ):
+        items, errors = read_bulk_items(body, ndjson=_is_ndjson(request))
+        max_entries = get_settings().bulk_max_entries
+        if len(items) > max_entries:
+            raise _too_many_entries(max_entries)
+
+        entries = validate_bulk_items(spec.create_schema, items, errors)
+        rows = bulk_entry_rows(entries, errors, user.id, excluded, spec.prepare)
+        ids: dict[int, int] = {}
+        if rows and not (atomic and errors):
+            ids = insert_entry_rows(db, spec.model, rows)
+            if "completed_task_ids" in spec.extra_fields:
+                _link_completed_tasks(
+                    db,
+                    {
+                        ids[index]: entries[index].completed_task_ids
+                        for index in ids
+                        if entries[index].completed_task_ids
+                    },
+                    user.id,
+                )
+            db.commit()
+        elif atomic and errors:
+            response.status_code = 422
+
+        results = []
+        for index in range(len(items)):
+            if index in ids:
+                results.append({"index": index, "status": "created", "id": ids[index]})
+            elif index in errors:
+                results.append({"index": index, "status": "invalid", "errors": errors[index]})
+            else:
+                results.append({"index": index, "status": "skipped"})
+        return {"created": len(ids), "failed": len(errors), "results": results}
+
+    router.add_api_route(
+        "/bulk", create_bulk, methods=["POST"], response_model=schemas.BulkCreateResponse,
+        name=f"create_{name}_bulk",
+    )
+    return router
+
+
+routers = [_bulk_router(spec) for spec in ENTRY_ROUTES]
@@ -7,7 +7,7 @@ from fastapi.responses import Response
 from sqlalchemy.orm import Session
 
 from ... import analytics, models
-from ..deps import get_current_user, get_db_session
+from ..deps import get_current_user, get_read_db_session
 
 router = APIRouter(tags=["export"])
 
@@ -24,7 +24,7 @@ def _entries_to_csv(entries, fieldnames):
 @router.get("/export")
 def export_csv(
     category: str = Query("daily", pattern="^(health|finance|productivity|learning|daily|all)$"),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     category = category.lower()
@@ -134,7 +134,7 @@ def export_csv(
 def export_health_report(
     start_date: date | None = Query(None),
     end_date: date | None = Query(None),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     """Export health data for a period (e.g. for doctor): CSV with date range in filename."""
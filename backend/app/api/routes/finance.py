@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 
 from ... import models, schemas
 from ...services.entries import apply_timestamp, apply_update, build_entries_query, list_entries
-from ..deps import get_current_user, get_db_session
+from ..deps import get_current_user, get_db_session, get_read_db_session
 
 router = APIRouter(prefix="/finance", tags=["finance"])
 
@@ -40,7 +40,7 @@ def list_finance(
     end_date: Optional[date] = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     base = build_entries_query(
@@ -103,7 +103,7 @@ def delete_finance(
 
 @router.get("/category-mappings", response_model=List[schemas.ExpenseCategoryMappingRead])
 def list_expense_category_mappings(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     return (
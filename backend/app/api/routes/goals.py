@@ -10,7 +10,7 @@ from ...services.goals import (
     list_goals,
     update_goal as update_goal_svc,
 )
-from ..deps import get_current_user, get_db_session
+from ..deps import get_current_user, get_db_session, get_read_db_session
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
@@ -19,7 +19,7 @@ router = APIRouter(prefix="/goals", tags=["goals"])
 def get_goals(
     period: str = Query("7d", description="Progress period: 7d, month, deadline"),
     include_archived: bool = Query(False, description="Include archived goals"),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     if period not in schemas.GOAL_PROGRESS_PERIODS:
@@ -70,7 +70,7 @@ def create_goal(
 @router.get("/{goal_id}", response_model=schemas.GoalRead)
 def read_goal(
     goal_id: int,
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     goal = get_goal(db, goal_id, user.id)
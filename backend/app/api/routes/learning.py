@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 
 from ... import models, schemas
 from ...services.entries import apply_timestamp, apply_update, build_entries_query, list_entries
-from ..deps import get_current_user, get_db_session
+from ..deps import get_current_user, get_db_session, get_read_db_session
 
 router = APIRouter(prefix="/learning", tags=["learning"])
 
@@ -40,7 +40,7 @@ def list_learning(
     end_date: Optional[date] = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     base = build_entries_query(
@@ -121,7 +121,7 @@ def create_course(
 
 @router.get("/courses", response_model=List[schemas.LearningCourseRead])
 def list_courses(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     return db.query(models.LearningCourse).filter(models.LearningCourse.user_id == user.id).order_by(models.LearningCourse.id).all()
@@ -130,7 +130,7 @@ def list_courses(
 @router.get("/courses/{course_id}", response_model=schemas.LearningCourseRead)
 def get_course(
     course_id: int,
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     course = db.query(models.LearningCourse).filter(
@@ -182,7 +182,7 @@ def delete_course(
 
 @router.get("/streak")
 def learning_streak(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     """Current consecutive days with at least one learning entry (streak)."""
@@ -1,23 +1,46 @@
 """LLM / AI Assistant API routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from contextlib import aclosing
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from ... import schemas
-from ...analytics import insights_payload
-from ...llm.client import llm_chat, llm_insight
-from ..deps import get_current_user, get_db_session
+from ...llm.client import llm_chat_async, llm_chat_stream, llm_configured, llm_insight_async
+from ...llm.context import get_llm_context
+from ...llm.limits import LlmBusy
+from ..deps import get_current_user, get_read_db_session
 
 router = APIRouter(prefix="/llm", tags=["llm"])
 
 
+async def _chat_context(db: Session, user_id: int, body: schemas.LlmChatRequest) -> str | None:
+    """Server-side data summary (unless disabled) followed by the client's context."""
+    parts = []
+    if body.use_data_context:
+        parts.append(await run_in_threadpool(get_llm_context, db, user_id))
+    if body.context:
+        parts.append(body.context)
+    return "\n\n".join(parts) or None
+
+
 @router.post("/chat", response_model=schemas.LlmChatResponse)
-def chat(
+async def chat(
     body: schemas.LlmChatRequest,
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
-    """Send a message to the AI assistant. Optional context (e.g. dashboard summary) improves answers."""
-    reply, model = llm_chat(body.message, body.context)
+    """Send a message to the AI assistant, with a summary of the user's recent data as context."""
+    if not llm_configured():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="LLM is not configured. Set LLM_API_KEY (OpenAI) or LLM_BASE_URL (e.g. Ollama).",
+        )
+    context = await _chat_context(db, user.id, body)
+    reply, model = await llm_chat_async(body.message, context, user_id=user.id)
     if reply is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -26,21 +49,81 @@ def chat(
     return schemas.LlmChatResponse(reply=reply, model=model)
 
 
+def _sse(payload: dict, event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    body: schemas.LlmChatRequest,
+    request: Request,
+    db: Session = Depends(get_read_db_session),
+    user=Depends(get_current_user),
+):
+    """Same as /chat, streamed as server-sent events while the model generates.
+
+    Events: `data: {"delta": "..."}` per chunk, then `event: done` with `{"model": ...}`
+    (or `event: error`). The provider stream is closed as soon as the client disconnects.
+    """
+    if not llm_configured():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="LLM is not configured. Set LLM_API_KEY (OpenAI) or LLM_BASE_URL (e.g. Ollama).",
+        )
+
+    context = await _chat_context(db, user.id, body)
+    stream = llm_chat_stream(body.message, context, user_id=user.id)
+    # Wait for the first chunk before answering, so limits (429/503) and provider errors
+    # surface as a status code rather than inside an already started stream.
+    try:
+        first = await anext(stream)
+    except LlmBusy:
+        raise
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="LLM request failed."
+        ) from None
+
+    def _event(kind: str, value: str) -> str:
+        return _sse({"delta": value}) if kind == "delta" else _sse({"model": value}, event="done")
+
+    async def events():
+        async with aclosing(stream):
+            yield _event(*first)
+            try:
+                async for kind, value in stream:
+                    if await request.is_disconnected():
+                        return
+                    yield _event(kind, value)
+            except Exception:
+                yield _sse({"detail": "LLM request failed."}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/insight", response_model=schemas.LlmInsightsResponse)
-def insight(
-    db: Session = Depends(get_db_session),
+async def insight(
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
-    """Generate one AI insight from the current user's analytics summary. Requires LLM configured."""
-    payload = insights_payload(db, user_id=user.id)
-    parts = []
-    for i in payload.get("insights") or []:
-        if isinstance(i, dict) and "message" in i:
-            parts.append(i["message"])
-        elif isinstance(i, str):
-            parts.append(i)
-    context = "\n".join(parts) if parts else "Нет достаточных данных для анализа."
-    insight_text, model = llm_insight(context)
+    """Generate one AI insight from a compact summary of recent data (503 without an LLM).
+
+    The summary is token-budgeted and cached per user (refreshed for the days that changed),
+    and replies are cached by the summary, so repeated calls over unchanged data are served
+    without a provider request.
+    """
+    if not llm_configured():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="LLM is not configured. Set LLM_API_KEY or LLM_BASE_URL.",
+        )
+    context = await run_in_threadpool(get_llm_context, db, user.id)
+    insight_text, model = await llm_insight_async(context, user_id=user.id)
     if insight_text is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 from ... import models, schemas
 from ...services.entries import apply_timestamp, apply_update, build_entries_query, list_entries
 from ...utils import normalize_datetime
-from ..deps import get_current_user, get_db_session
+from ..deps import get_current_user, get_db_session, get_read_db_session
 
 router = APIRouter(prefix="/productivity", tags=["productivity"])
 
@@ -76,7 +76,7 @@ def list_productivity(
     end_date: Optional[date] = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     base = build_entries_query(
@@ -168,7 +168,7 @@ def create_task(
 @router.get("/tasks", response_model=List[schemas.ProductivityTaskRead])
 def list_tasks(
     status: Optional[str] = Query(None),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     q = db.query(models.ProductivityTask).filter(models.ProductivityTask.user_id == user.id)
@@ -180,7 +180,7 @@ def list_tasks(
 @router.get("/tasks/{task_id}", response_model=schemas.ProductivityTaskRead)
 def get_task(
     task_id: int,
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     task = db.query(models.ProductivityTask).filter(
@@ -241,13 +241,14 @@ def create_focus_session(
     user=Depends(get_current_user),
 ):
     try:
-        utc_dt, local_date, _ = normalize_datetime(payload.recorded_at, payload.timezone)
+        utc_dt, local_date, tz_name = normalize_datetime(payload.recorded_at, payload.timezone)
     except ValueError as exc:
         raise HTTPException(status_code=422, detail=str(exc)) from exc
     session = models.FocusSession(
         user_id=user.id,
         recorded_at=utc_dt,
         local_date=local_date,
+        timezone=tz_name,
         duration_minutes=payload.duration_minutes,
         session_type=payload.session_type,
         notes=payload.notes,
@@ -263,7 +264,7 @@ def list_focus_sessions(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     limit: int = Query(200, ge=1, le=1000),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     q = db.query(models.FocusSession).filter(models.FocusSession.user_id == user.id)
@@ -6,14 +6,14 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from ... import models
-from ..deps import get_current_user, get_db_session
+from ..deps import get_current_user, get_read_db_session
 
 router = APIRouter(prefix="/reminders", tags=["reminders"])
 
 
 @router.get("")
 def list_reminders(
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
     user=Depends(get_current_user),
 ):
     """Returns list of reminder items (e.g. fill health for yesterday). Frontend can use to show modals or banners."""
@@ -18,17 +18,62 @@ def _parse_bool(value: str, default: bool = False) -> bool:
 @dataclass(frozen=True)
 class Settings:
     database_url: str
+    # Optional read replica for analytics reads (same schema as database_url)
+    database_read_url: str | None
+    # Reads stay on the primary for this many seconds after a user's write (0 = never stick)
+    read_your_writes_seconds: int
+    # Engine / pool tuning (pool_* are ignored for in-memory SQLite). Statement timeout maps to
+    # Postgres statement_timeout and to the SQLite lock wait timeout.
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: int
+    db_pool_recycle: int
+    db_pool_pre_ping: bool
+    db_query_cache_size: int
+    db_statement_timeout_ms: int
+    sqlite_journal_mode: str | None
+    sqlite_synchronous: str | None
+    # Opt-in async data layer: serve entry CRUD (and the async analytics loader) with
+    # AsyncSession; the async URL defaults to database_url with the aiosqlite/asyncpg driver
+    async_api: bool
+    async_database_url: str | None
     cors_origins: list[str]
     environment: str
     secret_key: str
     algorithm: str
     access_token_expire_minutes: int
+    # Password hashing: preferred scheme (bcrypt | argon2), bcrypt cost, process pool size
+    # (0 = hash inline) and max queued hashing jobs before answering 503
+    password_hash_scheme: str
+    bcrypt_rounds: int
+    password_hash_workers: int
+    password_hash_max_pending: int
     auto_create_tables: bool
     redis_url: str | None
     cache_ttl_seconds: int
+    # Authenticated principal cache: Redis snapshot TTL and per-process TTL (seconds)
+    principal_cache_ttl_seconds: int
+    principal_local_ttl_seconds: int
     llm_api_key: str | None
     llm_base_url: str | None
     llm_model: str
+    # LLM response cache: TTL (0 disables), max Redis entries (LRU eviction) and the
+    # context similarity (0-1) at which a near-duplicate request reuses a reply (0 = exact only)
+    llm_cache_ttl_seconds: int
+    llm_cache_max_entries: int
+    llm_cache_similarity: float
+    # Provider calls: timeout, retries, concurrent calls per process / per user, seconds to
+    # wait for a free slot, and concurrent calls in batch jobs (weekly digest)
+    llm_timeout_seconds: float
+    llm_max_retries: int
+    llm_max_concurrency: int
+    llm_max_concurrency_per_user: int
+    llm_queue_timeout_seconds: float
+    llm_batch_concurrency: int
+    # Server-side LLM context: days summarized, token budget, cached rollup TTL (seconds)
+    llm_context_days: int
+    llm_context_max_tokens: int
+    llm_context_ttl_seconds: int
     # Integrations: Google Fit OAuth
     google_client_id: str | None
     google_client_secret: str | None
@@ -38,6 +83,8 @@ class Settings:
     fitness_aggregate_url: str
     # Import: max file size (bytes) for Apple Health / uploads
     max_import_file_size_bytes: int
+    # Bulk entry endpoints (POST /{sphere}/bulk): max entries per request
+    bulk_max_entries: int
     # Sync rate limit: min seconds between syncs per source
     sync_min_interval_seconds: int
     # Global API rate limit per IP (e.g. "200/minute" for slowapi default_limits)
@@ -48,23 +95,59 @@ class Settings:
     smtp_user: str | None
     smtp_password: str | None
     smtp_from_email: str | None
+    smtp_starttls: bool
+    smtp_timeout_seconds: int
+    # Reminder run: parallel SMTP connections and emails per batch (one connection per batch)
+    smtp_concurrency: int
+    smtp_batch_size: int
 
 
 @lru_cache
 def get_settings() -> Settings:
     return Settings(
         database_url=os.getenv("DATABASE_URL", "sqlite:///./data/app.db"),
+        database_read_url=os.getenv("DATABASE_READ_URL") or None,
+        read_your_writes_seconds=int(os.getenv("READ_YOUR_WRITES_SECONDS", "5")),
+        db_pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        db_pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        db_pool_pre_ping=_parse_bool(os.getenv("DB_POOL_PRE_PING"), default=True),
+        db_query_cache_size=int(os.getenv("DB_QUERY_CACHE_SIZE", "500")),
+        db_statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0")),
+        sqlite_journal_mode=os.getenv("SQLITE_JOURNAL_MODE", "wal") or None,
+        sqlite_synchronous=os.getenv("SQLITE_SYNCHRONOUS", "normal") or None,
+        async_api=_parse_bool(os.getenv("ASYNC_API"), default=False),
+        async_database_url=os.getenv("ASYNC_DATABASE_URL") or None,
         cors_origins=_parse_list(os.getenv("CORS_ORIGINS", "*")),
         environment=os.getenv("APP_ENV", "local"),
         secret_key=os.getenv("SECRET_KEY", "change-me"),
         algorithm=os.getenv("JWT_ALGORITHM", "HS256"),
         access_token_expire_minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "120")),
+        password_hash_scheme=os.getenv("PASSWORD_HASH_SCHEME", "bcrypt").strip().lower(),
+        bcrypt_rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+        password_hash_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+        password_hash_max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16")),
         auto_create_tables=_parse_bool(os.getenv("AUTO_CREATE_TABLES"), default=False),
         redis_url=os.getenv("REDIS_URL"),
         cache_ttl_seconds=int(os.getenv("CACHE_TTL_SECONDS", "300")),
+        principal_cache_ttl_seconds=int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60")),
+        principal_local_ttl_seconds=int(os.getenv("PRINCIPAL_LOCAL_TTL_SECONDS", "5")),
         llm_api_key=os.getenv("LLM_API_KEY") or None,
         llm_base_url=os.getenv("LLM_BASE_URL") or None,
         llm_model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
+        llm_cache_ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400")),
+        llm_cache_max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+        llm_cache_similarity=float(os.getenv("LLM_CACHE_SIMILARITY", "0")),
+        llm_timeout_seconds=float(os.getenv("LLM_TIMEOUT_SECONDS", "60")),
+        llm_max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+        llm_max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+        llm_max_concurrency_per_user=int(os.getenv("LLM_MAX_CONCURRENCY_PER_USER", "2")),
+        llm_queue_timeout_seconds=float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10")),
+        llm_batch_concurrency=int(os.getenv("LLM_BATCH_CONCURRENCY", "8")),
+        llm_context_days=int(os.getenv("LLM_CONTEXT_DAYS", "30")),
+        llm_context_max_tokens=int(os.getenv("LLM_CONTEXT_MAX_TOKENS", "300")),
+        llm_context_ttl_seconds=int(os.getenv("LLM_CONTEXT_TTL_SECONDS", "86400")),
         google_client_id=os.getenv("GOOGLE_CLIENT_ID") or None,
         google_client_secret=os.getenv("GOOGLE_CLIENT_SECRET") or None,
         google_redirect_uri=os.getenv("GOOGLE_REDIRECT_URI") or None,
@@ -75,6 +158,7 @@ def get_settings() -> Settings:
             "https://fitness.googleapis.com/fitness/v1/users/me/dataset:aggregate",
         ),
         max_import_file_size_bytes=int(os.getenv("MAX_IMPORT_FILE_SIZE_MB", "100")) * 1024 * 1024,
+        bulk_max_entries=int(os.getenv("BULK_MAX_ENTRIES", "5000")),
         sync_min_interval_seconds=int(os.getenv("SYNC_MIN_INTERVAL_SECONDS", "900")),  # 15 min
         rate_limit_default=os.getenv("RATE_LIMIT_DEFAULT", "200/minute"),
         smtp_host=os.getenv("SMTP_HOST") or None,
@@ -82,4 +166,8 @@ def get_settings() -> Settings:
         smtp_user=os.getenv("SMTP_USER") or None,
         smtp_password=os.getenv("SMTP_PASSWORD") or None,
         smtp_from_email=os.getenv("SMTP_FROM_EMAIL") or None,
+        smtp_starttls=_parse_bool(os.getenv("SMTP_STARTTLS"), default=True),
+        smtp_timeout_seconds=int(os.getenv("SMTP_TIMEOUT_SECONDS", "30")),
+        smtp_concurrency=int(os.getenv("SMTP_CONCURRENCY", "4")),
+        smtp_batch_size=int(os.getenv("SMTP_BATCH_SIZE", "100")),
     )
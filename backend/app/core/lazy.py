@@ -0,0 +1,46 @@
+"""Deferred imports for heavy libraries (pandas, numpy, openai).
+
+`pd = lazy_import("pandas")` binds a stand-in module that imports the real one on first
+attribute access, so importing the app (API workers, CLIs) does not pay for libraries a
+process may never use. `optional_import` does the same for packages that may be missing:
+it imports on first call and returns None if the package is not installed.
+"""
+
+from __future__ import annotations
+
+import importlib
+from functools import cache
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule(ModuleType):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            module = self.__dict__["_module"] = importlib.import_module(self.__name__)
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self) -> list[str]:
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> Any:
+    """Module stand-in that imports `name` on first use (ImportError surfaces there)."""
+    return LazyModule(name)
+
+
+@cache
+def optional_import(name: str) -> Optional[ModuleType]:
+    """Import `name` on first call; None if it is not installed."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
@@ -1,5 +1,10 @@
+import asyncio
 import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 from jose import JWTError, jwt
@@ -7,11 +12,27 @@ from passlib.context import CryptContext
 
 from .config import get_settings
 
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 _BCRYPT_MAX_BYTES = 72
 
 
+class PasswordHasherBusy(RuntimeError):
+    """Too many password hashing jobs are queued; the API answers 503."""
+
+
+@lru_cache
+def get_pwd_context() -> CryptContext:
+    """Preferred scheme first; other schemes still verify and are rehashed on login."""
+    settings = get_settings()
+    preferred = settings.password_hash_scheme
+    schemes = [preferred] + [name for name in ("bcrypt", "argon2") if name != preferred]
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=settings.bcrypt_rounds,
+        bcrypt__min_rounds=settings.bcrypt_rounds,
+    )
+
+
 def _normalize_password(password: str) -> str:
     """Bcrypt accepts at most 72 bytes; longer passwords are pre-hashed with SHA256."""
     raw = password.encode("utf-8")
@@ -20,23 +41,115 @@ def _normalize_password(password: str) -> str:
     return hashlib.sha256(raw).hexdigest()
 
 
+def _hash_sync(password: str) -> str:
+    return get_pwd_context().hash(_normalize_password(password))
+
+
+def _verify_and_update_sync(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return get_pwd_context().verify_and_update(_normalize_password(plain_password), hashed_password)
+
+
+# Hashing runs in a small process pool so bcrypt/argon2 never occupy the API's CPU or more
+# than `password_hash_max_pending` threadpool workers; beyond that callers get PasswordHasherBusy.
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_pending = 0
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    global _executor
+    workers = get_settings().password_hash_workers
+    if workers <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _release(_future: Future) -> None:
+    global _pending
+    with _executor_lock:
+        _pending -= 1
+
+
+def _submit(fn, *args) -> Optional[Future]:
+    """Queue fn in the hashing pool; None means hash inline (pool disabled)."""
+    global _pending
+    executor = _get_executor()
+    if executor is None:
+        return None
+    with _executor_lock:
+        if _pending >= get_settings().password_hash_max_pending:
+            raise PasswordHasherBusy("Password hashing queue is full")
+        _pending += 1
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        _release(None)
+        raise
+    future.add_done_callback(_release)
+    return future
+
+
+def shutdown_password_hasher() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(_normalize_password(password))
+    future = _submit(_hash_sync, password)
+    return future.result() if future else _hash_sync(password)
+
+
+def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str,
+) -> tuple[bool, Optional[str]]:
+    """Return (valid, new_hash); new_hash is set when the stored hash uses an outdated scheme/cost."""
+    future = _submit(_verify_and_update_sync, plain_password, hashed_password)
+    if future is None:
+        return _verify_and_update_sync(plain_password, hashed_password)
+    return future.result()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(_normalize_password(plain_password), hashed_password)
+    return verify_and_update_password(plain_password, hashed_password)[0]
+
+
+async def hash_password_async(password: str) -> str:
+    future = _submit(_hash_sync, password)
+    if future is None:
+        return await asyncio.to_thread(_hash_sync, password)
+    return await asyncio.wrap_future(future)
+
+
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str,
+) -> tuple[bool, Optional[str]]:
+    future = _submit(_verify_and_update_sync, plain_password, hashed_password)
+    if future is None:
+        return await asyncio.to_thread(_verify_and_update_sync, plain_password, hashed_password)
+    return await asyncio.wrap_future(future)
 
 
 def create_access_token(
     subject: str,
     expires_delta: Optional[timedelta] = None,
+    token_version: int = 0,
 ) -> str:
     settings = get_settings()
     expire = datetime.utcnow() + (
         expires_delta or timedelta(minutes=settings.access_token_expire_minutes)
     )
-    to_encode = {"sub": subject, "exp": expire}
+    to_encode = {"sub": subject, "exp": expire, "ver": token_version}
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
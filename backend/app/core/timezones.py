@@ -0,0 +1,100 @@
+"""Timezone lookups and vectorized local-time bucketing.
+
+Zones are resolved once per IANA name (cached), so per-request and per-row code
+(normalize_datetime, the SQLite `local_hour` function) does not rebuild them.
+`local_buckets` turns an array of UTC instants into local calendar dates and hours of day
+with one tz_convert per distinct zone, and `local_midnights` maps local dates back to the
+UTC instant each day starts; imports bucket a user's data in their default_timezone with
+these instead of per-row datetime math. NumPy/pandas are imported on first use.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timezone, tzinfo
+from functools import lru_cache
+from typing import Any, Iterable, Optional, Sequence, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+DEFAULT_TIMEZONE = "UTC"
+
+
+@lru_cache(maxsize=512)
+def _lookup(name: str) -> Optional[tzinfo]:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def get_zone(name: Optional[str]) -> tzinfo:
+    """Zone for an IANA name (UTC when empty); ValueError if the name is unknown."""
+    if not name:
+        return timezone.utc
+    zone = _lookup(name)
+    if zone is None:
+        raise ValueError(f"Invalid timezone '{name}'")
+    return zone
+
+
+def zone_or_utc(name: Optional[str]) -> tzinfo:
+    """Zone for an IANA name; UTC when empty or unknown (stored data is never rejected)."""
+    return (_lookup(name) if name else None) or timezone.utc
+
+
+def zone_name(name: Optional[str]) -> str:
+    """`name` if it is a known zone, else DEFAULT_TIMEZONE."""
+    return name if name and _lookup(name) is not None else DEFAULT_TIMEZONE
+
+
+def _zone_groups(zones: Union[str, Sequence[Optional[str]], None], size: int) -> list[tuple[tzinfo, Any]]:
+    """[(zone, row selector)] with one entry per distinct zone name."""
+    if zones is None or isinstance(zones, str):
+        return [(zone_or_utc(zones), slice(None))]
+    names = np.asarray(zones, dtype=object)
+    if names.shape != (size,):
+        raise ValueError("zones must be one name or one name per timestamp")
+    codes, uniques = pd.factorize(names, use_na_sentinel=False)
+    return [(zone_or_utc(name if isinstance(name, str) else None), codes == i) for i, name in enumerate(uniques)]
+
+
+def local_buckets(
+    timestamps: Iterable[Any],
+    zones: Union[str, Sequence[Optional[str]], None],
+    unit: Optional[str] = None,
+    format: Optional[str] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Local calendar date and hour of day of each UTC instant.
+
+    `timestamps` is anything pd.to_datetime accepts: datetime64 or aware datetimes, strings
+    with offsets (`format` speeds those up), or epoch numbers with `unit` ("ms", "s"). Naive
+    values are UTC. `zones` is one IANA name for every row or a sequence with one per row.
+    Returns (dates as datetime64[D], hours as int64); unparseable rows are NaT and -1.
+    """
+    stamps = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True, unit=unit, format=format, errors="coerce"))
+    dates = np.full(len(stamps), np.datetime64("NaT"), dtype="datetime64[D]")
+    hours = np.full(len(stamps), -1, dtype=np.int64)
+    for zone, rows in _zone_groups(zones, len(stamps)):
+        local = stamps[rows].tz_convert(zone).tz_localize(None)
+        dates[rows] = local.values.astype("datetime64[D]")
+        hours[rows] = np.nan_to_num(np.asarray(local.hour, dtype=float), nan=-1)
+    return dates, hours
+
+
+def local_midnights(dates: Sequence[date], zone: Optional[str]) -> list[datetime]:
+    """UTC instant at which each local date starts in `zone` (aware datetimes, input order).
+
+    A midnight skipped by a DST change starts at the first valid local time; a repeated one
+    resolves to its first occurrence.
+    """
+    if not len(dates):
+        return []
+    local = pd.DatetimeIndex(pd.to_datetime(list(dates)))
+    starts = local.tz_localize(
+        zone_or_utc(zone), ambiguous=np.ones(len(local), dtype=bool), nonexistent="shift_forward"
+    )
+    return list(starts.tz_convert(timezone.utc).to_pydatetime())
@@ -1,17 +1,170 @@
-from sqlalchemy import create_engine
+import sqlite3
+from datetime import datetime, timezone
+
+from sqlalchemy import Integer, create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.sql.expression import FunctionElement
 
-from .core.config import get_settings
+from .core.config import Settings, get_settings
+from .core.timezones import zone_or_utc
 
 settings = get_settings()
 DATABASE_URL = settings.database_url
 
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+def _is_memory_sqlite(url: str) -> bool:
+    return url in {"sqlite://", "sqlite:///:memory:"} or "mode=memory" in url
+
+
+def _engine_kwargs(url: str, settings: Settings, overrides: dict) -> dict:
+    kwargs = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "query_cache_size": settings.db_query_cache_size,
+    }
+    connect_args = {}
+    if not _is_memory_sqlite(url):
+        kwargs.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    if url.startswith("sqlite"):
+        if "aiosqlite" not in url:
+            connect_args["check_same_thread"] = False
+        if settings.db_statement_timeout_ms:
+            connect_args["timeout"] = settings.db_statement_timeout_ms / 1000
+    else:
+        if settings.db_statement_timeout_ms and url.startswith("postgresql+asyncpg"):
+            connect_args["server_settings"] = {
+                "statement_timeout": str(settings.db_statement_timeout_ms)
+            }
+        elif settings.db_statement_timeout_ms and url.startswith("postgresql"):
+            connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+    kwargs["connect_args"] = connect_args
+    kwargs.update(overrides)
+    return kwargs
+
+
+def _install_sqlite_pragmas(engine: Engine, url: str, settings: Settings) -> None:
+    if not url.startswith("sqlite") or _is_memory_sqlite(url):
+        return
+    journal_mode = settings.sqlite_journal_mode
+    synchronous = settings.sqlite_synchronous
+
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        if journal_mode:
+            cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+        if synchronous:
+            cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.close()
+
+
+class local_hour(FunctionElement):
+    """Hour of day (0-23) of a UTC timestamp in the IANA timezone given by a column or value.
+
+    PostgreSQL converts with timezone(); SQLite calls the `local_hour` function registered on
+    every connection (zoneinfo), so GROUP BY local hour runs in SQL on both.
+    """
+
+    type = Integer()
+    name = "local_hour"
+    inherit_cache = True
+
+
+class iso_weekday(FunctionElement):
+    """Weekday of a DATE column, 0 = Monday .. 6 = Sunday."""
+
+    type = Integer()
+    name = "iso_weekday"
+    inherit_cache = True
+
+
+@compiles(local_hour)
+def _local_hour_postgresql(element, compiler, **kw):
+    timestamp, zone = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"CAST(EXTRACT(HOUR FROM timezone({zone}, {timestamp})) AS INTEGER)"
+
+
+@compiles(local_hour, "sqlite")
+def _local_hour_sqlite(element, compiler, **kw):
+    return f"local_hour({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(iso_weekday)
+def _iso_weekday_postgresql(element, compiler, **kw):
+    return f"(CAST(EXTRACT(ISODOW FROM {compiler.process(element.clauses, **kw)}) AS INTEGER) - 1)"
+
+
+@compiles(iso_weekday, "sqlite")
+def _iso_weekday_sqlite(element, compiler, **kw):
+    return f"((CAST(strftime('%w', {compiler.process(element.clauses, **kw)}) AS INTEGER) + 6) % 7)"
+
+
+def _sqlite_local_hour(value: str | None, zone: str | None) -> int | None:
+    if value is None:
+        return None
+    stamp = datetime.fromisoformat(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)  # stored as UTC
+    return stamp.astimezone(zone_or_utc(zone)).hour
+
+
+@event.listens_for(Engine, "connect")
+def _sqlite_functions(dbapi_connection, _record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("local_hour", 2, _sqlite_local_hour, deterministic=True)
+
+
+def create_db_engine(url: str, settings: Settings | None = None, **overrides) -> Engine:
+    """Create an engine tuned from Settings; shared by the API, tasks and DWH/ETL scripts."""
+    settings = settings or get_settings()
+    engine = create_engine(url, **_engine_kwargs(url, settings, overrides))
+    _install_sqlite_pragmas(engine, url, settings)
+    return engine
+
+
+def to_async_url(url: str) -> str:
+    """Swap the sync driver for its asyncio counterpart (aiosqlite / asyncpg)."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def create_async_db_engine(url: str, settings: Settings | None = None, **overrides) -> AsyncEngine:
+    """Async twin of create_db_engine (same pool/pragma settings); `url` must use an async driver."""
+    settings = settings or get_settings()
+    engine = create_async_engine(url, **_engine_kwargs(url, settings, overrides))
+    _install_sqlite_pragmas(engine.sync_engine, url, settings)
+    return engine
+
+
+def pool_metrics(engine: Engine) -> dict:
+    """Snapshot of connection pool usage (for /admin/metrics/db-pool and logs)."""
+    pool = engine.pool
+    metrics = {"pool_class": type(pool).__name__, "status": pool.status()}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            metrics[name] = fn()
+    return metrics
+
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Optional read replica for heavy analytics reads; falls back to the primary engine.
+read_engine = create_db_engine(settings.database_read_url) if settings.database_read_url else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base = declarative_base()
 
 
@@ -21,3 +174,45 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def has_read_replica() -> bool:
+    return read_engine is not engine
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Async engine is created on first use so aiosqlite/asyncpg are only needed with ASYNC_API.
+_async_engine: AsyncEngine | None = None
+_async_sessionmaker: async_sessionmaker[AsyncSession] | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        url = settings.async_database_url or to_async_url(DATABASE_URL)
+        _async_engine = create_async_db_engine(url)
+        _async_sessionmaker = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+async def get_async_db():
+    get_async_engine()
+    async with _async_sessionmaker() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_sessionmaker = None
@@ -1,76 +1,103 @@
 """Apple Health: import from export XML (steps, sleep) -> HealthEntry."""
 
+from __future__ import annotations
+
 import xml.etree.ElementTree as ET
-from collections import defaultdict
-from datetime import date, datetime, timezone
+import zipfile
+from datetime import date
 from io import BytesIO
 from typing import Optional
-import zipfile
 
+from ..core.lazy import lazy_import
+from ..core.timezones import DEFAULT_TIMEZONE, local_buckets, local_midnights, zone_or_utc
 from ..models import DataSource, HealthEntry
+from ..services.users import explicit_user_timezone
 from .base import IntegrationProvider, SyncResult
 
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 # Apple Health export: Record type identifiers
 STEP_TYPE = "HKQuantityTypeIdentifierStepCount"
 SLEEP_TYPE = "HKCategoryTypeIdentifierSleepAnalysis"
 HEART_RATE_TYPE = "HKQuantityTypeIdentifierHeartRate"
 WEIGHT_TYPE = "HKQuantityTypeIdentifierBodyMass"
+RECORD_TYPES = (STEP_TYPE, SLEEP_TYPE, HEART_RATE_TYPE, WEIGHT_TYPE)
+
+_OFFSET = r"(?:Z|[+-]\d\d:?\d\d)\s*$"  # "... -0500", "...+03:00", "...Z"
 
 
-def _parse_apple_health_xml(content: bytes) -> tuple[dict[date, int], dict[date, float], dict[date, float], dict[date, float]]:
-    """Parse export.xml; return steps_by_date, sleep_hours_by_date, heart_rate_by_date, weight_by_date."""
-    steps_by_date: dict[date, int] = defaultdict(int)
-    sleep_minutes_by_date: dict[date, float] = defaultdict(float)
-    heart_rate_sum_count: dict[date, tuple[float, int]] = defaultdict(lambda: (0.0, 0))
-    weight_by_date: dict[date, float] = {}  # last value per day
+def _by_date(dates: np.ndarray, values: np.ndarray, how: str) -> dict[date, float]:
+    """Aggregate values per local date ("sum", "mean", "last" in record order); skips NaT/NaN."""
+    keep = ~(np.isnat(dates) | np.isnan(values))
+    grouped = getattr(pd.Series(values[keep]).groupby(dates[keep], sort=False), how)()
+    return dict(zip(pd.DatetimeIndex(grouped.index).date, grouped.tolist(), strict=True))
 
+
+def _parse_times(strings: list, tz_name: Optional[str]) -> tuple[pd.DatetimeIndex, np.ndarray]:
+    """(UTC instants, local dates) of Apple timestamps such as "2026-01-15 08:30:00 -0500".
+
+    Without `tz_name` a record belongs to its own wall-clock date (the device's time when it
+    was recorded); with it, to the date of its instant in that zone. Values without an offset
+    are wall-clock time in `tz_name` (UTC when None).
+    """
+    text = pd.Series(strings, dtype=object)
+    wall = pd.DatetimeIndex(
+        pd.to_datetime(text.str.slice(0, 19), format="ISO8601", errors="coerce")
+    )
+    instants = pd.Series(pd.to_datetime(text, utc=True, format="ISO8601", errors="coerce"))
+    naive = (~text.str.contains(_OFFSET, na=False) & ~wall.isna()).to_numpy()
+    if naive.any():
+        zone = zone_or_utc(tz_name)
+        localized = wall[naive].tz_localize(zone, ambiguous="NaT", nonexistent="shift_forward")
+        instants[naive] = localized.tz_convert("UTC").array
+    instants = pd.DatetimeIndex(instants)
+    if tz_name is None:
+        return instants, wall.values.astype("datetime64[D]")
+    return instants, local_buckets(instants, tz_name)[0]
+
+
+def _parse_apple_health_xml(
+    content: bytes, tz_name: Optional[str] = None
+) -> tuple[dict[date, int], dict[date, float], dict[date, float], dict[date, float]]:
+    """Parse export.xml; return steps_by_date, sleep_hours_by_date, heart_rate_by_date, weight_by_date.
+
+    Records are bucketed by the local date of their start (see _parse_times; `tz_name` is the
+    user's explicitly set zone): each type's timestamps are converted in one vectorized pass
+    and aggregated with pandas. Weight keeps the last value per day.
+    """
+    records: dict[str, tuple[list, list, list]] = {kind: ([], [], []) for kind in RECORD_TYPES}
     root = ET.fromstring(content)
-    # HealthData contains Record elements
-    for record in root.findall(".//Record"):
-        if record is None:
-            continue
-        kind = record.get("type")
-        if not kind:
-            continue
+    for record in root.iter("Record"):
+        columns = records.get(record.get("type"))
         start = record.get("startDate")
-        end = record.get("endDate")
-        value_str = record.get("value")
-        if not start:
+        if columns is None or not start:
             continue
-        try:
-            local_date = date.fromisoformat(start[:10])
-        except Exception:
-            continue
-        if kind == STEP_TYPE and value_str:
-            try:
-                steps_by_date[local_date] += int(float(value_str))
-            except ValueError:
-                pass
-        elif kind == SLEEP_TYPE:
-            # value 1=inBed, 2=asleep, etc.; use endDate - startDate for duration
-            try:
-                if end and start:
-                    end_dt = datetime.strptime(end[:19].replace(" ", "T"), "%Y-%m-%dT%H:%M:%S")
-                    start_dt = datetime.strptime(start[:19].replace(" ", "T"), "%Y-%m-%dT%H:%M:%S")
-                    minutes = (end_dt - start_dt).total_seconds() / 60.0
-                    sleep_minutes_by_date[local_date] += minutes
-            except Exception:
-                pass
-        elif kind == HEART_RATE_TYPE and value_str:
-            try:
-                v = float(value_str)
-                s, c = heart_rate_sum_count[local_date]
-                heart_rate_sum_count[local_date] = (s + v, c + 1)
-            except ValueError:
-                pass
-        elif kind == WEIGHT_TYPE and value_str:
-            try:
-                weight_by_date[local_date] = float(value_str)
-            except ValueError:
-                pass
-    sleep_hours_by_date = {d: m / 60.0 for d, m in sleep_minutes_by_date.items()}
-    heart_rate_by_date = {d: s / c if c else 0.0 for d, (s, c) in heart_rate_sum_count.items()}
+        starts, ends, values = columns
+        starts.append(start)
+        ends.append(record.get("endDate"))
+        values.append(record.get("value"))
+
+    def parsed(kind: str) -> tuple[pd.DatetimeIndex, np.ndarray, np.ndarray]:
+        starts, _ends, values = records[kind]
+        stamps, dates = _parse_times(starts, tz_name)
+        numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float)
+        return stamps, dates, numbers
+
+    _stamps, dates, steps = parsed(STEP_TYPE)
+    steps_by_date = {d: int(total) for d, total in _by_date(dates, np.trunc(steps), "sum").items()}
+
+    # value 1=inBed, 2=asleep, etc.; duration is endDate - startDate
+    stamps, dates, _values = parsed(SLEEP_TYPE)
+    ends, _dates = _parse_times(records[SLEEP_TYPE][1], tz_name)
+    minutes = np.asarray((ends - stamps).total_seconds(), dtype=float) / 60.0
+    sleep_hours_by_date = {d: m / 60.0 for d, m in _by_date(dates, minutes, "sum").items()}
+
+    _stamps, dates, rates = parsed(HEART_RATE_TYPE)
+    heart_rate_by_date = _by_date(dates, rates, "mean")
+
+    _stamps, dates, weights = parsed(WEIGHT_TYPE)
+    weight_by_date = _by_date(dates, weights, "last")
     return steps_by_date, sleep_hours_by_date, heart_rate_by_date, weight_by_date
 
 
@@ -94,11 +121,17 @@ def map_apple_health_to_health_entries(
     heart_rate_by_date: dict,
     weight_by_date: dict,
     source: Optional[DataSource] = None,
+    tz_name: str = DEFAULT_TIMEZONE,
 ) -> int:
-    """Map parsed Apple Health data (by-date dicts) to HealthEntry: upsert per date. Returns count of records updated/created."""
-    tz_name = "UTC"
+    """Map parsed Apple Health data (by-date dicts) to HealthEntry: upsert per date. Returns count of records updated/created.
+
+    New entries are stamped at local midnight of their date in `tz_name`.
+    """
     imported = 0
-    all_dates = set(steps_by_date) | set(sleep_hours_by_date) | set(heart_rate_by_date) | set(weight_by_date)
+    all_dates = sorted(
+        set(steps_by_date) | set(sleep_hours_by_date) | set(heart_rate_by_date) | set(weight_by_date)
+    )
+    midnights = dict(zip(all_dates, local_midnights(all_dates, tz_name), strict=True))
     for local_date in all_dates:
         steps = steps_by_date.get(local_date, 0)
         sleep_hours = sleep_hours_by_date.get(local_date, 0.0)
@@ -111,7 +144,6 @@ def map_apple_health_to_health_entries(
             .filter(HealthEntry.user_id == user_id, HealthEntry.local_date == local_date)
             .first()
         )
-        midnight_utc = datetime(local_date.year, local_date.month, local_date.day, tzinfo=timezone.utc)
         if existing:
             if steps and _settings_include(source, "steps"):
                 existing.steps = (existing.steps or 0) + steps
@@ -132,7 +164,7 @@ def map_apple_health_to_health_entries(
                 steps=steps if _settings_include(source, "steps") else None,
                 heart_rate_avg=int(heart_rate) if heart_rate is not None and _settings_include(source, "heart_rate") else None,
                 weight_kg=weight if _settings_include(source, "weight") else None,
-                recorded_at=midnight_utc,
+                recorded_at=midnights[local_date],
                 local_date=local_date,
                 timezone=tz_name,
             )
@@ -163,7 +195,7 @@ def import_apple_health_xml(
     source: Optional[DataSource] = None,
     is_zip: bool = False,
 ) -> SyncResult:
-    """Parse Apple Health export (XML or ZIP with export.xml) and upsert HealthEntry."""
+    """Parse Apple Health export (XML or ZIP with export.xml) and upsert HealthEntry by local date."""
     if is_zip:
         with zipfile.ZipFile(BytesIO(content), "r") as z:
             names = z.namelist()
@@ -176,14 +208,18 @@ def import_apple_health_xml(
                         break
                 else:
                     return SyncResult(status="failed", message="No export.xml in ZIP", stats={})
+    tz_name = explicit_user_timezone(db, user_id)
     try:
-        steps_by_date, sleep_hours_by_date, heart_rate_by_date, weight_by_date = _parse_apple_health_xml(content)
+        steps_by_date, sleep_hours_by_date, heart_rate_by_date, weight_by_date = _parse_apple_health_xml(
+            content, tz_name
+        )
     except ET.ParseError as e:
         return SyncResult(status="failed", message=f"Invalid XML: {e}", stats={})
     imported = map_apple_health_to_health_entries(
         db, user_id,
         steps_by_date, sleep_hours_by_date, heart_rate_by_date, weight_by_date,
         source=source,
+        tz_name=tz_name or DEFAULT_TIMEZONE,
     )
     all_dates = set(steps_by_date) | set(sleep_hours_by_date) | set(heart_rate_by_date) | set(weight_by_date)
     return SyncResult(
@@ -6,9 +6,14 @@ from typing import Any, Optional
 import requests
 from sqlalchemy.orm import Session
 
+from ..core.lazy import lazy_import
+from ..core.timezones import DEFAULT_TIMEZONE, local_buckets, local_midnights, zone_or_utc
 from ..models import DataSource, HealthEntry
+from ..services.users import user_timezone
 from .base import IntegrationProvider, SyncResult
 
+pd = lazy_import("pandas")
+
 FITNESS_SCOPES = [
     "https://www.googleapis.com/auth/fitness.activity.read",
     "https://www.googleapis.com/auth/fitness.body.read",
@@ -96,18 +101,19 @@ def _fetch_steps(
     aggregate_url: str,
     start_date: date,
     end_date: date,
+    tz_name: str = DEFAULT_TIMEZONE,
 ) -> dict[date, int]:
-    """Call Fitness API aggregate for steps; return dict local_date -> steps."""
-    start_ts = int(datetime(start_date.year, start_date.month, start_date.day, tzinfo=timezone.utc).timestamp() * 1000)
-    end_ts = int(
-        (datetime(end_date.year, end_date.month, end_date.day, tzinfo=timezone.utc) + timedelta(days=1)).timestamp()
-        * 1000
-    )
+    """Call Fitness API aggregate for steps; return dict local_date -> steps.
+
+    Buckets are calendar days in `tz_name` (23/25 hours across DST changes); their start
+    times are mapped to local dates in one local_buckets pass.
+    """
+    start, end = local_midnights([start_date, end_date + timedelta(days=1)], tz_name)
     body = {
         "aggregateBy": [{"dataTypeName": "com.google.step_count.delta"}],
-        "bucketByTime": {"durationMillis": 86400000},
-        "startTimeMillis": str(start_ts),
-        "endTimeMillis": str(end_ts),
+        "bucketByTime": {"period": {"type": "day", "value": 1, "timeZoneId": tz_name}},
+        "startTimeMillis": str(int(start.timestamp() * 1000)),
+        "endTimeMillis": str(int(end.timestamp() * 1000)),
     }
     resp = requests.post(
         aggregate_url,
@@ -118,17 +124,22 @@ def _fetch_steps(
     if resp.status_code != 200:
         raise RuntimeError(f"Fitness API error: {resp.status_code} {resp.text[:200]}")
     data = resp.json()
-    result: dict[date, int] = {}
+    starts_ms: list[int] = []
+    totals: list[int] = []
     for bucket in data.get("bucket", []):
         start_ms = int(bucket.get("startTimeMillis", 0))
         if not start_ms:
             continue
-        local_date = date.fromtimestamp(start_ms / 1000.0)
         total = 0
         for ds in bucket.get("dataset", []):
             for point in ds.get("point", []):
                 for val in point.get("value", []):
                     total += int(val.get("intVal", 0))
+        starts_ms.append(start_ms)
+        totals.append(total)
+    dates, _hours = local_buckets(starts_ms, tz_name, unit="ms")
+    result: dict[date, int] = {}
+    for local_date, total in zip(pd.DatetimeIndex(dates).date, totals, strict=True):
         result[local_date] = result.get(local_date, 0) + total
     return result
 
@@ -137,10 +148,16 @@ def map_fitness_steps_to_health_entries(
     session: Session,
     user_id: int,
     steps_by_date: dict[date, int],
+    tz_name: str = DEFAULT_TIMEZONE,
 ) -> int:
-    """Upsert HealthEntry from Fitness API steps_by_date. Returns count of records touched."""
-    tz_name = "UTC"
+    """Upsert HealthEntry from Fitness API steps_by_date. Returns count of records touched.
+
+    New entries are stamped at local midnight of their date in `tz_name`.
+    """
     imported = 0
+    midnights = dict(
+        zip(steps_by_date, local_midnights(list(steps_by_date), tz_name), strict=True)
+    )
     for local_date, steps in steps_by_date.items():
         if steps <= 0:
             continue
@@ -156,7 +173,6 @@ def map_fitness_steps_to_health_entries(
             existing.steps = (existing.steps or 0) + steps
             imported += 1
         else:
-            midnight_utc = datetime(local_date.year, local_date.month, local_date.day, tzinfo=timezone.utc)
             entry = HealthEntry(
                 user_id=user_id,
                 entry_type="day",
@@ -164,7 +180,7 @@ def map_fitness_steps_to_health_entries(
                 energy_level=5,
                 wellbeing=5,
                 steps=steps,
-                recorded_at=midnight_utc,
+                recorded_at=midnights[local_date],
                 local_date=local_date,
                 timezone=tz_name,
             )
@@ -202,25 +218,25 @@ class GoogleFitProvider(IntegrationProvider):
                 if access_token:
                     source.access_token = access_token
                     if "expires_in" in tok:
-                        from datetime import datetime, timezone
                         source.token_expires_at = datetime.now(timezone.utc) + timedelta(seconds=int(tok["expires_in"]))
                     session.commit()
             except Exception as e:
                 return SyncResult(status="failed", message=f"Token refresh failed: {e}", stats={})
         if not access_token:
             return SyncResult(status="failed", message="No access token", stats={})
-        end_date = date.today()
+        tz_name = user_timezone(session, source.user_id)
+        end_date = datetime.now(zone_or_utc(tz_name)).date()
         start_date = end_date - timedelta(days=30)
         aggregate_url = getattr(settings, "fitness_aggregate_url", None) or (
             "https://fitness.googleapis.com/fitness/v1/users/me/dataset:aggregate"
         )
         try:
-            steps_by_date = _fetch_steps(access_token, aggregate_url, start_date, end_date)
+            steps_by_date = _fetch_steps(access_token, aggregate_url, start_date, end_date, tz_name)
         except Exception as e:
             return SyncResult(status="failed", message=str(e)[:500], stats={})
         if not _settings_include(source, "steps"):
             return SyncResult(status="success", message="Sync OK (steps disabled in settings)", stats={"days": 0})
-        imported = map_fitness_steps_to_health_entries(session, source.user_id, steps_by_date)
+        imported = map_fitness_steps_to_health_entries(session, source.user_id, steps_by_date, tz_name)
         session.commit()
         return SyncResult(
             status="success",
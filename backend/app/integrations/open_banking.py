@@ -1,12 +1,13 @@
 """Open Banking: fetch transactions (mock or API), categorize, aggregate -> FinanceEntry."""
 
-from datetime import date, datetime, timedelta, timezone
+from datetime import date, timedelta
 from typing import Any, Optional
 
+from ..core.timezones import local_midnights
 from ..models import DataSource, FinanceEntry
+from ..services.users import user_timezone
 from .base import IntegrationProvider, SyncResult
 
-
 # Mock transaction categories -> FinanceEntry fields
 CATEGORY_MAP = {
     "food": "expense_food",
@@ -108,7 +109,9 @@ class OpenBankingProvider(IntegrationProvider):
         if not transactions:
             return SyncResult(status="success", message="No transactions", stats={"imported_records": 0})
         by_date = _aggregate_to_finance(transactions, category_map=category_map)
-        tz_name = "UTC"
+        # Booking dates are calendar dates: stamp new entries at local midnight of the user's zone
+        tz_name = user_timezone(session, source.user_id)
+        midnights = dict(zip(by_date, local_midnights(list(by_date), tz_name), strict=True))
         imported = 0
         for local_date, amounts in by_date.items():
             income = amounts.get("income", 0) or 0
@@ -126,7 +129,6 @@ class OpenBankingProvider(IntegrationProvider):
                 )
                 .first()
             )
-            midnight_utc = datetime(local_date.year, local_date.month, local_date.day, tzinfo=timezone.utc)
             if existing:
                 existing.income = (existing.income or 0) + income
                 existing.expense_food = (existing.expense_food or 0) + exp_food
@@ -142,7 +144,7 @@ class OpenBankingProvider(IntegrationProvider):
                     expense_transport=exp_transport,
                     expense_health=exp_health,
                     expense_other=exp_other,
-                    recorded_at=midnight_utc,
+                    recorded_at=midnights[local_date],
                     local_date=local_date,
                     timezone=tz_name,
                 )
@@ -0,0 +1,248 @@
+"""LLM response cache: skip the provider when the same prompt is sent over the same data.
+
+Entries are keyed by sha256 of (model, system prompt, prompt, normalized context). Prompt and
+context are normalized (case, whitespace, empty lines, float precision) so summaries that only
+differ cosmetically share an entry. Lookups go through a small per-process LRU, then Redis:
+
+- `llm:resp:{digest}` - JSON reply, expires after LLM_CACHE_TTL_SECONDS;
+- `llm:resp:index` - sorted set of digests by last use; entries beyond LLM_CACHE_MAX_ENTRIES
+  are evicted least recently used first;
+- `llm:resp:near:{bucket}` - recent digests per (model, system prompt, prompt, user), used
+  for near-duplicate matching when LLM_CACHE_SIMILARITY > 0: on an exact miss, a cached reply
+  whose context has token-set (Jaccard) similarity >= the threshold is served instead.
+
+Contexts carry personal data, so near matches never cross users: only requests made with a
+user_id are near-matched, against that user's own replies. Exact hits are shared (the reply
+was generated from the very same context).
+
+Without Redis only the per-process LRU is used. LLM_CACHE_TTL_SECONDS=0 disables caching.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from ..core.config import get_settings
+from ..services.cache import get_cache_client
+
+LOCAL_CACHE_MAX_ENTRIES = 1_000
+NEAR_CANDIDATES = 50
+INDEX_KEY = "llm:resp:index"
+
+_FLOAT = re.compile(r"(\d+\.\d{2})\d+")
+_SPACES = re.compile(r"\s+")
+_TOKEN = re.compile(r"\w+(?:\.\d+)?")
+
+
+@dataclass(frozen=True)
+class CachedReply:
+    text: str
+    model: Optional[str]
+    similarity: float = 1.0
+
+
+def normalize_context(context: Optional[str]) -> str:
+    if not context:
+        return ""
+    text = unicodedata.normalize("NFKC", context).lower()
+    text = _FLOAT.sub(r"\1", text)
+    lines = (_SPACES.sub(" ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def _entry_key(digest: str) -> str:
+    return f"llm:resp:{digest}"
+
+
+def _bucket_key(bucket: str) -> str:
+    return f"llm:resp:near:{bucket}"
+
+
+def _tokens(normalized: str) -> frozenset[str]:
+    return frozenset(_TOKEN.findall(normalized))
+
+
+def _similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+# Per-process LRU: digest -> (expires_at, near bucket or None, tokens, reply)
+_local: OrderedDict[str, tuple[float, Optional[str], frozenset[str], CachedReply]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _local_get(digest: str) -> Optional[CachedReply]:
+    with _lock:
+        item = _local.get(digest)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            _local.pop(digest, None)
+            return None
+        _local.move_to_end(digest)
+        return item[3]
+
+
+def _local_near(bucket: str, tokens: frozenset[str], threshold: float) -> Optional[CachedReply]:
+    now = time.monotonic()
+    best: Optional[CachedReply] = None
+    with _lock:
+        for expires_at, item_bucket, item_tokens, reply in reversed(_local.values()):
+            if item_bucket != bucket or expires_at < now:
+                continue
+            score = _similarity(tokens, item_tokens)
+            if score >= threshold and (best is None or score > best.similarity):
+                best = CachedReply(reply.text, reply.model, score)
+    return best
+
+
+def _local_set(
+    digest: str, bucket: Optional[str], tokens: frozenset[str], reply: CachedReply, ttl: int
+) -> None:
+    with _lock:
+        _local[digest] = (time.monotonic() + ttl, bucket, tokens, reply)
+        _local.move_to_end(digest)
+        while len(_local) > LOCAL_CACHE_MAX_ENTRIES:
+            _local.popitem(last=False)
+
+
+def _redis_get(client, digest: str) -> Optional[dict]:
+    value = client.get(_entry_key(digest))
+    if not value:
+        return None
+    client.zadd(INDEX_KEY, {digest: time.time()})
+    return json.loads(value)
+
+
+def _redis_near(
+    client, bucket: str, tokens: frozenset[str], threshold: float
+) -> Optional[tuple[str, dict, float]]:
+    digests = client.zrevrange(_bucket_key(bucket), 0, NEAR_CANDIDATES - 1)
+    if not digests:
+        return None
+    best = None
+    for digest, value in zip(digests, client.mget([_entry_key(d) for d in digests]), strict=True):
+        if not value:
+            client.zrem(_bucket_key(bucket), digest)
+            continue
+        entry = json.loads(value)
+        score = _similarity(tokens, frozenset(entry.get("tokens") or ()))
+        if score >= threshold and (best is None or score > best[2]):
+            best = (digest, entry, score)
+    return best
+
+
+def _evict(client, max_entries: int) -> None:
+    overflow = client.zcard(INDEX_KEY) - max_entries
+    if overflow <= 0:
+        return
+    evicted = [digest for digest, _ in client.zpopmin(INDEX_KEY, overflow)]
+    if evicted:
+        client.delete(*(_entry_key(digest) for digest in evicted))
+
+
+def _keys(
+    model: str, system: str, prompt: str, normalized: str, user_id: Optional[int]
+) -> tuple[str, Optional[str]]:
+    """(exact digest, near-duplicate bucket); the bucket is per user, None without a user."""
+    request = _digest(model, system, normalize_context(prompt))
+    bucket = _digest(request, "user", str(user_id)) if user_id is not None else None
+    return _digest(request, normalized), bucket
+
+
+def get_reply(
+    model: str, system: str, prompt: str, context: Optional[str], user_id: Optional[int] = None
+) -> Optional[CachedReply]:
+    """Cached reply for this request (exact, or the user's near-duplicate context), else None."""
+    settings = get_settings()
+    if settings.llm_cache_ttl_seconds <= 0:
+        return None
+    normalized = normalize_context(context)
+    digest, bucket = _keys(model, system, prompt, normalized, user_id)
+    reply = _local_get(digest)
+    if reply is not None:
+        return reply
+    threshold = settings.llm_cache_similarity if bucket is not None else 0.0
+    tokens = _tokens(normalized)
+    client = get_cache_client()
+    if client is not None:
+        try:
+            entry = _redis_get(client, digest)
+            similarity = 1.0
+            if entry is None and 0 < threshold < 1:
+                near = _redis_near(client, bucket, tokens, threshold)
+                if near is not None:
+                    digest, entry, similarity = near
+                    client.zadd(INDEX_KEY, {digest: time.time()})
+            if entry is not None:
+                reply = CachedReply(entry["text"], entry.get("model"), similarity)
+                if similarity == 1.0:
+                    _local_set(digest, bucket, tokens, reply, settings.llm_cache_ttl_seconds)
+                return reply
+        except RedisError:
+            pass
+    if 0 < threshold < 1:
+        return _local_near(bucket, tokens, threshold)
+    return None
+
+
+def store_reply(
+    model: str,
+    system: str,
+    prompt: str,
+    context: Optional[str],
+    text: str,
+    reply_model: Optional[str],
+    user_id: Optional[int] = None,
+) -> None:
+    settings = get_settings()
+    ttl = settings.llm_cache_ttl_seconds
+    if ttl <= 0:
+        return
+    normalized = normalize_context(context)
+    digest, bucket = _keys(model, system, prompt, normalized, user_id)
+    tokens = _tokens(normalized)
+    reply = CachedReply(text, reply_model)
+    _local_set(digest, bucket, tokens, reply, ttl)
+    client = get_cache_client()
+    if client is None:
+        return
+    near = settings.llm_cache_similarity > 0 and bucket is not None
+    entry = {"text": text, "model": reply_model}
+    if near:
+        entry["tokens"] = sorted(tokens)
+    now = time.time()
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.setex(_entry_key(digest), ttl, json.dumps(entry))
+        pipe.zadd(INDEX_KEY, {digest: now})
+        if near:
+            pipe.zadd(_bucket_key(bucket), {digest: now})
+            pipe.zremrangebyrank(_bucket_key(bucket), 0, -NEAR_CANDIDATES - 1)
+            pipe.expire(_bucket_key(bucket), ttl)
+        pipe.execute()
+        _evict(client, settings.llm_cache_max_entries)
+    except RedisError:
+        return
+
+
+def clear_llm_cache() -> None:
+    """Drop the per-process cache (tests, admin tooling)."""
+    with _lock:
+        _local.clear()
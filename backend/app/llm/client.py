@@ -1,16 +1,29 @@
-"""OpenAI-compatible LLM client (OpenAI, Ollama, or any compatible API)."""
+"""OpenAI-compatible LLM client (OpenAI, Ollama, or any compatible API).
+
+Clients are created once per (base URL, API key) and reused, so requests share the
+underlying HTTP connection pool instead of opening a new one per call. Requests time out
+after LLM_TIMEOUT_SECONDS and are retried (with backoff, on connection errors, 429 and 5xx)
+up to LLM_MAX_RETRIES times by the openai client.
+
+The async functions (llm_chat_async, llm_insight_async, llm_chat_stream, llm_insights_batch)
+are what the API uses: they do not hold a threadpool worker while waiting on the provider and
+run under the concurrency limits in limits.py; reply-cache lookups and writes (sync Redis) run
+in a worker thread so they do not block the event loop. llm_chat / llm_insight are the
+blocking equivalents for scripts.
+"""
 
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Hashable, Mapping, Optional
 
-from ..core.config import get_settings
+import httpx
 
-# Optional: openai package for OpenAI-compatible APIs
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None  # type: ignore[misc, assignment]
+from ..core.config import get_settings
+from ..core.lazy import optional_import
+from .cache import get_reply, normalize_context, store_reply
+from .limits import get_limiter
 
 SYSTEM_PROMPT = """Ты — помощник в личном дашборде LifePulse. Отвечай кратко и по делу.
 Темы: здоровье, финансы, продуктивность, обучение, цели. Язык ответа — тот же, что у пользователя."""
@@ -18,69 +31,299 @@ SYSTEM_PROMPT = """Ты — помощник в личном дашборде Li
 INSIGHT_SYSTEM = """Ты — аналитик личных данных. На основе краткой сводки данных пользователя 
 сформулируй один лаконичный инсайт или рекомендацию (1–3 предложения). Язык — тот же, что в данных."""
 
+INSIGHT_PROMPT = "Дай один инсайт или рекомендацию."
 
-def _client() -> Any:
-    if OpenAI is None:
-        return None
+CHAT_MAX_TOKENS = 1024
+INSIGHT_MAX_TOKENS = 256
+
+
+def _client_kwargs() -> dict | None:
     s = get_settings()
     if s.llm_base_url:
-        return OpenAI(base_url=s.llm_base_url, api_key=s.llm_api_key or "ollama")
+        return {"base_url": s.llm_base_url, "api_key": s.llm_api_key or "ollama"}
     if s.llm_api_key:
-        return OpenAI(api_key=s.llm_api_key)
+        return {"api_key": s.llm_api_key}
     return None
 
 
-def llm_chat(message: str, context: str | None = None) -> tuple[str | None, str | None]:
-    """
-    Send user message to LLM, optionally with context. Returns (reply_text, model_name) or (None, None) if disabled.
-    """
-    client = _client()
-    if not client:
-        return None, None
+# (client class, base_url, api_key) -> client; one connection pool per configuration
+_clients: dict[tuple, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _openai_class(name: str) -> Any:
+    # Optional: openai package for OpenAI-compatible APIs, imported with the first client
+    openai = optional_import("openai")
+    return getattr(openai, name) if openai is not None else None
+
+
+def _shared(cls_name: str) -> Any:
+    kwargs = _client_kwargs()
+    if kwargs is None:
+        return None
+    cls = _openai_class(cls_name)
+    if cls is None:
+        return None
+    key = (cls, kwargs.get("base_url"), kwargs["api_key"])
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = cls(**kwargs, **_transport_kwargs(cls_name))
+    return client
+
 
+def _transport_kwargs(cls_name: str) -> dict:
     s = get_settings()
+    kwargs = {
+        "timeout": httpx.Timeout(s.llm_timeout_seconds, connect=min(5.0, s.llm_timeout_seconds)),
+        "max_retries": s.llm_max_retries,
+    }
+    if cls_name == "AsyncOpenAI":
+        # Keep-alive pool sized to the concurrency limit: every slot can reuse a connection
+        size = max(s.llm_max_concurrency, s.llm_batch_concurrency)
+        kwargs["http_client"] = _openai_class("DefaultAsyncHttpxClient")(
+            limits=httpx.Limits(max_connections=size, max_keepalive_connections=size)
+        )
+    return kwargs
+
+
+def _client() -> Any:
+    return _shared("OpenAI")
+
+
+def _async_client() -> Any:
+    return _shared("AsyncOpenAI")
+
+
+def llm_configured() -> bool:
+    return _client_kwargs() is not None and _openai_class("OpenAI") is not None
+
+
+async def close_llm_clients() -> None:
+    """Close pooled connections (app shutdown); clients are recreated on next use."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        result = client.close()
+        if hasattr(result, "__await__"):
+            await result
+
+
+def _chat_messages(message: str, context: str | None) -> list[dict]:
     messages = [{"role": "system", "content": SYSTEM_PROMPT}]
     if context:
         messages.append({"role": "user", "content": f"Контекст данных:\n{context}\n\nВопрос пользователя: {message}"})
     else:
         messages.append({"role": "user", "content": message})
+    return messages
+
+
+def _insight_messages(context: str) -> list[dict]:
+    return [
+        {"role": "system", "content": INSIGHT_SYSTEM},
+        {"role": "user", "content": f"Сводка данных:\n{context}\n\n{INSIGHT_PROMPT}"},
+    ]
+
+
+def _reply(resp: Any, default_model: str) -> tuple[str | None, str | None]:
+    choice = resp.choices[0] if resp.choices else None
+    if choice and choice.message and choice.message.content:
+        return choice.message.content.strip(), getattr(resp, "model", None) or default_model
+    return None, None
+
+
+def llm_chat(
+    message: str, context: str | None = None, use_cache: bool = True, user_id: Optional[int] = None
+) -> tuple[str | None, str | None]:
+    """
+    Send user message to LLM, optionally with context. Returns (reply_text, model_name) or (None, None) if disabled.
+    Identical (or, with LLM_CACHE_SIMILARITY, the same user's near-identical) requests are answered
+    from the response cache.
+    """
+    client = _client()
+    if not client:
+        return None, None
 
+    s = get_settings()
+    if use_cache:
+        hit = get_reply(s.llm_model, SYSTEM_PROMPT, message, context, user_id)
+        if hit is not None:
+            return hit.text, hit.model
     try:
         resp = client.chat.completions.create(
             model=s.llm_model,
-            messages=messages,
-            max_tokens=1024,
+            messages=_chat_messages(message, context),
+            max_tokens=CHAT_MAX_TOKENS,
         )
-        choice = resp.choices[0] if resp.choices else None
-        if choice and choice.message and choice.message.content:
-            return choice.message.content.strip(), getattr(resp, "model", None) or s.llm_model
     except Exception:
-        pass
-    return None, None
+        return None, None
+    reply, model = _reply(resp, s.llm_model)
+    if reply is not None:
+        store_reply(s.llm_model, SYSTEM_PROMPT, message, context, reply, model, user_id)
+    return reply, model
 
 
-def llm_insight(context: str) -> tuple[str | None, str | None]:
+def llm_insight(
+    context: str, use_cache: bool = True, user_id: Optional[int] = None
+) -> tuple[str | None, str | None]:
     """
     Generate one short insight from user data context. Returns (insight_text, model_name) or (None, None).
+    Repeated contexts are answered from the response cache.
     """
     client = _client()
     if not client:
         return None, None
 
     s = get_settings()
-    messages = [
-        {"role": "system", "content": INSIGHT_SYSTEM},
-        {"role": "user", "content": f"Сводка данных:\n{context}\n\nДай один инсайт или рекомендацию."},
-    ]
+    if use_cache:
+        hit = get_reply(s.llm_model, INSIGHT_SYSTEM, INSIGHT_PROMPT, context, user_id)
+        if hit is not None:
+            return hit.text, hit.model
     try:
         resp = client.chat.completions.create(
             model=s.llm_model,
-            messages=messages,
-            max_tokens=256,
+            messages=_insight_messages(context),
+            max_tokens=INSIGHT_MAX_TOKENS,
         )
-        choice = resp.choices[0] if resp.choices else None
-        if choice and choice.message and choice.message.content:
-            return choice.message.content.strip(), getattr(resp, "model", None) or s.llm_model
     except Exception:
-        pass
-    return None, None
+        return None, None
+    insight, model = _reply(resp, s.llm_model)
+    if insight is not None:
+        store_reply(s.llm_model, INSIGHT_SYSTEM, INSIGHT_PROMPT, context, insight, model, user_id)
+    return insight, model
+
+
+async def _complete_async(
+    system: str,
+    prompt: str,
+    context: str | None,
+    messages: list[dict],
+    max_tokens: int,
+    user_id: Optional[int],
+    use_cache: bool,
+) -> tuple[str | None, str | None]:
+    client = _async_client()
+    if not client:
+        return None, None
+    s = get_settings()
+    if use_cache:
+        hit = await asyncio.to_thread(get_reply, s.llm_model, system, prompt, context, user_id)
+        if hit is not None:
+            return hit.text, hit.model
+    async with get_limiter().slot(user_id):
+        try:
+            resp = await client.chat.completions.create(
+                model=s.llm_model, messages=messages, max_tokens=max_tokens
+            )
+        except Exception:
+            return None, None
+    reply, model = _reply(resp, s.llm_model)
+    if reply is not None:
+        await asyncio.to_thread(
+            store_reply, s.llm_model, system, prompt, context, reply, model, user_id
+        )
+    return reply, model
+
+
+async def llm_chat_async(
+    message: str, context: str | None = None, user_id: Optional[int] = None, use_cache: bool = True
+) -> tuple[str | None, str | None]:
+    """llm_chat without blocking a thread; raises LlmBusy / LlmUserBusy when over the limits."""
+    return await _complete_async(
+        SYSTEM_PROMPT, message, context, _chat_messages(message, context),
+        CHAT_MAX_TOKENS, user_id, use_cache,
+    )
+
+
+async def llm_insight_async(
+    context: str, user_id: Optional[int] = None, use_cache: bool = True
+) -> tuple[str | None, str | None]:
+    """llm_insight without blocking a thread; raises LlmBusy / LlmUserBusy when over the limits."""
+    return await _complete_async(
+        INSIGHT_SYSTEM, INSIGHT_PROMPT, context, _insight_messages(context),
+        INSIGHT_MAX_TOKENS, user_id, use_cache,
+    )
+
+
+async def llm_insights_batch(
+    contexts: Mapping[Hashable, str], concurrency: Optional[int] = None
+) -> dict[Hashable, tuple[str | None, str | None]]:
+    """
+    Insights for many contexts in one pass (e.g. the weekly digest for all users).
+
+    Contexts that normalize to the same text are sent once; up to `concurrency`
+    (LLM_BATCH_CONCURRENCY) requests are in flight, within the global limit. A context whose
+    request fails maps to (None, None).
+    """
+    if not contexts:
+        return {}
+    limit = asyncio.Semaphore(max(1, concurrency or get_settings().llm_batch_concurrency))
+    unique: dict[str, str] = {}
+    for context in contexts.values():
+        unique.setdefault(normalize_context(context), context)
+
+    async def one(context: str) -> tuple[str | None, str | None]:
+        async with limit:
+            try:
+                return await llm_insight_async(context)
+            except Exception:
+                return None, None
+
+    keys = list(unique)
+    results = await asyncio.gather(*(one(unique[key]) for key in keys))
+    by_context = dict(zip(keys, results, strict=True))
+    return {item: by_context[normalize_context(context)] for item, context in contexts.items()}
+
+
+async def llm_chat_stream(
+    message: str, context: str | None = None, user_id: Optional[int] = None, use_cache: bool = True
+) -> AsyncIterator[tuple[str, str]]:
+    """
+    Stream a chat reply as ("delta", text) items followed by one ("done", model_name).
+
+    The provider stream is read one chunk per item, so a slow consumer slows the upstream read
+    (TCP backpressure) instead of buffering the reply; closing the generator (client
+    disconnect) closes the provider stream. The concurrency slot is held until the stream
+    ends. Check llm_configured() before calling.
+    """
+    client = _async_client()
+    if client is None:
+        raise RuntimeError("LLM is not configured")
+
+    s = get_settings()
+    if use_cache:
+        hit = await asyncio.to_thread(
+            get_reply, s.llm_model, SYSTEM_PROMPT, message, context, user_id
+        )
+        if hit is not None:
+            yield "delta", hit.text
+            yield "done", hit.model or s.llm_model
+            return
+
+    model = s.llm_model
+    parts: list[str] = []
+    async with get_limiter().slot(user_id):
+        stream = await client.chat.completions.create(
+            model=s.llm_model,
+            messages=_chat_messages(message, context),
+            max_tokens=CHAT_MAX_TOKENS,
+            stream=True,
+        )
+        try:
+            async for chunk in stream:
+                model = getattr(chunk, "model", None) or model
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield "delta", delta
+        finally:
+            await stream.close()
+    reply = "".join(parts).strip()
+    if reply:
+        await asyncio.to_thread(
+            store_reply, s.llm_model, SYSTEM_PROMPT, message, context, reply, model, user_id
+        )
+    yield "done", model
@@ -0,0 +1,327 @@
+"""Server-side LLM context: a compact numeric summary of the user's recent daily data.
+
+The summary covers the last LLM_CONTEXT_DAYS days of the daily rollup (build_daily_dataframe
+bounded in SQL): per metric the 7-day and full-window mean, range, linear trend per day and
+the latest value, plus days in the last week that deviate by more than ANOMALY_Z standard
+deviations. Lines are added in priority order (anomalies, then metrics by importance) until
+LLM_CONTEXT_MAX_TOKENS is reached.
+
+The per-day rollup is cached in Redis (`llm_context:{user_id}`). Entry writes are tracked with
+Session events: committed inserts/updates/deletes add their local_date to
+`llm_context:dirty:{user_id}`, and the next build reloads only those days. Bulk UPDATE/DELETE
+statements drop the rollup of every user they touch: the users pinned by the statement's
+`user_id` criterion, or else the users of the matched rows, looked up before it runs. A new
+day (the window moves) rebuilds the window.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import date, timedelta
+from itertools import chain
+from typing import Iterable, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+
+from ..analytics import DAILY_SOURCE_MODELS, build_daily_dataframe
+from ..core.config import get_settings
+from ..core.lazy import lazy_import
+from ..services.cache import delete_keys, get_cache_client, get_json, set_json
+from ..services.read_routing import USER_INFO_KEY
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+ANOMALY_Z = 2.0
+RECENT_DAYS = 7
+MAX_ANOMALIES = 5
+# Summary order: most useful metrics first (they survive a tight token budget)
+METRICS = (
+    "sleep_hours",
+    "energy_level",
+    "wellbeing",
+    "total_deep_work_hours",
+    "deep_work_hours",
+    "focus_level",
+    "tasks_completed",
+    "study_hours",
+    "income",
+    "expense_total",
+    "steps",
+    "workout_minutes",
+    "weight_kg",
+    "heart_rate_avg",
+)
+_DIRTY_INFO_KEY = "llm_context_dirty"
+_ALL_DAYS = None  # dirty marker: the whole rollup must be rebuilt
+
+
+def _rollup_key(user_id: int) -> str:
+    return f"llm_context:{user_id}"
+
+
+def _dirty_key(user_id: int) -> str:
+    return f"llm_context:dirty:{user_id}"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~3 characters per token; conservative for Cyrillic and numbers)."""
+    return math.ceil(len(text) / 3)
+
+
+def _rollup_rows(db, user_id: int, start: date, end: date) -> dict[str, dict[str, float]]:
+    """{iso_date: {metric: value}} from the daily frame for start..end."""
+    df = build_daily_dataframe(db, user_id=user_id, start=start, end=end)
+    if df.empty:
+        return {}
+    expense_cols = [c for c in df.columns if c.startswith("expense_")]
+    if expense_cols:
+        df = df.assign(expense_total=df[expense_cols].sum(axis=1, min_count=1))
+    columns = [c for c in METRICS if c in df.columns]
+    rows = {}
+    for record in df[["date", *columns]].to_dict("records"):
+        values = {
+            key: round(float(value), 2)
+            for key, value in record.items()
+            if key != "date" and not pd.isna(value)
+        }
+        if values:
+            rows[record["date"].isoformat()] = values
+    return rows
+
+
+def _take_dirty(user_id: int) -> tuple[set[str], bool]:
+    """Pop the dirty days recorded since the last build; (days, rebuild_everything)."""
+    client = get_cache_client()
+    if client is None:
+        return set(), True
+    try:
+        pipe = client.pipeline(transaction=True)
+        pipe.smembers(_dirty_key(user_id))
+        pipe.delete(_dirty_key(user_id))
+        members, _ = pipe.execute()
+    except RedisError:
+        return set(), True
+    return set(members) - {""}, "*" in members
+
+
+def load_rollup(db, user_id: int, today: Optional[date] = None) -> dict[str, dict[str, float]]:
+    """Per-day rollup for the context window, refreshed incrementally from the cache."""
+    settings = get_settings()
+    today = today or date.today()
+    start = today - timedelta(days=settings.llm_context_days - 1)
+    cached = get_json(_rollup_key(user_id))
+    dirty, rebuild = _take_dirty(user_id)
+    if cached and cached.get("end") == today.isoformat() and not rebuild:
+        days = cached["days"]
+        dirty = {d for d in dirty if start.isoformat() <= d <= today.isoformat()}
+        if dirty:
+            low, high = date.fromisoformat(min(dirty)), date.fromisoformat(max(dirty))
+            fresh = _rollup_rows(db, user_id, low, high)
+            for day in list(days):
+                if low.isoformat() <= day <= high.isoformat():
+                    del days[day]
+            days.update(fresh)
+        else:
+            return days
+    else:
+        days = _rollup_rows(db, user_id, start, today)
+    set_json(
+        _rollup_key(user_id),
+        {"end": today.isoformat(), "days": days},
+        settings.llm_context_ttl_seconds,
+    )
+    return days
+
+
+def _slope(x: np.ndarray, y: np.ndarray) -> float:
+    if len(x) < 3:
+        return 0.0
+    dx = x - x.mean()
+    denom = float((dx * dx).sum())
+    return float((dx * (y - y.mean())).sum() / denom) if denom else 0.0
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.0f}" if abs(value) >= 100 else f"{value:.1f}".rstrip("0").rstrip(".")
+
+
+def summary_lines(days: dict[str, dict[str, float]], today: date) -> tuple[list[str], list[str]]:
+    """(metric lines in METRICS order, anomaly lines by |z| descending)."""
+    ordered = sorted(days)
+    offsets = np.array([(today - date.fromisoformat(d)).days for d in ordered], dtype=float)
+    metric_lines, anomalies = [], []
+    for metric in METRICS:
+        mask = np.array([metric in days[d] for d in ordered], dtype=bool)
+        if not mask.any():
+            continue
+        values = np.array(
+            [days[d][metric] for d, keep in zip(ordered, mask, strict=True) if keep], dtype=float
+        )
+        if not values.any():
+            continue  # never logged (sum columns default to 0)
+        ago = offsets[mask]
+        recent = values[ago < RECENT_DAYS]
+        mean, std = float(values.mean()), float(values.std())
+        parts = [f"{metric}:"]
+        if recent.size:
+            parts.append(f"7d {_fmt(float(recent.mean()))} |")
+        low, high = _fmt(float(values.min())), _fmt(float(values.max()))
+        parts.append(f"{len(values)}d {_fmt(mean)} [{low}..{high}]")
+        slope = _slope(-ago, values)
+        if abs(slope) >= 0.005:
+            parts.append(f"| trend {slope:+.2f}/d")
+        last_day = date.fromisoformat(ordered[int(np.flatnonzero(mask)[-1])])
+        parts.append(f"| last {_fmt(float(values[-1]))} ({last_day:%m-%d})")
+        metric_lines.append(" ".join(parts))
+        if len(values) >= RECENT_DAYS and std > 0:
+            for value, days_ago in zip(values, ago, strict=True):
+                z = (value - mean) / std
+                if days_ago < RECENT_DAYS and abs(z) >= ANOMALY_Z:
+                    day = today - timedelta(days=int(days_ago))
+                    line = f"! {day:%m-%d} {metric} {_fmt(float(value))} ({z:+.1f}σ)"
+                    anomalies.append((abs(z), line))
+    anomalies.sort(key=lambda item: -item[0])
+    return metric_lines, [line for _, line in anomalies[:MAX_ANOMALIES]]
+
+
+def render_context(
+    days: dict[str, dict[str, float]], today: date, max_tokens: Optional[int] = None
+) -> str:
+    """Summary text within the token budget (header, anomalies, then metrics by priority)."""
+    settings = get_settings()
+    max_tokens = max_tokens or settings.llm_context_max_tokens
+    if not days:
+        return "Нет данных за последние дни."
+    metric_lines, anomaly_lines = summary_lines(days, today)
+    header = (
+        f"Данные за {len(days)} дн. по {today.isoformat()} "
+        f"(среднее 7d | {settings.llm_context_days}d [min..max]):"
+    )
+    lines, used = [header], estimate_tokens(header)
+    for line in chain(anomaly_lines[:2], metric_lines, anomaly_lines[2:]):
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            continue
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+def get_llm_context(db, user_id: int, today: Optional[date] = None) -> str:
+    """Token-budgeted summary of the user's recent data for LLM prompts."""
+    today = today or date.today()
+    return render_context(load_rollup(db, user_id, today), today)
+
+
+def mark_dirty(changes: Iterable[tuple[int, Optional[date]]]) -> None:
+    """Record changed (user_id, local_date) pairs; a None date invalidates the user's rollup."""
+    by_user: dict[int, set[str]] = {}
+    for user_id, day in changes:
+        by_user.setdefault(user_id, set()).add("*" if day is _ALL_DAYS else str(day))
+    if not by_user:
+        return
+    client = get_cache_client()
+    if client is None:
+        return
+    ttl = get_settings().llm_context_ttl_seconds
+    try:
+        pipe = client.pipeline(transaction=False)
+        for user_id, days in by_user.items():
+            pipe.sadd(_dirty_key(user_id), *days)
+            pipe.expire(_dirty_key(user_id), ttl)
+        pipe.execute()
+    except RedisError:
+        delete_keys(*(_rollup_key(user_id) for user_id in by_user))
+
+
+def _note(session, user_id, day) -> None:
+    if user_id is not None:
+        session.info.setdefault(_DIRTY_INFO_KEY, set()).add((user_id, day))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, _flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, DAILY_SOURCE_MODELS):
+            continue
+        _note(session, obj.user_id, obj.local_date)
+        # A moved entry also changes the day it was moved from
+        for previous in inspect(obj).attrs.local_date.history.deleted or ():
+            _note(session, obj.user_id, previous)
+
+
+def _criterion_user_ids(statement, table) -> Optional[set]:
+    """User ids pinned by a top-level `user_id == x` / `user_id IN (...)` criterion, else None."""
+    clause = statement.whereclause
+    if clause is None:
+        return None
+    if isinstance(clause, BooleanClauseList) and clause.operator is operators.and_:
+        criteria = clause.clauses
+    else:
+        criteria = (clause,)
+    for criterion in criteria:
+        if not isinstance(criterion, BinaryExpression):
+            continue
+        column, bound = criterion.left, criterion.right
+        if getattr(column, "table", None) is not table or column.name != "user_id":
+            continue
+        value = bound.effective_value if isinstance(bound, BindParameter) else None
+        if value is None:
+            continue
+        if criterion.operator is operators.eq:
+            return {value}
+        if criterion.operator is operators.in_op:
+            return set(value)
+    return None
+
+
+def _matched_user_ids(state, model, rows: list[dict]) -> set:
+    """Users owning the rows an UPDATE/DELETE is about to touch (runs before the statement)."""
+    query = select(model.user_id).distinct()
+    ids = [row["id"] for row in rows if "id" in row]
+    if rows and len(ids) == len(rows):  # ORM bulk UPDATE by primary key
+        query = query.where(model.id.in_(ids))
+    elif state.statement.whereclause is not None:
+        query = query.where(state.statement.whereclause)
+    return set(state.session.execute(query).scalars())
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_dml(state):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    mapper = state.bind_mapper
+    if mapper is None or mapper.class_ not in DAILY_SOURCE_MODELS:
+        return
+    session = state.session
+    params = state.parameters
+    rows = params if isinstance(params, list) else [params] if params else []
+    if state.is_insert:
+        if rows and all("user_id" in row for row in rows):
+            for row in rows:
+                _note(session, row["user_id"], row.get("local_date", _ALL_DAYS))
+        else:  # INSERT ... SELECT: only the request's user is known
+            _note(session, session.info.get(USER_INFO_KEY), _ALL_DAYS)
+        return
+    user_ids = _criterion_user_ids(state.statement, mapper.local_table)
+    if user_ids is None:
+        user_ids = _matched_user_ids(state, mapper.class_, rows)
+    for user_id in user_ids:
+        _note(session, user_id, _ALL_DAYS)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_dirty(session):
+    changes = session.info.pop(_DIRTY_INFO_KEY, None)
+    if changes:
+        mark_dirty(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_dirty(session):
+    session.info.pop(_DIRTY_INFO_KEY, None)
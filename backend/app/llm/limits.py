@@ -0,0 +1,75 @@
+"""Concurrency limits for provider calls.
+
+Every async provider call holds one slot of a per-process limit (LLM_MAX_CONCURRENCY) and one
+of the caller's per-user limit (LLM_MAX_CONCURRENCY_PER_USER). A user who already has that many
+calls in flight is rejected at once (LlmUserBusy, 429); otherwise the call waits up to
+LLM_QUEUE_TIMEOUT_SECONDS for a global slot (LlmBusy, 503). Batch jobs pass user_id=None and
+only take global slots.
+
+Semaphores belong to the running event loop, so each loop (the app's, or one per
+asyncio.run() in a task) gets its own limiter.
+"""
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from ..core.config import get_settings
+
+
+class LlmBusy(RuntimeError):
+    """No provider slot freed up within the queue timeout; the API answers 503."""
+
+
+class LlmUserBusy(LlmBusy):
+    """The user already has the maximum number of provider calls in flight; the API answers 429."""
+
+
+class LlmLimiter:
+    def __init__(self, max_concurrency: int, per_user: int, queue_timeout: float):
+        self.global_slots = asyncio.Semaphore(max(1, max_concurrency))
+        self.per_user = max(1, per_user)
+        self.queue_timeout = queue_timeout
+        self._user_in_flight: dict[int, int] = {}
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[int] = None) -> AsyncIterator[None]:
+        if user_id is not None:
+            if self._user_in_flight.get(user_id, 0) >= self.per_user:
+                raise LlmUserBusy(f"user {user_id} has {self.per_user} LLM requests in flight")
+            self._user_in_flight[user_id] = self._user_in_flight.get(user_id, 0) + 1
+        try:
+            try:
+                await asyncio.wait_for(self.global_slots.acquire(), self.queue_timeout)
+            except TimeoutError as e:
+                raise LlmBusy("no LLM slot available") from e
+            try:
+                yield
+            finally:
+                self.global_slots.release()
+        finally:
+            if user_id is not None:
+                remaining = self._user_in_flight[user_id] - 1
+                if remaining:
+                    self._user_in_flight[user_id] = remaining
+                else:
+                    del self._user_in_flight[user_id]
+
+
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LlmLimiter]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_limiter() -> LlmLimiter:
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        settings = get_settings()
+        limiter = _limiters[loop] = LlmLimiter(
+            settings.llm_max_concurrency,
+            settings.llm_max_concurrency_per_user,
+            settings.llm_queue_timeout_seconds,
+        )
+    return limiter
@@ -1,7 +1,8 @@
 import os
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
@@ -9,7 +10,10 @@ from slowapi.util import get_remote_address
 
 from .api.router import api_router
 from .core.config import get_settings
-from .database import Base, DATABASE_URL, engine
+from .core.security import PasswordHasherBusy, shutdown_password_hasher
+from .database import Base, DATABASE_URL, dispose_async_engine, engine
+from .llm.client import close_llm_clients
+from .llm.limits import LlmBusy, LlmUserBusy
 
 settings = get_settings()
 limiter = Limiter(
@@ -21,6 +25,31 @@ app = FastAPI(title="Personal Life Dashboard MVP", version="0.1.0")
 
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+
+@app.exception_handler(PasswordHasherBusy)
+def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many sign-in requests, try again shortly."},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(LlmBusy)
+def llm_busy_handler(request: Request, exc: LlmBusy):
+    if isinstance(exc, LlmUserBusy):
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Too many AI assistant requests in progress."},
+            headers={"Retry-After": "1"},
+        )
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "AI assistant is busy, try again shortly."},
+        headers={"Retry-After": "1"},
+    )
+
 app.add_middleware(SlowAPIMiddleware)
 
 app.add_middleware(
@@ -43,6 +72,13 @@ def on_startup():
         Base.metadata.create_all(bind=engine)
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    shutdown_password_hasher()
+    await dispose_async_engine()
+    await close_llm_clients()
+
+
 @app.get("/")
 def root():
     return {"status": "ok"}
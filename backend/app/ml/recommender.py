@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any
+from functools import cache
+from typing import Any, NamedTuple, Optional
 
-import numpy as np
-import pandas as pd
+from ..core.lazy import lazy_import
+from .rules import FrameStats, StatKey
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 
 def _add(recommendations: list[dict], message: str, severity: str = "info") -> None:
@@ -12,12 +17,12 @@ def _add(recommendations: list[dict], message: str, severity: str = "info") -> N
 
 
 def _recommendations_from_goals(
-    df: pd.DataFrame,
+    stats: FrameStats,
     goals: list[dict[str, Any]],
     recommendations: list[dict],
 ) -> None:
     """Add recommendations tied to user goals (target vs current)."""
-    if not goals or df.empty:
+    if not goals or stats.empty:
         return
     for g in goals:
         sphere = g.get("sphere")
@@ -27,18 +32,14 @@ def _recommendations_from_goals(
         if target_value is None or not target_metric:
             continue
         col = target_metric
-        if col not in df.columns:
-            continue
-        series = df[col].dropna()
-        if len(series) < 3:
+        summary = stats.get(("summary", col))
+        if summary is None or summary.count < 3:
             continue
         # Weekly goals: use sum for study_hours, deep_work_hours; else mean
         if col in ("study_hours", "deep_work_hours", "tasks_completed"):
-            current = float(series.sum())
+            current = summary.total
         else:
-            current = float(series.mean())
-        if current is None:
-            continue
+            current = summary.mean
         if current < target_value * 0.9:
             shortfall = target_value - current
             if "sleep" in title.lower() or col == "sleep_hours":
@@ -64,184 +65,291 @@ def _recommendations_from_goals(
                 )
 
 
-def generate_recommendations(
-    df: pd.DataFrame,
-    goals: list[dict[str, Any]] | None = None,
-) -> list[dict]:
-    recommendations: list[dict] = []
-    goals = goals or []
-
-    if df.empty:
-        _add(
-            recommendations,
-            "Добавьте первые записи (здоровье, финансы, продуктивность, обучение) — "
-            "тогда появятся персональные рекомендации.",
-            "info",
-        )
-        return recommendations
-
-    # --- Goal‑aware ---
-    _recommendations_from_goals(df, goals, recommendations)
-
-    # --- Sleep vs energy (existing) ---
-    if "sleep_hours" in df.columns and "energy_level" in df.columns:
-        sample = df[["sleep_hours", "energy_level"]].dropna()
-        if len(sample) >= 5:
-            corr = sample["sleep_hours"].corr(sample["energy_level"])
-            if corr is not None and not np.isnan(corr) and corr > 0.3:
-                _add(
-                    recommendations,
-                    "Увеличение сна связано с ростом энергии. Попробуйте добавить +30–60 мин сна.",
-                    "info",
-                )
+# --- Feature vector ---
+# Statistics the recommendation model reads, as (FrameStats key, feature name per field).
+# A None name skips the field; a missing statistic leaves its features NaN.
+_FEATURE_SOURCES: tuple[tuple[StatKey, tuple[Optional[str], ...]], ...] = (
+    (("corr", "sleep_hours", "energy_level"), ("sleep_energy_n", "sleep_energy_corr")),
+    (("summary", "sleep_hours"), ("sleep_n", None, "sleep_mean", None)),
+    (("corr", "deep_work_hours", "wellbeing"), ("deep_work_wellbeing_n", "deep_work_wellbeing_corr")),
+    (("corr", "expense_food", "wellbeing"), ("food_wellbeing_n", "food_wellbeing_corr")),
+    (("summary", "study_hours"), ("study_n", None, "study_mean", "study_std")),
+    (("pair_means", "focus_level", "deep_work_hours"), ("focus_deep_work_n", "focus_mean", "deep_work_mean")),
+    (("expense_income_ratio",), ("income_days", "expense_income_ratio")),
+    (("expense_income_slopes", 30), ("slope_days", "income_slope", "expense_slope")),
+    (
+        ("weekday_split", "sleep_hours", 0),
+        ("monday_sleep_n", "monday_sleep_mean", "other_sleep_n", "other_sleep_mean"),
+    ),
+    (
+        ("split", "sleep_hours", "focus_level", 6, 6),
+        (None, "short_sleep_n", "short_sleep_focus", "long_sleep_n", "long_sleep_focus"),
+    ),
+)
 
-    # --- Low average sleep ---
-    if "sleep_hours" in df.columns:
-        avg_sleep = df["sleep_hours"].dropna().mean()
-        if avg_sleep is not None and not np.isnan(avg_sleep) and avg_sleep < 6.5:
-            _add(
-                recommendations,
-                f"Средний сон {avg_sleep:.1f} ч — ниже 6.5 ч. Рекомендуем 7–8 ч для лучшей продуктивности.",
-                "warning",
+FEATURES: tuple[str, ...] = tuple(
+    name for _, names in _FEATURE_SOURCES for name in names if name is not None
+)
+_FEATURE_INDEX = {name: i for i, name in enumerate(FEATURES)}
+
+
+def feature_vector(stats: FrameStats) -> np.ndarray:
+    """The frame's FEATURES as a float vector (NaN = not available), from shared statistics."""
+    vector = np.full(len(FEATURES), np.nan)
+    for key, names in _FEATURE_SOURCES:
+        value = stats.get(key)
+        if value is None:
+            continue
+        for name, field in zip(names, value, strict=True):
+            if name is not None:
+                vector[_FEATURE_INDEX[name]] = field
+    return vector
+
+
+def features_to_dict(vector: np.ndarray) -> dict[str, Optional[float]]:
+    """JSON-safe {feature: value | None} for storing a feature vector."""
+    return {
+        name: None if np.isnan(value) else float(value)
+        for name, value in zip(FEATURES, vector, strict=True)
+    }
+
+
+def features_from_dict(values: dict[str, Optional[float]]) -> np.ndarray:
+    """Inverse of features_to_dict; features missing from `values` (stored earlier) are NaN."""
+    return np.array([np.nan if values.get(name) is None else values[name] for name in FEATURES], dtype=float)
+
+
+# --- Scoring model ---
+
+
+class Condition(NamedTuple):
+    """sum(weight * feature) + bias > 0 (>= 0 when not strict); false if a feature is NaN."""
+
+    weights: dict[str, float]
+    bias: float = 0.0
+    strict: bool = True
+
+
+def _at_least(feature: str, value: float) -> Condition:
+    return Condition({feature: 1.0}, -value, strict=False)
+
+
+def _above(feature: str, value: float = 0.0) -> Condition:
+    return Condition({feature: 1.0}, -value)
+
+
+def _below(feature: str, value: float) -> Condition:
+    return Condition({feature: -1.0}, value)
+
+
+def _exceeds(feature: str, other: str, margin: float = 0.0, scale: float = 1.0) -> Condition:
+    """feature > scale * other + margin."""
+    return Condition({feature: 1.0, other: -scale}, -margin)
+
+
+@dataclass(frozen=True)
+class Recommendation:
+    name: str
+    message: str  # str.format template over FEATURES
+    conditions: tuple[Condition, ...]
+    weight: float  # ranking score when all conditions hold
+    severity: str = "info"
+
+
+RECOMMENDATIONS: tuple[Recommendation, ...] = (
+    Recommendation(
+        "sleep_vs_energy",
+        "Увеличение сна связано с ростом энергии. Попробуйте добавить +30–60 мин сна.",
+        (_at_least("sleep_energy_n", 5), _above("sleep_energy_corr", 0.3)),
+        weight=10,
+    ),
+    Recommendation(
+        "low_average_sleep",
+        "Средний сон {sleep_mean:.1f} ч — ниже 6.5 ч. Рекомендуем 7–8 ч для лучшей продуктивности.",
+        (_below("sleep_mean", 6.5),),
+        weight=9,
+        severity="warning",
+    ),
+    Recommendation(
+        "deep_work_vs_wellbeing",
+        "Повышенная концентрация без отдыха связана с более низким самочувствием. Планируйте перерывы.",
+        (_at_least("deep_work_wellbeing_n", 5), _below("deep_work_wellbeing_corr", -0.3)),
+        weight=8,
+        severity="warning",
+    ),
+    Recommendation(
+        "food_spend_vs_wellbeing",
+        "Расходы на питание связаны с самочувствием. Стоит пересмотреть рацион или бюджет.",
+        (_at_least("food_wellbeing_n", 5), _below("food_wellbeing_corr", -0.3)),
+        weight=7,
+    ),
+    Recommendation(
+        # Study hours: encourage consistency (hours are non-negative, so std > 0 implies mean > 0)
+        "study_consistency",
+        "Часы обучения сильно колеблются по дням. Регулярные короткие сессии часто эффективнее редких длинных.",
+        (_at_least("study_n", 5), _exceeds("study_std", "study_mean", scale=0.8)),
+        weight=6,
+    ),
+    Recommendation(
+        "focus_without_deep_work",
+        "Высокий уровень фокуса, но мало часов глубокой работы. Выделите 1–2 блока по 1–2 ч без отвлечений.",
+        (_at_least("focus_deep_work_n", 5), _at_least("focus_mean", 7), _below("deep_work_mean", 2)),
+        weight=5,
+    ),
+    Recommendation(
+        "expenses_exceed_income",
+        "Расходы в среднем превышают доходы. Рекомендуем пересмотреть бюджет или источники дохода.",
+        (_at_least("income_days", 5), _above("expense_income_ratio", 1.0)),
+        weight=4,
+        severity="warning",
+    ),
+    Recommendation(
+        "expenses_outgrow_income",
+        "Расходы растут быстрее дохода (тренд за последние 30 дней). Стоит пересмотреть бюджет.",
+        (_at_least("slope_days", 10), _above("income_slope"), _exceeds("expense_slope", "income_slope")),
+        weight=3,
+        severity="warning",
+    ),
+    Recommendation(
+        # Sleep worse after weekends (Monday vs rest)
+        "sleep_after_weekend",
+        "После выходных сон в среднем хуже (понедельник). Попробуйте стабильное время отхода в воскресенье.",
+        (
+            _at_least("monday_sleep_n", 3),
+            _at_least("other_sleep_n", 10),
+            _exceeds("other_sleep_mean", "monday_sleep_mean", margin=0.2),
+        ),
+        weight=2,
+    ),
+    Recommendation(
+        "focus_with_sleep",
+        "Фокус выше в дни с ≥6 ч сна. Для продуктивности старайтесь высыпаться.",
+        (
+            _at_least("short_sleep_n", 3),
+            _at_least("long_sleep_n", 3),
+            _exceeds("long_sleep_focus", "short_sleep_focus", margin=0.3),
+        ),
+        weight=1,
+    ),
+)
+
+
+class RecommendationModel:
+    """RECOMMENDATIONS compiled to matrices over FEATURES for scoring many vectors at once.
+
+    Every condition is a row of `coef` (conditions x features); a recommendation fires when
+    all its conditions hold and then scores its weight. For a (users, features) matrix X,
+    margins X @ coef.T + bias, NaN checks and the per-recommendation "all conditions" test
+    are each one matrix operation, so ranking 10 000 users costs about as much as ranking one.
+    """
+
+    def __init__(self, recommendations: tuple[Recommendation, ...]):
+        self.recommendations = recommendations
+        conditions = [(i, c) for i, r in enumerate(recommendations) for c in r.conditions]
+        self.coef = np.zeros((len(conditions), len(FEATURES)))
+        for row, (_, condition) in enumerate(conditions):
+            for name, weight in condition.weights.items():
+                self.coef[row, _FEATURE_INDEX[name]] = weight
+        self.bias = np.array([c.bias for _, c in conditions])
+        self.strict = np.array([c.strict for _, c in conditions])
+        self.owner = np.zeros((len(conditions), len(recommendations)))
+        self.owner[np.arange(len(conditions)), [i for i, _ in conditions]] = 1.0
+        self.weight = np.array([r.weight for r in recommendations], dtype=float)
+
+    def scores(self, X: np.ndarray) -> np.ndarray:
+        """(users, recommendations) scores for (users, features) X; 0 where one does not fire."""
+        X = np.atleast_2d(X)
+        missing = np.isnan(X)
+        margins = np.where(missing, 0.0, X) @ self.coef.T + self.bias
+        holds = np.where(self.strict, margins > 0, margins >= 0)
+        holds &= (missing.astype(float) @ (self.coef != 0).T) == 0
+        fired = holds.astype(float) @ self.owner == self.owner.sum(axis=0)
+        return np.where(fired, self.weight, 0.0)
+
+    def recommend(self, X: np.ndarray, limit: int = 5) -> list[list[dict]]:
+        """Top `limit` fired recommendations per row of X, highest score first."""
+        X = np.atleast_2d(X)
+        scores = self.scores(X)
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :limit]
+        results = []
+        for vector, row_scores, row_order in zip(X, scores, order, strict=True):
+            features = dict(zip(FEATURES, vector.tolist(), strict=True))
+            results.append(
+                [
+                    {
+                        "message": self.recommendations[i].message.format_map(features),
+                        "severity": self.recommendations[i].severity,
+                    }
+                    for i in row_order
+                    if row_scores[i] > 0
+                ]
             )
+        return results
 
-    # --- Deep work vs wellbeing (existing) ---
-    if "deep_work_hours" in df.columns and "wellbeing" in df.columns:
-        sample = df[["deep_work_hours", "wellbeing"]].dropna()
-        if len(sample) >= 5:
-            corr = sample["deep_work_hours"].corr(sample["wellbeing"])
-            if corr is not None and not np.isnan(corr) and corr < -0.3:
-                _add(
-                    recommendations,
-                    "Повышенная концентрация без отдыха связана с более низким самочувствием. Планируйте перерывы.",
-                    "warning",
-                )
 
-    # --- Food spend vs wellbeing (existing) ---
-    if "expense_food" in df.columns and "wellbeing" in df.columns:
-        sample = df[["expense_food", "wellbeing"]].dropna()
-        if len(sample) >= 5:
-            corr = sample["expense_food"].corr(sample["wellbeing"])
-            if corr is not None and not np.isnan(corr) and corr < -0.3:
-                _add(
-                    recommendations,
-                    "Расходы на питание связаны с самочувствием. Стоит пересмотреть рацион или бюджет.",
-                    "info",
-                )
+@cache
+def recommendation_model() -> RecommendationModel:
+    return RecommendationModel(RECOMMENDATIONS)
 
-    # --- Study hours: encourage consistency ---
-    if "study_hours" in df.columns:
-        study = df["study_hours"].dropna()
-        if len(study) >= 5:
-            avg_study = study.mean()
-            std_study = study.std()
-            if (
-                std_study is not None
-                and not np.isnan(std_study)
-                and avg_study
-                and std_study > avg_study * 0.8
-            ):
-                _add(
-                    recommendations,
-                    "Часы обучения сильно колеблются по дням. Регулярные короткие сессии часто эффективнее редких длинных.",
-                    "info",
-                )
 
-    # --- Focus vs deep work: high focus but low deep work ---
-    if "focus_level" in df.columns and "deep_work_hours" in df.columns:
-        sample = df[["focus_level", "deep_work_hours"]].dropna()
-        if len(sample) >= 5:
-            avg_focus = sample["focus_level"].mean()
-            avg_dw = sample["deep_work_hours"].mean()
-            if avg_focus >= 7 and avg_dw < 2:
-                _add(
-                    recommendations,
-                    "Высокий уровень фокуса, но мало часов глубокой работы. Выделите 1–2 блока по 1–2 ч без отвлечений.",
-                    "info",
-                )
+def score_recommendations(X: np.ndarray, limit: int = 5) -> list[list[dict]]:
+    """Feature-based recommendations for stored or freshly built vectors, one list per row."""
+    return recommendation_model().recommend(X, limit)
 
-    # --- Income vs total expenses ---
-    if "income" in df.columns:
-        expense_cols = [c for c in df.columns if c.startswith("expense_")]
-        if expense_cols:
-            total_exp = df[expense_cols].sum(axis=1)
-            income = df["income"]
-            sample = pd.concat([income, total_exp], axis=1).dropna()
-            if len(sample) >= 5:
-                ratio = (sample.iloc[:, 1] / sample.iloc[:, 0].replace(0, np.nan)).mean()
-                if ratio is not None and not np.isnan(ratio) and ratio > 1.0:
-                    _add(
-                        recommendations,
-                        "Расходы в среднем превышают доходы. Рекомендуем пересмотреть бюджет или источники дохода.",
-                        "warning",
-                    )
-
-    # --- Expenses grow faster than income (trend) ---
-    if "income" in df.columns:
-        expense_cols = [c for c in df.columns if c.startswith("expense_")]
-        if expense_cols and len(df) >= 10:
-            df_t = df.copy()
-            df_t["_total_exp"] = df_t[expense_cols].sum(axis=1)
-            sample = df_t[["date", "income", "_total_exp"]].dropna().sort_values("date").tail(30)
-            if len(sample) >= 10:
-                x = np.arange(len(sample))
-                inc_slope = float(np.polyfit(x, sample["income"].values, 1)[0])
-                exp_slope = float(np.polyfit(x, sample["_total_exp"].values, 1)[0])
-                if inc_slope > 0 and exp_slope > inc_slope:
-                    _add(
-                        recommendations,
-                        "Расходы растут быстрее дохода (тренд за последние 30 дней). Стоит пересмотреть бюджет.",
-                        "warning",
-                    )
-
-    # --- Sleep worse after weekends (Monday vs rest) ---
-    if "sleep_hours" in df.columns and len(df) >= 10:
-        df_w = df.copy()
-        df_w["date"] = pd.to_datetime(df_w["date"])
-        df_w["weekday"] = df_w["date"].dt.dayofweek
-        mon = df_w[df_w["weekday"] == 0]["sleep_hours"].dropna()
-        other = df_w[df_w["weekday"] != 0]["sleep_hours"].dropna()
-        if len(mon) >= 3 and len(other) >= 10:
-            mon_avg = mon.mean()
-            other_avg = other.mean()
-            if mon_avg < other_avg - 0.2:
-                _add(
-                    recommendations,
-                    "После выходных сон в среднем хуже (понедельник). Попробуйте стабильное время отхода в воскресенье.",
-                    "info",
-                )
 
-    # --- Focus higher on days with >6h sleep ---
-    if "focus_level" in df.columns and "sleep_hours" in df.columns:
-        low = df[df["sleep_hours"] < 6][["focus_level"]].dropna()
-        high = df[df["sleep_hours"] >= 6][["focus_level"]].dropna()
-        if len(low) >= 3 and len(high) >= 3:
-            f_low, f_high = low["focus_level"].mean(), high["focus_level"].mean()
-            if f_high > f_low + 0.3:
-                _add(
-                    recommendations,
-                    "Фокус выше в дни с ≥6 ч сна. Для продуктивности старайтесь высыпаться.",
-                    "info",
-                )
+def generate_recommendations(
+    df: pd.DataFrame,
+    goals: list[dict[str, Any]] | None = None,
+    stats: FrameStats | None = None,
+) -> list[dict]:
+    """Goal-aware recommendations, then the feature model's top-ranked ones; at most 5."""
+    return batch_recommendations([stats or FrameStats(df)], [goals])[0]
 
-    # --- Cap and fallback ---
-    if len(recommendations) > 5:
-        recommendations = recommendations[:5]
-    if not recommendations:
-        _add(
-            recommendations,
-            "Продолжайте регулярный трекинг — скоро появятся персональные рекомендации.",
-            "info",
-        )
 
-    return recommendations
+def batch_recommendations(
+    frames: list[FrameStats], goals: list[list[dict[str, Any]] | None] | None = None
+) -> list[list[dict]]:
+    """generate_recommendations for many users' frames; the model scores all of them at once."""
+    if not frames:
+        return []
+    goals = goals or [None] * len(frames)
+    ranked = score_recommendations(np.vstack([feature_vector(stats) for stats in frames]))
+    results = []
+    for stats, user_goals, model_recommendations in zip(frames, goals, ranked, strict=True):
+        recommendations: list[dict] = []
+
+        if stats.empty:
+            _add(
+                recommendations,
+                "Добавьте первые записи (здоровье, финансы, продуктивность, обучение) — "
+                "тогда появятся персональные рекомендации.",
+                "info",
+            )
+            results.append(recommendations)
+            continue
+
+        _recommendations_from_goals(stats, user_goals or [], recommendations)
+        recommendations += model_recommendations[: max(0, 5 - len(recommendations))]
+
+        # --- Cap and fallback ---
+        if len(recommendations) > 5:
+            recommendations = recommendations[:5]
+        if not recommendations:
+            _add(
+                recommendations,
+                "Продолжайте регулярный трекинг — скоро появятся персональные рекомендации.",
+                "info",
+            )
+        results.append(recommendations)
+    return results
 
 
 def recommendations_payload(
     df: pd.DataFrame,
     goals: list[dict[str, Any]] | None = None,
+    stats: FrameStats | None = None,
 ) -> dict:
     return {
         "generated_at": datetime.utcnow(),
-        "recommendations": generate_recommendations(df, goals=goals),
+        "recommendations": generate_recommendations(df, goals=goals, stats=stats),
     }
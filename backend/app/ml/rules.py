@@ -0,0 +1,334 @@
+"""Declarative insight/recommendation rules over shared, memoized frame statistics.
+
+A rule declares the statistics it needs as keys such as ("corr", "sleep_hours",
+"energy_level") and is a cheap predicate over their values that returns a message or None.
+FrameStats computes each statistic at most once per daily frame (NumPy over the frame's
+columns, dates parsed once), so rules in analytics.generate_insights and the recommender's
+feature vector (recommender.feature_vector) share the work: Monday-vs-rest sleep, the
+expense-vs-income slopes or a correlation are computed once however many rules read them.
+A statistic is None when its columns are missing; rules that need it are skipped.
+
+New statistics register with @statistic(name); new rules with @rule(registry, *needs).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from ..core.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+StatKey = tuple[Hashable, ...]
+
+STATISTICS: dict[str, Callable[..., Any]] = {}
+
+
+class Summary(NamedTuple):
+    count: int
+    total: float
+    mean: float  # NaN when count == 0
+    std: float  # sample std (ddof=1); NaN when count < 2
+
+
+class Measure(NamedTuple):
+    n: int  # rows the value was computed from
+    value: float  # NaN when undefined
+
+
+class PairMeans(NamedTuple):
+    n: int
+    mean_x: float
+    mean_y: float
+
+
+class Split(NamedTuple):
+    """Mean of y where x < low_below vs x >= high_from (rows with both present)."""
+
+    n: int
+    low_n: int
+    low_mean: float
+    high_n: int
+    high_mean: float
+
+
+class WeekdaySplit(NamedTuple):
+    """Mean of a column on one weekday vs all other days."""
+
+    day_n: int
+    day_mean: float
+    other_n: int
+    other_mean: float
+
+
+class WeekdayTable(NamedTuple):
+    """Per-weekday aggregates of every numeric column; arrays are (7, columns), 0 = Monday."""
+
+    columns: dict[str, int]
+    counts: np.ndarray
+    sums: np.ndarray
+    means: np.ndarray  # NaN where count is 0
+
+
+class Slopes(NamedTuple):
+    n: int
+    income: float
+    expense: float
+
+
+def statistic(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Register `fn(stats, *args)` as the statistic computed for keys (name, *args)."""
+
+    def register(fn: Callable[..., Any]) -> Callable[..., Any]:
+        STATISTICS[name] = fn
+        return fn
+
+    return register
+
+
+class FrameStats:
+    """Memoized statistics over one daily frame (sorted by date once; do not mutate the frame)."""
+
+    def __init__(self, df: pd.DataFrame):
+        if not df.empty and "date" in df.columns and not df["date"].is_monotonic_increasing:
+            df = df.sort_values("date", ignore_index=True)
+        self.df = df
+        self._values: dict[StatKey, Any] = {}
+
+    @property
+    def empty(self) -> bool:
+        return self.df.empty
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def get(self, key: StatKey) -> Any:
+        if key not in self._values:
+            name, *args = key
+            self._values[key] = STATISTICS[name](self, *args)
+        return self._values[key]
+
+    def seed(self, key: StatKey, value: Any) -> None:
+        """Provide a statistic computed elsewhere (e.g. by a grouped kernel over many users)."""
+        self._values[key] = value
+
+    def column(self, name: str) -> Optional[np.ndarray]:
+        return self.get(("column", name))
+
+
+def _mean(values: np.ndarray) -> float:
+    return float(values.mean()) if values.size else float("nan")
+
+
+def _slope(x: np.ndarray, y: np.ndarray) -> float:
+    dx = x - x.mean()
+    denom = float((dx * dx).sum())
+    return float((dx * (y - y.mean())).sum() / denom) if denom else float("nan")
+
+
+def weekday_aggregate(
+    weekdays: np.ndarray,
+    values: np.ndarray,
+    groups: Optional[np.ndarray] = None,
+    n_groups: int = 1,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-weekday count, sum and mean of every column in one bincount pass.
+
+    `weekdays` is (rows,) ints 0..6; `values` is (rows, columns) floats with NaN = missing.
+    Returns (counts, sums, means), each (7, columns); means are NaN where count is 0.
+    With `groups` ((rows,) ints 0..n_groups-1, e.g. one per user) each is (n_groups, 7, columns).
+    """
+    columns = values.shape[1]
+    present = ~np.isnan(values)
+    cells = weekdays if groups is None else groups * 7 + weekdays
+    size = 7 * columns * (1 if groups is None else n_groups)
+    bins = (cells[:, None] * columns + np.arange(columns))[present]
+    shape = (7, columns) if groups is None else (n_groups, 7, columns)
+    counts = np.bincount(bins, minlength=size).reshape(shape)
+    sums = np.bincount(bins, weights=values[present], minlength=size).reshape(shape)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    return counts, sums, means
+
+
+def _pair(stats: FrameStats, x: str, y: str) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    return stats.get(("pair", x, y))
+
+
+@statistic("column")
+def _column(stats: FrameStats, name: str) -> Optional[np.ndarray]:
+    if name not in stats.df.columns:
+        return None
+    return stats.df[name].to_numpy(dtype=float, na_value=np.nan)
+
+
+@statistic("weekday")
+def _weekday(stats: FrameStats) -> Optional[np.ndarray]:
+    if stats.empty or "date" not in stats.df.columns:
+        return None
+    return pd.to_datetime(stats.df["date"]).dt.dayofweek.to_numpy()
+
+
+@statistic("total_expense")
+def _total_expense(stats: FrameStats) -> Optional[np.ndarray]:
+    """Sum of expense_* columns per day (missing categories count as 0)."""
+    columns = [c for c in stats.df.columns if c.startswith("expense_")]
+    if not columns:
+        return None
+    return np.nan_to_num(stats.df[columns].to_numpy(dtype=float, na_value=np.nan)).sum(axis=1)
+
+
+@statistic("pair")
+def _pair_values(stats: FrameStats, x: str, y: str) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    """(x, y) over rows where both are present."""
+    xs, ys = stats.column(x), stats.column(y)
+    if xs is None or ys is None:
+        return None
+    keep = ~(np.isnan(xs) | np.isnan(ys))
+    return xs[keep], ys[keep]
+
+
+@statistic("summary")
+def _summary(stats: FrameStats, name: str) -> Optional[Summary]:
+    values = stats.column(name)
+    if values is None:
+        return None
+    values = values[~np.isnan(values)]
+    std = float(values.std(ddof=1)) if values.size >= 2 else float("nan")
+    return Summary(int(values.size), float(values.sum()), _mean(values), std)
+
+
+@statistic("corr")
+def _corr(stats: FrameStats, x: str, y: str) -> Optional[Measure]:
+    pair = _pair(stats, x, y)
+    if pair is None:
+        return None
+    xs, ys = pair
+    if xs.size < 2:
+        return Measure(int(xs.size), float("nan"))
+    dx, dy = xs - xs.mean(), ys - ys.mean()
+    denom = float(np.sqrt((dx * dx).sum() * (dy * dy).sum()))
+    return Measure(int(xs.size), float((dx * dy).sum() / denom) if denom else float("nan"))
+
+
+@statistic("slope")
+def _regression_slope(stats: FrameStats, x: str, y: str) -> Optional[Measure]:
+    """OLS slope of y on x as (n, slope); NaN when x is constant."""
+    pair = _pair(stats, x, y)
+    if pair is None:
+        return None
+    xs, ys = pair
+    return Measure(int(xs.size), _slope(xs, ys) if xs.size else float("nan"))
+
+
+@statistic("pair_means")
+def _pair_means(stats: FrameStats, x: str, y: str) -> Optional[PairMeans]:
+    pair = _pair(stats, x, y)
+    if pair is None:
+        return None
+    xs, ys = pair
+    return PairMeans(int(xs.size), _mean(xs), _mean(ys))
+
+
+@statistic("split")
+def _split(
+    stats: FrameStats, x: str, y: str, low_below: float, high_from: float
+) -> Optional[Split]:
+    pair = _pair(stats, x, y)
+    if pair is None:
+        return None
+    xs, ys = pair
+    low, high = ys[xs < low_below], ys[xs >= high_from]
+    return Split(int(xs.size), int(low.size), _mean(low), int(high.size), _mean(high))
+
+
+@statistic("weekday_table")
+def _weekday_table(stats: FrameStats) -> Optional[WeekdayTable]:
+    weekdays = stats.get(("weekday",))
+    if weekdays is None:
+        return None
+    names = [c for c in stats.df.columns if c != "date"]
+    values = np.column_stack([stats.column(c) for c in names]) if names else np.empty((len(stats), 0))
+    counts, sums, means = weekday_aggregate(weekdays, values)
+    return WeekdayTable({name: i for i, name in enumerate(names)}, counts, sums, means)
+
+
+@statistic("weekday_split")
+def _weekday_split(stats: FrameStats, name: str, weekday: int) -> Optional[WeekdaySplit]:
+    table = stats.get(("weekday_table",))
+    if table is None or name not in table.columns:
+        return None
+    column = table.columns[name]
+    day_n, day_sum = int(table.counts[weekday, column]), float(table.sums[weekday, column])
+    other_n = int(table.counts[:, column].sum()) - day_n
+    other_sum = float(table.sums[:, column].sum()) - day_sum
+    return WeekdaySplit(
+        day_n,
+        day_sum / day_n if day_n else float("nan"),
+        other_n,
+        other_sum / other_n if other_n else float("nan"),
+    )
+
+
+@statistic("expense_income_slopes")
+def _expense_income_slopes(stats: FrameStats, days: int) -> Optional[Slopes]:
+    """Income and total expense slopes over the last `days` days with income logged."""
+    income, expense = stats.column("income"), stats.get(("total_expense",))
+    if income is None or expense is None:
+        return None
+    keep = ~np.isnan(income)
+    income, expense = income[keep][-days:], expense[keep][-days:]
+    if income.size < 2:
+        return Slopes(int(income.size), float("nan"), float("nan"))
+    x = np.arange(income.size, dtype=float)
+    return Slopes(int(income.size), _slope(x, income), _slope(x, expense))
+
+
+@statistic("expense_income_ratio")
+def _expense_income_ratio(stats: FrameStats) -> Optional[Measure]:
+    """(days with income logged, mean expense/income over those with non-zero income)."""
+    income, expense = stats.column("income"), stats.get(("total_expense",))
+    if income is None or expense is None:
+        return None
+    keep = ~np.isnan(income)
+    income, expense = income[keep], expense[keep]
+    nonzero = income != 0
+    ratio = _mean(expense[nonzero] / income[nonzero])
+    return Measure(int(income.size), ratio)
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    needs: tuple[StatKey, ...]
+    check: Callable[..., Optional[str]]
+    severity: str = "info"
+
+
+def rule(
+    registry: list[Rule], *needs: StatKey, severity: str = "info"
+) -> Callable[[Callable[..., Optional[str]]], Callable[..., Optional[str]]]:
+    """Append `fn(*values_of_needs) -> message | None` to `registry` as a Rule."""
+
+    def register(fn: Callable[..., Optional[str]]) -> Callable[..., Optional[str]]:
+        registry.append(Rule(fn.__name__.lstrip("_"), tuple(needs), fn, severity))
+        return fn
+
+    return register
+
+
+def evaluate_rules(rules: list[Rule], stats: FrameStats, limit: Optional[int] = None) -> list[dict]:
+    """Run rules in order over shared statistics; [{"message", "severity"}], at most `limit`."""
+    results: list[dict] = []
+    for r in rules:
+        values = [stats.get(need) for need in r.needs]
+        if any(value is None for value in values):
+            continue
+        message = r.check(*values)
+        if message:
+            results.append({"message": message, "severity": r.severity})
+            if limit is not None and len(results) >= limit:
+                break
+    return results
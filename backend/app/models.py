@@ -8,6 +8,7 @@ from sqlalchemy import (
     Integer,
     JSON,
     String,
+    Text,
 )
 from sqlalchemy.orm import relationship
 
@@ -36,6 +37,7 @@ class User(Base):
     dashboard_settings = Column(JSON, nullable=True)  # e.g. {"enabled_blocks": ["goals", "trends"], "order": [...]}
     notification_email = Column(String(255), nullable=True)
     notification_preferences = Column(JSON, nullable=True)  # e.g. {"email_reminders": true}
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # bump to revoke JWTs
 
     health_entries = relationship("HealthEntry", back_populates="user")
     finance_entries = relationship("FinanceEntry", back_populates="user")
@@ -145,6 +147,7 @@ class FocusSession(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     recorded_at = Column(DateTime(timezone=True), nullable=False)
     local_date = Column(Date, nullable=False, index=True)
+    timezone = Column(String(64), nullable=False, default="UTC", server_default="UTC")  # of recorded_at
     duration_minutes = Column(Integer, nullable=False)
     session_type = Column(String(32), nullable=True)  # pomodoro, deep_work
     notes = Column(String, nullable=True)
@@ -280,3 +283,24 @@ class Subscription(Base):
 
     user = relationship("User", back_populates="subscriptions")
     plan = relationship("Plan", back_populates="subscriptions")
+
+
+class ReminderSendState(Base):
+    """Per-user reminder delivery state: a user is emailed at most once per run date."""
+    __tablename__ = "reminder_send_state"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    last_sent_at = Column(DateTime(timezone=True), nullable=False)
+    last_run_date = Column(Date, nullable=False, index=True)
+
+
+class WeeklyReport(Base):
+    """Precomputed weekly report (tasks/weekly_digest); GET /analytics/weekly-report reads it."""
+    __tablename__ = "weekly_reports"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    period_end = Column(Date, primary_key=True, index=True)
+    period_start = Column(Date, nullable=False)
+    summary = Column(JSON, nullable=False)
+    insight = Column(Text, nullable=True)
+    generated_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import List, Literal, Optional
+from typing import List, Literal, Optional, Union
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field, conint, confloat
 
@@ -135,6 +135,7 @@ class FocusSessionRead(BaseModel):
     user_id: int
     recorded_at: datetime
     local_date: date
+    timezone: str
     duration_minutes: int
     session_type: Optional[SessionType] = None
     notes: Optional[str] = None
@@ -176,13 +177,21 @@ class FocusByCategoryItem(BaseModel):
     hours: float
 
 
+class FocusHeatmapCell(BaseModel):
+    weekday: int  # 0 = Monday
+    hour: int  # local hour of day, 0-23
+    sessions: int
+    minutes: int
+
+
 class ProductivityDashboardResponse(BaseModel):
     best_worst_weekday: list  # BestWorstWeekdayItem
     trends_14: list
     trends_30: list
     session_deep_work_hours_total: Optional[float] = None
-    top_hours: Optional[List[int]] = None  # hour of day (0-23) with most focus sessions
+    top_hours: Optional[List[int]] = None  # local hour of day (0-23) with most focus sessions
     focus_by_category: Optional[List[FocusByCategoryItem]] = None
+    focus_heatmap: Optional[List[FocusHeatmapCell]] = None  # hour-of-week cells with sessions
     insight: Optional[str] = None
 
 
@@ -242,6 +251,25 @@ class LearningEntryRead(TimestampRead, LearningEntryBase):
     user_id: int
 
 
+class BulkItemError(BaseModel):
+    loc: List[Union[str, int]]  # field path inside the entry
+    msg: str
+    type: str
+
+
+class BulkItemResult(BaseModel):
+    index: int  # position in the request (array index or NDJSON line among non-blank lines)
+    status: Literal["created", "invalid", "skipped"]  # skipped: valid, but an atomic batch failed
+    id: Optional[int] = None
+    errors: Optional[List[BulkItemError]] = None
+
+
+class BulkCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+
 class UserBase(BaseModel):
     email: EmailStr
     full_name: Optional[str] = None
@@ -303,6 +331,17 @@ class UserRoleUpdate(BaseModel):
     role: str = Field(min_length=3, max_length=32)
 
 
+ANALYTICS_REFRESH_MAX_USERS = 10_000
+
+
+class AnalyticsRefreshRequest(BaseModel):
+    # None: every user with entries
+    user_ids: Optional[List[int]] = Field(default=None, max_length=ANALYTICS_REFRESH_MAX_USERS)
+    ttl_seconds: Optional[int] = Field(default=None, ge=1)
+    workers: Optional[int] = Field(default=None, ge=1, le=64)  # None: CPUs of the job's host
+    chunk_size: int = Field(default=1000, ge=1, le=10_000)
+
+
 class CorrelationItem(BaseModel):
     metric_a: str
     metric_b: str
@@ -511,6 +550,8 @@ class SphereSummary(BaseModel):
 
 
 class WeeklyReportResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     period_start: date
     period_end: date
     summary: dict  # sphere -> SphereSummary or dict of metrics
@@ -557,10 +598,22 @@ class WeekdayTrendsResponse(BaseModel):
     trends_30: list[LinearTrendItem]
 
 
+# Several analytics payloads in one request (GET /analytics/bundle)
+class AnalyticsBundleResponse(BaseModel):
+    correlations: Optional[CorrelationsResponse] = None
+    insights: Optional[InsightsResponse] = None
+    recommendations: Optional[RecommendationsResponse] = None
+    trend_this_month: Optional[TrendThisMonthResponse] = None
+    insight_of_the_week: Optional[InsightOfTheWeekResponse] = None
+    weekday_trends: Optional[WeekdayTrendsResponse] = None
+
+
 # LLM / AI Assistant
 class LlmChatRequest(BaseModel):
     message: str = Field(..., min_length=1, max_length=4000)
     context: Optional[str] = Field(default=None, max_length=8000)
+    # Prepend the server-side summary of the user's recent data to `context`
+    use_data_context: bool = True
 
 
 class LlmChatResponse(BaseModel):
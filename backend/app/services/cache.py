@@ -1,3 +1,4 @@
+import asyncio
 import json
 from functools import lru_cache
 from typing import Any, Optional
@@ -40,3 +41,41 @@ def set_json(key: str, payload: dict[str, Any], ttl_seconds: int) -> None:
         client.setex(key, ttl_seconds, json.dumps(payload))
     except RedisError:
         return
+
+
+async def get_json_async(key: str) -> Optional[dict[str, Any]]:
+    """get_json for async code: the Redis round trip runs in a worker thread."""
+    if get_cache_client() is None:
+        return None
+    return await asyncio.to_thread(get_json, key)
+
+
+async def set_json_async(key: str, payload: dict[str, Any], ttl_seconds: int) -> None:
+    """set_json for async code: the Redis round trip runs in a worker thread."""
+    if get_cache_client() is None:
+        return
+    await asyncio.to_thread(set_json, key, payload, ttl_seconds)
+
+
+def set_many_json(payloads: dict[str, dict[str, Any]], ttl_seconds: int) -> None:
+    """set_json for many keys in one round trip (pipelined)."""
+    client = get_cache_client()
+    if not client or not payloads:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key, payload in payloads.items():
+            pipe.setex(key, ttl_seconds, json.dumps(payload))
+        pipe.execute()
+    except RedisError:
+        return
+
+
+def delete_keys(*keys: str) -> None:
+    client = get_cache_client()
+    if not client or not keys:
+        return
+    try:
+        client.delete(*keys)
+    except RedisError:
+        return
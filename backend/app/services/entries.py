@@ -1,7 +1,12 @@
+import json
 from datetime import date
-from typing import Optional
+from functools import cache
+from types import SimpleNamespace
+from typing import Any, Callable, List, Optional
 
 from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert
 
 from ..utils import normalize_datetime
 
@@ -57,3 +62,102 @@ def list_entries(
 ):
     q = build_entries_query(query, model, start_date, end_date, user_id)
     return q.order_by(model.local_date.desc(), model.id.desc()).offset(offset).limit(limit)
+
+
+def read_bulk_items(body: bytes, ndjson: bool) -> tuple[list[Any], dict[int, list[dict]]]:
+    """Decode a bulk body: a JSON array, or NDJSON (one JSON object per non-blank line).
+
+    Returns (items, errors by index); an NDJSON line that is not JSON is reported for its
+    index and left as None. A JSON body that is not an array raises 400.
+    """
+    if not ndjson:
+        try:
+            items = json.loads(body or b"[]")
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {exc}") from exc
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of entries")
+        return items, {}
+    items: list[Any] = []
+    errors: dict[int, list[dict]] = {}
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError as exc:
+            error = {"loc": [], "msg": f"Invalid JSON: {exc}", "type": "json_invalid"}
+            errors[len(items)] = [error]
+            items.append(None)
+    return items, errors
+
+
+@cache
+def _list_adapter(schema: type) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+def validate_bulk_items(
+    schema: type, items: list[Any], errors: dict[int, list[dict]]
+) -> dict[int, Any]:
+    """Validate items against `schema` in one pass; {index: entry} for the valid ones.
+
+    Validation errors are added to `errors` per index (loc relative to the entry). When
+    some items are invalid, the rest are validated again in one pass without them.
+    """
+    adapter = _list_adapter(schema)
+    indexes = [i for i in range(len(items)) if i not in errors]
+    try:
+        valid = adapter.validate_python([items[i] for i in indexes])
+        return dict(zip(indexes, valid, strict=True))
+    except ValidationError as exc:
+        for error in exc.errors(include_url=False, include_context=False, include_input=False):
+            position, *loc = error["loc"]
+            errors.setdefault(indexes[position], []).append(
+                {"loc": loc, "msg": error["msg"], "type": error["type"]}
+            )
+    indexes = [i for i in indexes if i not in errors]
+    valid = adapter.validate_python([items[i] for i in indexes])
+    return dict(zip(indexes, valid, strict=True))
+
+
+def bulk_entry_rows(
+    entries: dict[int, Any],
+    errors: dict[int, list[dict]],
+    user_id: int,
+    exclude: set[str],
+    prepare: Optional[Callable] = None,
+) -> dict[int, dict]:
+    """Column values per valid entry, timestamps normalized; {index: row}.
+
+    An entry whose timezone is unknown is moved to `errors`. `prepare(values, entry)` fills
+    derived columns as it does for single creates.
+    """
+    rows: dict[int, dict] = {}
+    for index, entry in entries.items():
+        try:
+            utc_dt, local_date, tz_name = normalize_datetime(entry.recorded_at, entry.timezone)
+        except ValueError as exc:
+            errors[index] = [{"loc": ["timezone"], "msg": str(exc), "type": "value_error"}]
+            continue
+        values = SimpleNamespace(user_id=user_id, **entry.model_dump(exclude=exclude))
+        if prepare:
+            prepare(values, entry)
+        rows[index] = {
+            **vars(values), "recorded_at": utc_dt, "local_date": local_date, "timezone": tz_name
+        }
+    return rows
+
+
+def insert_entry_rows(db, model, rows: dict[int, dict]) -> dict[int, int]:
+    """Insert rows with one executemany and return their ids in order; {index: id}. No commit.
+
+    On PostgreSQL this is batched INSERT .. RETURNING; SQLite cannot order RETURNING rows of a
+    multi-row insert, so SQLAlchemy runs one statement per row there (same transaction).
+    """
+    if not rows:
+        return {}
+    ids = db.scalars(
+        insert(model).returning(model.id, sort_by_parameter_order=True), list(rows.values())
+    ).all()
+    return dict(zip(rows, ids, strict=True))
@@ -0,0 +1,168 @@
+"""Authenticated principal cache: skip the users table on most authenticated requests.
+
+A `Principal` is a read-only snapshot of the user row (without the password hash). Lookups go
+through a small per-process TTL cache, then Redis (`principal:{user_id}:{token_version}`),
+then the database. Services that change the user (role, profile, password) call
+`invalidate_principal`; other API workers may serve the old snapshot for at most
+PRINCIPAL_LOCAL_TTL_SECONDS.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import get_settings
+from .cache import delete_keys, get_json, get_json_async, set_json, set_json_async
+
+LOCAL_CACHE_MAX_ENTRIES = 10_000
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    full_name: Optional[str]
+    default_timezone: Optional[str]
+    created_at: datetime
+    role: str
+    dashboard_settings: Optional[dict]
+    notification_email: Optional[str]
+    notification_preferences: Optional[dict]
+    token_version: int
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            default_timezone=user.default_timezone,
+            created_at=user.created_at,
+            role=user.role,
+            dashboard_settings=user.dashboard_settings,
+            notification_email=user.notification_email,
+            notification_preferences=user.notification_preferences,
+            token_version=user.token_version or 0,
+        )
+
+    def to_json(self) -> dict:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat()
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Principal":
+        data = dict(data)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+
+_local: "OrderedDict[int, tuple[float, Principal]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _redis_key(user_id: int, token_version: int) -> str:
+    return f"principal:{user_id}:{token_version}"
+
+
+def _local_get(user_id: int, token_version: int) -> Optional[Principal]:
+    with _lock:
+        item = _local.get(user_id)
+        if item is None:
+            return None
+        expires_at, principal = item
+        if expires_at < time.monotonic() or principal.token_version != token_version:
+            _local.pop(user_id, None)
+            return None
+        _local.move_to_end(user_id)
+        return principal
+
+
+def _local_set(principal: Principal, ttl_seconds: int) -> None:
+    if ttl_seconds <= 0:
+        return
+    with _lock:
+        _local[principal.id] = (time.monotonic() + ttl_seconds, principal)
+        _local.move_to_end(principal.id)
+        while len(_local) > LOCAL_CACHE_MAX_ENTRIES:
+            _local.popitem(last=False)
+
+
+def _cached_principal(user_id: int, token_version: int) -> Optional[Principal]:
+    principal = _local_get(user_id, token_version)
+    if principal is not None:
+        return principal
+    return _from_redis(user_id, token_version, get_json(_redis_key(user_id, token_version)))
+
+
+def _from_redis(user_id: int, token_version: int, cached: Optional[dict]) -> Optional[Principal]:
+    if not cached:
+        return None
+    principal = Principal.from_json(cached)
+    _local_set(principal, get_settings().principal_local_ttl_seconds)
+    return principal
+
+
+def _principal_for(user: Optional[models.User], token_version: int) -> Optional[Principal]:
+    if user is None or (user.token_version or 0) != token_version:
+        return None
+    principal = Principal.from_user(user)
+    _local_set(principal, get_settings().principal_local_ttl_seconds)
+    return principal
+
+
+def _remember_user(user: Optional[models.User], token_version: int) -> Optional[Principal]:
+    principal = _principal_for(user, token_version)
+    ttl = get_settings().principal_cache_ttl_seconds
+    if principal is not None and ttl > 0:
+        set_json(_redis_key(principal.id, token_version), principal.to_json(), ttl)
+    return principal
+
+
+def get_principal(db: Session, user_id: int, token_version: int = 0) -> Optional[Principal]:
+    """Principal for a verified token; None if the user is gone or the token was revoked."""
+    principal = _cached_principal(user_id, token_version)
+    if principal is not None:
+        return principal
+    return _remember_user(db.get(models.User, user_id), token_version)
+
+
+async def get_principal_async(
+    db: AsyncSession, user_id: int, token_version: int = 0
+) -> Optional[Principal]:
+    """get_principal for the async stack; Redis runs in a worker thread, the database is awaited."""
+    principal = _local_get(user_id, token_version)
+    if principal is not None:
+        return principal
+    key = _redis_key(user_id, token_version)
+    principal = _from_redis(user_id, token_version, await get_json_async(key))
+    if principal is not None:
+        return principal
+    principal = _principal_for(await db.get(models.User, user_id), token_version)
+    ttl = get_settings().principal_cache_ttl_seconds
+    if principal is not None and ttl > 0:
+        await set_json_async(key, principal.to_json(), ttl)
+    return principal
+
+
+def invalidate_principal(user_id: int, token_version: int | None = None) -> None:
+    """Drop cached snapshots for a user; call with the token_version in effect before the change."""
+    with _lock:
+        item = _local.pop(user_id, None)
+    versions = {token_version} if token_version is not None else set()
+    if item is not None:
+        versions.add(item[1].token_version)
+    delete_keys(*(_redis_key(user_id, version) for version in versions if version is not None))
+
+
+def clear_principal_cache() -> None:
+    """Drop the per-process cache (tests, admin tooling)."""
+    with _lock:
+        _local.clear()
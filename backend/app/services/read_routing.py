@@ -0,0 +1,81 @@
+"""Read-your-writes tracking for replica routing.
+
+Read-only dependencies (analytics, export, list endpoints) use the replica engine
+(DATABASE_READ_URL) unless the user committed a write within READ_YOUR_WRITES_SECONDS;
+then they stay on the primary so a list right after a create never misses the new row
+because of replication lag.
+
+Writes are detected with Session events: any flush or ORM INSERT/UPDATE/DELETE marks the
+session dirty, and its commit records the user stored in `session.info["user_id"]` (set by
+get_current_user). The mark lives in a per-process dict and in Redis (`rw:{user_id}`) so
+other API workers see it too.
+"""
+
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from .cache import delete_keys, get_json, set_json
+
+USER_INFO_KEY = "user_id"
+_WROTE_INFO_KEY = "wrote"
+
+_recent: dict[int, float] = {}
+_lock = threading.Lock()
+
+
+def _redis_key(user_id: int) -> str:
+    return f"rw:{user_id}"
+
+
+def note_write(user_id: int) -> None:
+    window = get_settings().read_your_writes_seconds
+    if window <= 0:
+        return
+    with _lock:
+        _recent[user_id] = time.monotonic() + window
+    set_json(_redis_key(user_id), {"sticky": True}, window)
+
+
+def recently_wrote(user_id: int) -> bool:
+    """True while reads for this user must go to the primary."""
+    with _lock:
+        until = _recent.get(user_id)
+        if until is not None:
+            if until > time.monotonic():
+                return True
+            _recent.pop(user_id, None)
+    return bool(get_json(_redis_key(user_id)))
+
+
+def clear_recent_writes() -> None:
+    """Forget all marks kept by this process (tests, admin tooling)."""
+    with _lock:
+        user_ids = list(_recent)
+        _recent.clear()
+    delete_keys(*(_redis_key(user_id) for user_id in user_ids))
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, _flush_context):
+    session.info[_WROTE_INFO_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_WROTE_INFO_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _record_commit(session):
+    if session.info.pop(_WROTE_INFO_KEY, False) and session.info.get(USER_INFO_KEY) is not None:
+        note_write(session.info[USER_INFO_KEY])
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop(_WROTE_INFO_KEY, None)
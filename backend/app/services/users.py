@@ -6,7 +6,9 @@ from sqlalchemy.orm import Session
 
 from .. import models
 from ..core.constants import ROLE_USER
-from ..core.security import hash_password, verify_password
+from ..core.security import hash_password, verify_and_update_password, verify_password
+from ..core.timezones import DEFAULT_TIMEZONE, zone_name
+from .principals import invalidate_principal
 
 RESET_TOKEN_EXPIRE_HOURS = 24
 
@@ -15,6 +17,17 @@ def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.email == email).first()
 
 
+def user_timezone(db: Session, user_id: int) -> str:
+    """The user's default_timezone if it is a known zone, else UTC (for bucketing imports)."""
+    return zone_name(db.query(models.User.default_timezone).filter(models.User.id == user_id).scalar())
+
+
+def explicit_user_timezone(db: Session, user_id: int) -> Optional[str]:
+    """user_timezone, or None while the user is on the UTC default (never chose a zone)."""
+    name = user_timezone(db, user_id)
+    return None if name == DEFAULT_TIMEZONE else name
+
+
 def create_user(db: Session, email: str, password: str, full_name: Optional[str] = None):
     user = models.User(
         email=email.lower(),
@@ -33,14 +46,20 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[models
     user = get_user_by_email(db, email.lower())
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        # Transparent upgrade when PASSWORD_HASH_SCHEME or BCRYPT_ROUNDS changed.
+        user.hashed_password = new_hash
+        db.commit()
     return user
 
 
 def set_user_role(db: Session, user: models.User, role: str) -> models.User:
     user.role = role
     db.commit()
+    invalidate_principal(user.id, user.token_version)
     db.refresh(user)
     return user
 
@@ -66,6 +85,7 @@ def update_user_profile(
     if notification_preferences is not None:
         user.notification_preferences = notification_preferences
     db.commit()
+    invalidate_principal(user.id, user.token_version)
     db.refresh(user)
     return user
 
@@ -80,6 +100,7 @@ def change_password(
         return None
     user.hashed_password = hash_password(new_password)
     db.commit()
+    invalidate_principal(user.id, user.token_version)
     db.refresh(user)
     return user
 
@@ -108,9 +129,13 @@ def reset_password_by_token(db: Session, token: str, new_password: str) -> bool:
     )
     if not user:
         return False
+    # Reset means the old password may be compromised: revoke every issued token.
+    previous_version = user.token_version or 0
     user.hashed_password = hash_password(new_password)
     user.password_reset_token = None
     user.password_reset_expires = None
+    user.token_version = previous_version + 1
     db.commit()
+    invalidate_principal(user.id, previous_version)
     db.refresh(user)
     return True
@@ -0,0 +1,179 @@
+"""Population analytics job: recompute the cached analytics of many users at once.
+
+Users (`--users`, default: everyone with entries) are split into chunks of `--chunk-size`
+handled by `--workers` processes. Each chunk loads all of its users' daily rows with one
+columnar query per source (build_population_dataframe), computes POPULATION_PAYLOADS
+(correlations, insights, recommendations, insight of the week, weekday trends) with grouped
+NumPy kernels (analytics.population_payloads) and writes them to Redis in one pipeline under
+the keys the /analytics endpoints read, so those serve them until `--ttl` expires.
+
+Run after bulk imports or before peak hours, with `--ttl` at least the time between runs;
+admins can also trigger it with POST /admin/analytics/refresh, which starts this module in a
+separate process (spawn_population_analytics) so API workers are not tied up.
+
+Usage (from repo root):
+  DATABASE_URL=... REDIS_URL=... \\
+  python -m backend.app.tasks.population_analytics --workers 4 --ttl 86400
+  python -m backend.app.tasks.population_analytics --users 1,2,3
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, union
+
+from .. import models
+from ..analytics import DAILY_SOURCE_MODELS, build_population_dataframe, population_payloads
+from ..core.config import get_settings
+from ..database import SessionLocal
+from ..services.cache import set_many_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def users_with_entries(db) -> list[int]:
+    """Users with at least one daily entry, in id order."""
+    stmt = union(*(select(model.user_id) for model in DAILY_SOURCE_MODELS))
+    return sorted(db.scalars(stmt).all())
+
+
+def load_goals(db, user_ids: Iterable[int]) -> dict[int, list[dict]]:
+    """Active goals of many users in one query, as the recommendation endpoints pass them."""
+    goals: dict[int, list[dict]] = {}
+    rows = db.scalars(
+        select(models.UserGoal)
+        .where(models.UserGoal.user_id.in_(list(user_ids)), models.UserGoal.archived == False)  # noqa: E712
+        .order_by(models.UserGoal.id)
+    )
+    for g in rows:
+        goals.setdefault(g.user_id, []).append(
+            {
+                "sphere": g.sphere,
+                "title": g.title,
+                "target_value": g.target_value,
+                "target_metric": g.target_metric,
+            }
+        )
+    return goals
+
+
+def run_chunk(user_ids: list[int], ttl_seconds: int) -> int:
+    """Compute and cache one chunk of users' analytics. Returns users processed."""
+    db = SessionLocal()
+    try:
+        population = build_population_dataframe(db, user_ids)
+        payloads = population_payloads(population, load_goals(db, user_ids))
+    finally:
+        db.close()
+    set_many_json(
+        {
+            f"{name}:{user_id}": jsonable_encoder(payload)
+            for user_id, user_payloads in payloads.items()
+            for name, payload in user_payloads.items()
+        },
+        ttl_seconds,
+    )
+    return len(payloads)
+
+
+def _run_chunk_args(args: tuple) -> int:
+    return run_chunk(*args)
+
+
+def run_population_analytics(
+    user_ids: Optional[list[int]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+    ttl_seconds: Optional[int] = None,
+) -> dict[str, int]:
+    """Recompute cached analytics for `user_ids` (default: all with entries); {"users": n}."""
+    ttl_seconds = ttl_seconds or get_settings().cache_ttl_seconds
+    if user_ids is None:
+        db = SessionLocal()
+        try:
+            user_ids = users_with_entries(db)
+        finally:
+            db.close()
+    chunk_size = max(1, chunk_size)
+    tasks = [
+        (user_ids[start:start + chunk_size], ttl_seconds)
+        for start in range(0, len(user_ids), chunk_size)
+    ]
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        results = [_run_chunk_args(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = list(executor.map(_run_chunk_args, tasks))
+    return {"users": sum(results)}
+
+
+def spawn_population_analytics(
+    user_ids: Optional[list[int]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    ttl_seconds: Optional[int] = None,
+) -> int:
+    """Start this job as a detached process (same environment and settings). Returns its pid."""
+    command = [sys.executable, "-m", __name__, "--chunk-size", str(chunk_size)]
+    if user_ids is not None:
+        command.append("--users=" + ",".join(str(user_id) for user_id in user_ids))
+    if workers:
+        command += ["--workers", str(workers)]
+    if ttl_seconds:
+        command += ["--ttl", str(ttl_seconds)]
+    process = subprocess.Popen(
+        command,
+        cwd=Path(__file__).resolve().parents[3],  # repo root, where `backend` is importable
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    return process.pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute cached analytics for many users.")
+    parser.add_argument(
+        "--users", type=lambda value: [int(v) for v in value.split(",") if v], default=None,
+        help="Comma-separated user ids (default: all with entries)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: CPUs)")
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Users per chunk"
+    )
+    parser.add_argument(
+        "--ttl", type=int, default=None, help="Cache TTL in seconds (default: CACHE_TTL_SECONDS)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    stats = run_population_analytics(
+        args.users,
+        chunk_size=args.chunk_size,
+        workers=args.workers or os.cpu_count() or 1,
+        ttl_seconds=args.ttl,
+    )
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Population analytics: users=%s in %.2fs (%.0f users/s)",
+        stats["users"], elapsed, stats["users"] / elapsed if elapsed else 0,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,127 +1,363 @@
 """Send reminder emails to users who opted in. Run via cron or worker.
 
+Eligibility for all opted-in users comes from two set-based queries (the opted-in users, and
+the last local_date per user and sphere via GROUP BY) instead of three queries per user.
+Emails go out in batches over a small pool of reused SMTP connections (one STARTTLS + login
+per connection, not per email), with SMTP_CONCURRENCY connections in parallel.
+
 Usage (from repo root):
   DATABASE_URL=... SMTP_HOST=... SMTP_PORT=587 SMTP_USER=... SMTP_PASSWORD=... \\
   python -m backend.app.tasks.reminder_emails
+
+For sharded / multi-process runs and dry runs see reminder_runner.
 """
 
-from datetime import date, timedelta
 import logging
+import queue
 import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
 from email.mime.text import MIMEText
 from email.utils import formataddr
+from typing import Iterable, Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import case, func, literal, select, union_all
 
 from .. import models
-from ..core.config import get_settings
-from ..database import Base
+from ..core.config import Settings, get_settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+INACTIVE_AFTER_DAYS = 3
+SUBJECT = "LifePulse: Reminder"
 
-def get_reminders_for_user(db, user_id: int) -> list[dict]:
-    """Return list of reminder items for user (same logic as GET /reminders)."""
-    yesterday = date.today() - timedelta(days=1)
-    health_yesterday = (
-        db.query(models.HealthEntry)
-        .filter(
-            models.HealthEntry.user_id == user_id,
-            models.HealthEntry.local_date == yesterday,
-        )
-        .limit(1)
-        .first()
-    )
+
+@dataclass
+class ReminderJob:
+    user_id: int
+    email: str
+    reminders: list[dict]
+
+
+def build_reminders(
+    today: date,
+    has_health_yesterday: bool,
+    last_health: Optional[date],
+    last_finance: Optional[date],
+) -> list[dict]:
+    """Reminder items for one user from their activity summary (same rules as GET /reminders)."""
     reminders = []
-    if health_yesterday is None:
+    if not has_health_yesterday:
         reminders.append({
             "type": "health_yesterday",
             "message": "Fill health for yesterday.",
         })
-    # Optional: "inactive N days" - check last entry across spheres
-    last_health = (
-        db.query(models.HealthEntry.local_date)
-        .filter(models.HealthEntry.user_id == user_id)
-        .order_by(models.HealthEntry.local_date.desc())
-        .limit(1)
-        .scalar()
-    )
-    last_finance = (
-        db.query(models.FinanceEntry.local_date)
-        .filter(models.FinanceEntry.user_id == user_id)
-        .order_by(models.FinanceEntry.local_date.desc())
-        .limit(1)
-        .scalar()
-    )
-    last_any = max(
-        d for d in [last_health, last_finance] if d is not None
-    ) if (last_health or last_finance) else None
-    if last_any and (date.today() - last_any).days > 3:
+    # "inactive N days" - last entry across spheres
+    last_any = max((d for d in (last_health, last_finance) if d is not None), default=None)
+    if last_any and (today - last_any).days > INACTIVE_AFTER_DAYS:
         reminders.append({
             "type": "inactive_days",
-            "message": f"You haven't logged in {(date.today() - last_any).days} days. Log today?",
+            "message": f"You haven't logged in {(today - last_any).days} days. Log today?",
         })
     return reminders
 
 
+def _activity_statement(today: date, user_filter):
+    """Per user and sphere: last local_date and whether there is an entry for yesterday."""
+    yesterday = today - timedelta(days=1)
+    parts = []
+    for sphere, model in (("health", models.HealthEntry), ("finance", models.FinanceEntry)):
+        parts.append(
+            select(
+                model.user_id.label("user_id"),
+                literal(sphere).label("sphere"),
+                func.max(model.local_date).label("last_date"),
+                func.max(case((model.local_date == yesterday, 1), else_=0)).label("has_yesterday"),
+            )
+            .where(user_filter(model.user_id))
+            .group_by(model.user_id)
+        )
+    return union_all(*parts)
+
+
+def load_activity(db, today: date, user_filter) -> dict[int, dict]:
+    """{user_id: {"health": last_date, "finance": last_date, "health_yesterday": bool}}."""
+    activity: dict[int, dict] = {}
+    for row in db.execute(_activity_statement(today, user_filter)):
+        item = activity.setdefault(row.user_id, {})
+        item[row.sphere] = row.last_date
+        if row.sphere == "health":
+            item["health_yesterday"] = bool(row.has_yesterday)
+    return activity
+
+
+def _reminders_from_activity(today: date, item: dict) -> list[dict]:
+    return build_reminders(
+        today,
+        has_health_yesterday=item.get("health_yesterday", False),
+        last_health=item.get("health"),
+        last_finance=item.get("finance"),
+    )
+
+
+def get_reminders_for_user(db, user_id: int, today: Optional[date] = None) -> list[dict]:
+    """Return list of reminder items for user (same logic as GET /reminders)."""
+    today = today or date.today()
+    activity = load_activity(db, today, lambda column: column == user_id)
+    return _reminders_from_activity(today, activity.get(user_id, {}))
+
+
+def _opted_in_users_statement():
+    return select(
+        models.User.id,
+        models.User.notification_email,
+        models.User.notification_preferences,
+    ).where(
+        models.User.notification_email.isnot(None),
+        models.User.notification_email != "",
+    )
+
+
+def collect_reminder_jobs(db, today: Optional[date] = None, user_filter=None) -> list[ReminderJob]:
+    """Reminder emails due for all opted-in users (optionally restricted by `user_filter`)."""
+    today = today or date.today()
+    stmt = _opted_in_users_statement()
+    if user_filter is not None:
+        stmt = stmt.where(user_filter(models.User.id))
+    recipients = {}
+    for user_id, email, prefs in db.execute(stmt):
+        email = (email or "").strip()
+        if email and (prefs or {}).get("email_reminders"):
+            recipients[user_id] = email
+    if not recipients:
+        return []
+
+    opted_in = stmt.with_only_columns(models.User.id).scalar_subquery()
+
+    def restrict(column):
+        return column.in_(opted_in)
+
+    activity = load_activity(db, today, restrict)
+    jobs = []
+    for user_id, email in recipients.items():
+        reminders = _reminders_from_activity(today, activity.get(user_id, {}))
+        if reminders:
+            jobs.append(ReminderJob(user_id=user_id, email=email, reminders=reminders))
+    return jobs
+
+
+def render_email(from_addr: str, job: ReminderJob) -> MIMEText:
+    body = "Hi,\n\n" + "\n".join(r["message"] for r in job.reminders) + "\n\n— LifePulse Dashboard"
+    msg = MIMEText(body, "plain", "utf-8")
+    msg["Subject"] = SUBJECT
+    msg["From"] = formataddr(("LifePulse Dashboard", from_addr))
+    msg["To"] = job.email
+    return msg
+
+
+def _smtp_configured(settings: Settings) -> bool:
+    return bool(settings.smtp_host and (settings.smtp_from_email or settings.smtp_user))
+
+
+def _from_address(settings: Settings) -> str:
+    return settings.smtp_from_email or settings.smtp_user
+
+
+class SMTPPool:
+    """Up to `size` SMTP connections, each opened (STARTTLS + login) once and reused."""
+
+    def __init__(self, settings: Settings, size: int):
+        self.settings = settings
+        self._idle: queue.LifoQueue[Optional[smtplib.SMTP]] = queue.LifoQueue()
+        for _ in range(max(1, size)):
+            self._idle.put(None)  # opened lazily
+
+    def _connect(self) -> smtplib.SMTP:
+        settings = self.settings
+        server = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.smtp_timeout_seconds)
+        if settings.smtp_starttls:
+            server.starttls()
+        if settings.smtp_user and settings.smtp_password:
+            server.login(settings.smtp_user, settings.smtp_password)
+        return server
+
+    def acquire(self) -> smtplib.SMTP:
+        """Take a connection (blocks while all are in use); hand it back with release()."""
+        server = self._idle.get()
+        if server is None:
+            try:
+                server = self._connect()
+            except Exception:
+                self._idle.put(None)
+                raise
+        return server
+
+    def release(self, server: Optional[smtplib.SMTP]) -> None:
+        self._idle.put(server)
+
+    def reconnect(self, server: smtplib.SMTP) -> smtplib.SMTP:
+        """Replace a connection the server dropped with a freshly opened one."""
+        _quit(server)
+        return self._connect()
+
+    def close(self) -> None:
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if server is not None:
+                _quit(server)
+
+
+def _quit(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
+
+
+def _deliver(server: smtplib.SMTP, msg: MIMEText, email: str) -> bool:
+    """Send one message; False if the server rejected it (logged). Disconnects propagate."""
+    try:
+        server.send_message(msg)
+        return True
+    except smtplib.SMTPServerDisconnected:
+        raise
+    except smtplib.SMTPRecipientsRefused:
+        logger.warning("Recipient refused: %s", email)
+    except smtplib.SMTPException as e:
+        logger.warning("Reminder email to %s failed: %s", email, e)
+    return False
+
+
+def _send_batch(pool: SMTPPool, batch: list[ReminderJob]) -> list[int]:
+    """Send one batch over one pooled connection; returns the user ids that were sent.
+
+    A message the server rejects is skipped and the batch goes on. If the server drops the
+    connection it is reopened once for that message; a second drop (or a failed reconnect)
+    ends the batch.
+    """
+    from_addr = _from_address(pool.settings)
+    sent: list[int] = []
+    try:
+        server = pool.acquire()
+    except Exception as e:
+        logger.exception("SMTP connection failed; %s reminder emails not sent: %s", len(batch), e)
+        return sent
+    try:
+        for job in batch:
+            msg = render_email(from_addr, job)
+            try:
+                delivered = _deliver(server, msg, job.email)
+            except smtplib.SMTPServerDisconnected:
+                server = pool.reconnect(server)
+                delivered = _deliver(server, msg, job.email)
+            if delivered:
+                sent.append(job.user_id)
+    except Exception as e:
+        logger.exception("Reminder batch failed after %s of %s emails: %s", len(sent), len(batch), e)
+        _quit(server)
+        server = None
+    finally:
+        pool.release(server)
+    return sent
+
+
+def _batches(jobs: list[ReminderJob], size: int) -> Iterable[list[ReminderJob]]:
+    for start in range(0, len(jobs), size):
+        yield jobs[start:start + size]
+
+
+class ReminderSender:
+    """SMTP pool + worker threads for a whole run, reused across calls to send()."""
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.settings = settings or get_settings()
+        self.concurrency = max(1, concurrency or self.settings.smtp_concurrency)
+        self.batch_size = max(1, batch_size or self.settings.smtp_batch_size)
+        self._pool: Optional[SMTPPool] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def send(self, jobs: list[ReminderJob]) -> list[int]:
+        """Send jobs in batches; returns the user ids whose email was accepted."""
+        if not jobs:
+            return []
+        if not _smtp_configured(self.settings):
+            logger.warning("SMTP not configured; skipping %s reminder emails", len(jobs))
+            return []
+        if self._pool is None:
+            self._pool = SMTPPool(self.settings, size=self.concurrency)
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        pool = self._pool
+        results = self._executor.map(lambda batch: _send_batch(pool, batch), _batches(jobs, self.batch_size))
+        return [user_id for sent in results for user_id in sent]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._pool.close()
+        self._pool = None
+        self._executor = None
+
+    def __enter__(self) -> "ReminderSender":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def send_reminder_jobs(
+    jobs: list[ReminderJob],
+    settings: Optional[Settings] = None,
+    concurrency: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """Send jobs in batches over pooled SMTP connections. Returns count sent."""
+    with ReminderSender(settings, concurrency, batch_size) as sender:
+        return len(sender.send(jobs))
+
+
 def send_email(to_email: str, subject: str, body: str) -> bool:
+    """Send a single email on its own connection (one-off messages, not the reminder run)."""
     settings = get_settings()
-    if not settings.smtp_host or not settings.smtp_user or not settings.smtp_password:
+    if not _smtp_configured(settings):
         logger.warning("SMTP not configured; skipping send")
         return False
-    from_addr = settings.smtp_from_email or settings.smtp_user
+    from_addr = _from_address(settings)
     msg = MIMEText(body, "plain", "utf-8")
     msg["Subject"] = subject
     msg["From"] = formataddr(("LifePulse Dashboard", from_addr))
     msg["To"] = to_email
+    server = None
     try:
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-            server.starttls()
-            server.login(settings.smtp_user, settings.smtp_password)
-            server.sendmail(from_addr, [to_email], msg.as_string())
-        logger.info("Sent reminder email to %s", to_email)
+        server = SMTPPool(settings, size=1)._connect()
+        server.send_message(msg)
+        logger.info("Sent email to %s", to_email)
         return True
     except Exception as e:
         logger.exception("Failed to send email to %s: %s", to_email, e)
         return False
+    finally:
+        if server is not None:
+            _quit(server)
 
 
 def run_reminder_emails() -> int:
-    """Load users with email reminders enabled, compute reminders, send emails. Returns count sent."""
-    import os
-    database_url = os.getenv("DATABASE_URL", "sqlite:///./data/app.db")
-    engine = create_engine(database_url)
-    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
-    db = Session()
-    sent = 0
-    try:
-        users = (
-            db.query(models.User)
-            .filter(
-                models.User.notification_email.isnot(None),
-                models.User.notification_email != "",
-            )
-            .all()
-        )
-        for user in users:
-            prefs = getattr(user, "notification_preferences", None) or {}
-            if not prefs.get("email_reminders"):
-                continue
-            email = (user.notification_email or "").strip()
-            if not email:
-                continue
-            reminders = get_reminders_for_user(db, user.id)
-            if not reminders:
-                continue
-            subject = "LifePulse: Reminder"
-            body = "Hi,\n\n" + "\n".join(r["message"] for r in reminders) + "\n\n— LifePulse Dashboard"
-            if send_email(email, subject, body):
-                sent += 1
-    finally:
-        db.close()
-    return sent
+    """Compute reminders for all opted-in users, send emails in batches. Returns count sent.
+
+    Single-process run through reminder_runner, so users already emailed today are skipped.
+    """
+    from .reminder_runner import run
+
+    return sum(result.sent for result in run())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,271 @@
+"""Sharded, resumable reminder email run.
+
+Users are partitioned across `--shards` shards by `users.id % shards` (hash) or by
+contiguous id ranges (range); `--workers` processes on this host work through the shards,
+and `--only` runs a single shard (to spread shards across hosts or cron entries). Each shard
+walks its users in id order, `--chunk-size` at a time, with the set-based eligibility from
+reminder_emails, sends the chunk through one reused ReminderSender and then records
+`reminder_send_state.last_sent_at` / `last_run_date` for the users that were sent.
+
+Users already recorded for the run date are skipped, so a crashed or repeated run resumes
+where it stopped; at most one chunk can be re-sent after a crash between send and commit.
+`--dry-run` computes the jobs without sending or recording anything.
+
+Usage (from repo root):
+  python -m backend.app.tasks.reminder_runner --shards 8 --workers 4
+  python -m backend.app.tasks.reminder_runner --shards 8 --only 3 --partition range
+  python -m backend.app.tasks.reminder_runner --dry-run
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import and_, delete, exists, func, insert, select
+
+from .. import models
+from ..database import SessionLocal
+from .reminder_emails import ReminderSender, collect_reminder_jobs
+
+logger = logging.getLogger(__name__)
+
+PARTITIONS = ("hash", "range")
+DEFAULT_CHUNK_SIZE = 2000
+
+
+@dataclass(frozen=True)
+class Shard:
+    index: int
+    count: int
+    partition: str = "hash"
+    # Range partition: users with low <= id < high
+    low: Optional[int] = None
+    high: Optional[int] = None
+
+
+@dataclass
+class ShardResult:
+    shard: int
+    scanned: int = 0
+    already_sent: int = 0
+    jobs: int = 0
+    sent: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.scanned / self.seconds if self.seconds else 0.0
+
+
+def plan_shards(db, count: int, partition: str = "hash") -> list[Shard]:
+    count = max(1, count)
+    if partition == "hash":
+        return [Shard(index=i, count=count) for i in range(count)]
+    low, high = db.execute(select(func.min(models.User.id), func.max(models.User.id))).one()
+    if low is None:
+        return [Shard(index=i, count=count, partition="range", low=0, high=0) for i in range(count)]
+    step = (high - low + count) // count
+    return [
+        Shard(
+            index=i,
+            count=count,
+            partition="range",
+            low=low + i * step,
+            high=high + 1 if i == count - 1 else low + (i + 1) * step,
+        )
+        for i in range(count)
+    ]
+
+
+def _in_shard(shard: Shard, column):
+    if shard.partition == "range":
+        return and_(column >= shard.low, column < shard.high)
+    if shard.count > 1:
+        return column % shard.count == shard.index
+    return column.isnot(None)
+
+
+def _already_sent(run_date: date, column):
+    return exists().where(
+        models.ReminderSendState.user_id == column,
+        models.ReminderSendState.last_run_date >= run_date,
+    )
+
+
+def _opted_in(column):
+    return column.in_(
+        select(models.User.id).where(
+            models.User.notification_email.isnot(None),
+            models.User.notification_email != "",
+        )
+    )
+
+
+def record_sent(db, user_ids: list[int], run_date: date) -> None:
+    if not user_ids:
+        return
+    now = datetime.now(timezone.utc)
+    state = models.ReminderSendState
+    db.execute(delete(state).where(state.user_id.in_(user_ids)))
+    db.execute(
+        insert(state),
+        [
+            {"user_id": user_id, "last_sent_at": now, "last_run_date": run_date}
+            for user_id in user_ids
+        ],
+    )
+    db.commit()
+
+
+def run_shard(
+    shard: Shard,
+    run_date: Optional[date] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False,
+) -> ShardResult:
+    run_date = run_date or date.today()
+    result = ShardResult(shard=shard.index)
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        result.already_sent = db.scalar(
+            select(func.count()).select_from(models.ReminderSendState).where(
+                models.ReminderSendState.last_run_date >= run_date,
+                _in_shard(shard, models.ReminderSendState.user_id),
+            )
+        )
+        pending = and_(
+            _in_shard(shard, models.User.id),
+            _opted_in(models.User.id),
+            ~_already_sent(run_date, models.User.id),
+        )
+        cursor = None
+        with ReminderSender() as sender:
+            while True:
+                ids_stmt = (
+                    select(models.User.id).where(pending).order_by(models.User.id).limit(chunk_size)
+                )
+                if cursor is not None:
+                    ids_stmt = ids_stmt.where(models.User.id > cursor)
+                ids = db.scalars(ids_stmt).all()
+                if not ids:
+                    break
+                low, high = ids[0], ids[-1]
+                cursor = high
+                result.scanned += len(ids)
+
+                def in_chunk(column, low=low, high=high):
+                    return and_(
+                        column >= low,
+                        column <= high,
+                        _in_shard(shard, column),
+                        ~_already_sent(run_date, column),
+                    )
+
+                jobs = collect_reminder_jobs(db, run_date, user_filter=in_chunk)
+                result.jobs += len(jobs)
+                if dry_run:
+                    continue
+                sent = sender.send(jobs)
+                record_sent(db, sent, run_date)
+                result.sent += len(sent)
+    finally:
+        db.close()
+    result.seconds = time.perf_counter() - started
+    logger.info(
+        "shard %s/%s: scanned=%s already_sent=%s jobs=%s sent=%s %.2fs (%.0f users/s)",
+        shard.index, shard.count, result.scanned, result.already_sent,
+        result.jobs, result.sent, result.seconds, result.rate,
+    )
+    return result
+
+
+def _run_shard_args(args: tuple) -> ShardResult:
+    return run_shard(*args)
+
+
+def run(
+    shards: int = 1,
+    workers: int = 1,
+    partition: str = "hash",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False,
+    run_date: Optional[date] = None,
+    only: Optional[int] = None,
+) -> list[ShardResult]:
+    """Run all shards (or shard `only`) with up to `workers` processes."""
+    run_date = run_date or date.today()
+    db = SessionLocal()
+    try:
+        planned = plan_shards(db, shards, partition)
+    finally:
+        db.close()
+    if only is not None:
+        planned = [planned[only]]
+    tasks = [(shard, run_date, chunk_size, dry_run) for shard in planned]
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        return [_run_shard_args(task) for task in tasks]
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return list(executor.map(_run_shard_args, tasks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded, resumable reminder email run.")
+    parser.add_argument("--shards", type=int, default=1, help="Number of user partitions")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes on this host (default: min(shards, CPUs))",
+    )
+    parser.add_argument(
+        "--partition", choices=PARTITIONS, default="hash", help="id %% shards, or id ranges"
+    )
+    parser.add_argument("--only", type=int, default=None, help="Run only this shard index")
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Users per eligibility query"
+    )
+    parser.add_argument(
+        "--date", type=date.fromisoformat, default=None, help="Run date (default: today)"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Compute jobs, send and record nothing"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    workers = args.workers or min(args.shards, os.cpu_count() or 1)
+    started = time.perf_counter()
+    results = run(
+        shards=args.shards,
+        workers=workers,
+        partition=args.partition,
+        chunk_size=args.chunk_size,
+        dry_run=args.dry_run,
+        run_date=args.date,
+        only=args.only,
+    )
+    elapsed = time.perf_counter() - started
+    scanned = sum(r.scanned for r in results)
+    logger.info(
+        "Reminder run: shards=%s workers=%s scanned=%s already_sent=%s jobs=%s %s=%s "
+        "in %.2fs (%.0f users/s)",
+        len(results), workers, scanned,
+        sum(r.already_sent for r in results), sum(r.jobs for r in results),
+        "would_send" if args.dry_run else "sent",
+        sum(r.jobs if args.dry_run else r.sent for r in results),
+        elapsed, scanned / elapsed if elapsed else 0,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Weekly digest job: precompute weekly reports for all active users into `weekly_reports`.
+
+Run once a week (e.g. Monday morning, from cron). Reports cover the 7 days ending `--date`
+(default: yesterday, the last complete day); active users are those with any entry in that
+period. Their ids are split into chunks of `--chunk-size` handled by `--workers` processes.
+For each chunk the summaries are built from a 7-day frame (bounded in SQL), all of the chunk's
+LLM insights are requested together through llm_insights_batch (LLM_BATCH_CONCURRENCY requests
+in flight, identical summaries sent once), and the rows are written in one transaction.
+Rerunning a period replaces its rows. Without LLM the rule-based insight is kept.
+
+GET /analytics/weekly-report serves the latest stored report and only computes one on demand
+when the user has none for the past week.
+
+Usage (from repo root):
+  DATABASE_URL=... LLM_API_KEY=... python -m backend.app.tasks.weekly_digest --workers 4
+  python -m backend.app.tasks.weekly_digest --date 2026-10-18 --no-llm
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, insert, select, union
+
+from .. import models
+from ..analytics import DAILY_SOURCE_MODELS, weekly_report_for_user
+from ..database import SessionLocal
+from ..llm.client import close_llm_clients, llm_configured, llm_insights_batch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def digest_context(report: dict) -> str:
+    """Compact text summary of a weekly report for the LLM."""
+    lines = [f"Период: {report['period_start']} — {report['period_end']}"]
+    for sphere, metrics in (report.get("summary") or {}).items():
+        values = ", ".join(f"{key}={value}" for key, value in metrics.items() if value is not None)
+        if values:
+            lines.append(f"{sphere}: {values}")
+    if report.get("insight"):
+        lines.append(f"Наблюдение: {report['insight']}")
+    return "\n".join(lines)
+
+
+def active_user_ids(db, period_start: date, period_end: date) -> list[int]:
+    """Users with at least one entry in the period, in id order."""
+    stmt = union(
+        *(
+            select(model.user_id).where(model.local_date >= period_start, model.local_date <= period_end)
+            for model in DAILY_SOURCE_MODELS
+        )
+    )
+    return sorted(db.scalars(stmt).all())
+
+
+async def add_llm_insights(reports: dict[int, dict], concurrency: Optional[int] = None) -> int:
+    """Replace each report's insight with an LLM insight where one was generated. Returns count."""
+    contexts = {
+        user_id: digest_context(report) for user_id, report in reports.items() if report["summary"]
+    }
+    try:
+        results = await llm_insights_batch(contexts, concurrency)
+    finally:
+        await close_llm_clients()  # pooled connections belong to this event loop
+    generated = 0
+    for user_id, (text, _model) in results.items():
+        if text:
+            reports[user_id]["insight"] = text
+            generated += 1
+    return generated
+
+
+def store_reports(db, reports: dict[int, dict]) -> None:
+    """Replace the users' reports for these periods in one transaction."""
+    if not reports:
+        return
+    period_end = next(iter(reports.values()))["period_end"]
+    db.execute(
+        delete(models.WeeklyReport).where(
+            models.WeeklyReport.user_id.in_(list(reports)),
+            models.WeeklyReport.period_end == period_end,
+        )
+    )
+    db.execute(
+        insert(models.WeeklyReport),
+        [
+            {
+                "user_id": user_id,
+                "period_start": report["period_start"],
+                "period_end": report["period_end"],
+                "summary": report["summary"],
+                "insight": report["insight"],
+                "generated_at": report["generated_at"],
+            }
+            for user_id, report in reports.items()
+        ],
+    )
+    db.commit()
+
+
+def run_chunk(
+    user_ids: list[int], period_end: date, use_llm: bool, concurrency: Optional[int] = None
+) -> tuple[int, int]:
+    """Build, enrich and store one chunk of reports. Returns (reports, llm_insights)."""
+    db = SessionLocal()
+    try:
+        reports = {user_id: weekly_report_for_user(db, user_id, period_end) for user_id in user_ids}
+        generated = asyncio.run(add_llm_insights(reports, concurrency)) if use_llm else 0
+        store_reports(db, reports)
+    finally:
+        db.close()
+    return len(reports), generated
+
+
+def _run_chunk_args(args: tuple) -> tuple[int, int]:
+    return run_chunk(*args)
+
+
+def run_weekly_digest(
+    period_end: Optional[date] = None,
+    use_llm: bool = True,
+    concurrency: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+) -> dict[str, int]:
+    """Precompute weekly reports for all active users. Returns {"users": n, "llm_insights": n}."""
+    period_end = period_end or date.today() - timedelta(days=1)
+    use_llm = use_llm and llm_configured()
+    db = SessionLocal()
+    try:
+        user_ids = active_user_ids(db, period_end - timedelta(days=6), period_end)
+    finally:
+        db.close()
+    chunk_size = max(1, chunk_size)
+    tasks = [
+        (user_ids[start:start + chunk_size], period_end, use_llm, concurrency)
+        for start in range(0, len(user_ids), chunk_size)
+    ]
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        results = [_run_chunk_args(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = list(executor.map(_run_chunk_args, tasks))
+    return {
+        "users": sum(count for count, _ in results),
+        "llm_insights": sum(generated for _, generated in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute weekly reports for active users.")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="Period end (default: yesterday)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Users per chunk")
+    parser.add_argument("--concurrency", type=int, default=None, help="LLM requests in flight per process")
+    parser.add_argument("--no-llm", action="store_true", help="Keep rule-based insights")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    stats = run_weekly_digest(
+        args.date,
+        use_llm=not args.no_llm,
+        concurrency=args.concurrency,
+        chunk_size=args.chunk_size,
+        workers=args.workers or os.cpu_count() or 1,
+    )
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Weekly digest: users=%s llm_insights=%s in %.2fs (%.0f users/s)",
+        stats["users"], stats["llm_insights"], elapsed, stats["users"] / elapsed if elapsed else 0,
+    )
+
+
+if __name__ == "__main__":
+    main()
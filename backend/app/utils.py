@@ -1,18 +1,14 @@
 from datetime import date, datetime, timezone
 from typing import Optional, Tuple
-from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .core.timezones import get_zone
 
 
 def normalize_datetime(
     recorded_at: Optional[datetime],
     timezone_name: Optional[str],
 ) -> Tuple[datetime, date, str]:
-    tz = None
-    if timezone_name:
-        try:
-            tz = ZoneInfo(timezone_name)
-        except ZoneInfoNotFoundError as exc:
-            raise ValueError(f"Invalid timezone '{timezone_name}'") from exc
+    tz = get_zone(timezone_name) if timezone_name else None
 
     if recorded_at is None:
         recorded_at = datetime.now(tz or timezone.utc)
@@ -0,0 +1,185 @@
+"""Minimal local OpenAI-compatible server for tests and benchmarks.
+
+Serves POST /v1/chat/completions (plain and `stream: true` SSE). Replies are `--tokens` words
+generated `--token-delay-ms` apart (after `--latency-ms` of "time to first token"), so
+streaming, cancellation and concurrency limits can be exercised without a provider:
+
+  python bench/fake_openai.py --port 8089 --tokens 200 --token-delay-ms 20
+  LLM_BASE_URL=http://127.0.0.1:8089/v1 LLM_API_KEY=test uvicorn backend.app.main:app
+"""
+
+import argparse
+import http.server
+import json
+import threading
+import time
+
+
+class FakeStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self.cancelled = 0
+
+    def connect(self) -> None:
+        with self.lock:
+            self.connections += 1
+
+    def start(self) -> None:
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finish(self, cancelled: bool = False) -> None:
+        with self.lock:
+            self.in_flight -= 1
+            if cancelled:
+                self.cancelled += 1
+            else:
+                self.completed += 1
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.stats.connect()
+
+    def _words(self, body: dict) -> list[str]:
+        prompt = body["messages"][-1]["content"] if body.get("messages") else ""
+        tokens = min(self.server.tokens, body.get("max_tokens") or self.server.tokens)
+        return [f"w{i}({len(prompt)})" for i in range(tokens)]
+
+    def _json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._json(404, {"error": {"message": "not found"}})
+            return
+        server = self.server
+        server.stats.start()
+        cancelled = False
+        try:
+            time.sleep(server.latency)
+            words = self._words(body)
+            model = body.get("model") or "fake"
+            if body.get("stream"):
+                cancelled = not self._stream(model, words)
+            else:
+                time.sleep(server.token_delay * len(words))
+                self._json(
+                    200,
+                    {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": " ".join(words)},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                    },
+                )
+        except (BrokenPipeError, ConnectionResetError):
+            cancelled = True
+        finally:
+            server.stats.finish(cancelled)
+
+    def _stream(self, model: str, words: list[str]) -> bool:
+        """Write SSE chunks; returns False if the client went away mid-stream."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(delta: dict, finish_reason=None) -> None:
+            payload = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self._write(f"data: {json.dumps(payload)}\n\n".encode())
+
+        try:
+            chunk({"role": "assistant", "content": ""})
+            for i, word in enumerate(words):
+                time.sleep(self.server.token_delay)
+                chunk({"content": word if i == 0 else " " + word})
+            chunk({}, "stop")
+            self._write(b"data: [DONE]\n\n")
+            self._write(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            return False
+        return True
+
+    def _write(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeOpenAI(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self, port: int = 0, tokens: int = 50, token_delay_ms: float = 0.0, latency_ms: float = 0.0
+    ):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.tokens = tokens
+        self.token_delay = token_delay_ms / 1000
+        self.latency = latency_ms / 1000
+        self.stats = FakeStats()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start(self) -> "FakeOpenAI":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions server.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay-ms", type=float, default=20.0)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    args = parser.parse_args()
+    server = FakeOpenAI(args.port, args.tokens, args.token_delay_ms, args.latency_ms)
+    print(f"Fake OpenAI API on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    s = server.stats
+    print(
+        f"connections={s.connections} requests={s.requests} completed={s.completed} "
+        f"cancelled={s.cancelled} max_in_flight={s.max_in_flight}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark LLM insight generation against bench/fake_openai.py.
+
+Sends `--requests` insight requests with distinct contexts (response cache off) and reports
+throughput, latency and what the provider saw (connections, peak concurrent requests):
+
+  per-call  - blocking call with a new OpenAI client per request, on `--threads` threads
+              (the previous sync route behaviour under load)
+  async     - llm_insight_async for every request at once, one shared client, per-user and
+              global limits (LLM_MAX_CONCURRENCY)
+  batch     - llm_insights_batch over all contexts (weekly digest mode, LLM_BATCH_CONCURRENCY)
+
+  python bench/llm_client.py --requests 300 --latency-ms 200 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_openai import FakeOpenAI  # noqa: E402
+
+
+def _percentiles(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"p50={statistics.median(ordered) * 1000:6.0f}ms p95={p95 * 1000:6.0f}ms"
+
+
+def _per_call(contexts: list[str], threads: int) -> list[float]:
+    from openai import OpenAI
+
+    from backend.app.core.config import get_settings
+    from backend.app.llm.client import _insight_messages
+
+    settings = get_settings()
+
+    def one(context: str) -> float:
+        started = time.perf_counter()
+        client = OpenAI(base_url=settings.llm_base_url, api_key="bench")
+        client.chat.completions.create(
+            model=settings.llm_model, messages=_insight_messages(context), max_tokens=256
+        )
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(one, contexts))
+
+
+async def _async(contexts: list[str], users: int) -> list[float]:
+    from backend.app.llm.client import close_llm_clients, llm_insight_async
+    from backend.app.llm.limits import LlmUserBusy
+
+    rejected = 0
+
+    async def one(i: int, context: str) -> float | None:
+        nonlocal rejected
+        started = time.perf_counter()
+        try:
+            text, _ = await llm_insight_async(context, user_id=i % users if users else i)
+        except LlmUserBusy:
+            rejected += 1
+            return None
+        assert text
+        return time.perf_counter() - started
+
+    try:
+        results = await asyncio.gather(*(one(i, context) for i, context in enumerate(contexts)))
+    finally:
+        await close_llm_clients()
+    if rejected:
+        print(f"  async: {rejected} requests rejected by the per-user limit (429)")
+    return [latency for latency in results if latency is not None]
+
+
+async def _batch(contexts: list[str]) -> list[float]:
+    from backend.app.llm.client import close_llm_clients, llm_insights_batch
+
+    try:
+        results = await llm_insights_batch(dict(enumerate(contexts)))
+    finally:
+        await close_llm_clients()
+    assert all(text for text, _ in results.values())
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM client benchmark.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Provider time to first token")
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-delay-ms", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=16, help="LLM_MAX_CONCURRENCY / LLM_BATCH_CONCURRENCY")
+    parser.add_argument("--threads", type=int, default=40, help="Threads for per-call (threadpool size)")
+    parser.add_argument("--users", type=int, default=0, help="Distinct users in async mode (0: one per request)")
+    args = parser.parse_args()
+
+    server = FakeOpenAI(0, args.tokens, args.token_delay_ms, args.latency_ms).start()
+    os.environ.update(
+        {
+            "LLM_BASE_URL": server.base_url,
+            "LLM_API_KEY": "bench",
+            "LLM_CACHE_TTL_SECONDS": "0",
+            "LLM_MAX_CONCURRENCY": str(args.concurrency),
+            "LLM_BATCH_CONCURRENCY": str(args.concurrency),
+            "LLM_QUEUE_TIMEOUT_SECONDS": "600",
+        }
+    )
+    contexts = [f"sleep_avg={6 + i % 30 / 10} energy_avg={i % 10} user={i}" for i in range(args.requests)]
+    modes = [
+        ("per-call", lambda: _per_call(contexts, args.threads)),
+        ("async", lambda: asyncio.run(_async(contexts, args.users))),
+        ("batch", lambda: asyncio.run(_batch(contexts))),
+    ]
+    try:
+        for label, fn in modes:
+            stats = server.stats
+            before = stats.connections
+            stats.max_in_flight = 0
+            started = time.perf_counter()
+            latencies = fn()
+            elapsed = time.perf_counter() - started
+            print(
+                f"{label:<9} {args.requests} in {elapsed:6.2f}s ({args.requests / elapsed:7.1f} req/s) "
+                f"{_percentiles(latencies) if latencies else ' ' * 27} "
+                f"connections={stats.connections - before:4d} max_in_flight={stats.max_in_flight}"
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
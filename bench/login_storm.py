@@ -0,0 +1,145 @@
+"""Load test: API latency for ordinary requests during a login storm.
+
+Starts the backend with uvicorn on a temporary SQLite database, registers users, then
+measures GET /auth/me latency (the "probe") on its own and while `--concurrency`
+clients hammer POST /auth/login. Run once with the hashing pool disabled and once
+enabled to compare isolation:
+
+  python bench/login_storm.py --hash-workers 0
+  python bench/login_storm.py --hash-workers 2 --max-pending 8
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _start_server(port: int, db_path: str, args) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(
+        {
+            "DATABASE_URL": f"sqlite:///{db_path}",
+            "AUTO_CREATE_TABLES": "true",
+            "SECRET_KEY": "bench",
+            "RATE_LIMIT_DEFAULT": "1000000/minute",
+            "PASSWORD_HASH_WORKERS": str(args.hash_workers),
+            "PASSWORD_HASH_MAX_PENDING": str(args.max_pending),
+            "BCRYPT_ROUNDS": str(args.rounds),
+        }
+    )
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "backend.app.main:app",
+            "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=REPO_ROOT,
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=0.5)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("server did not start")
+
+
+def _percentiles(samples: list[float]) -> str:
+    if not samples:
+        return "no samples"
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"n={len(ordered):5d} p50={statistics.median(ordered) * 1000:7.1f}ms "
+        f"p95={p95 * 1000:7.1f}ms max={ordered[-1] * 1000:7.1f}ms"
+    )
+
+
+def _probe(base: str, headers: dict, seconds: float) -> list[float]:
+    samples = []
+    deadline = time.perf_counter() + seconds
+    with httpx.Client(base_url=base, timeout=30) as client:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                client.get("/auth/me", headers=headers)
+            except httpx.TimeoutException:
+                pass  # counted with the full wait as its latency
+            samples.append(time.perf_counter() - started)
+            time.sleep(0.01)
+    return samples
+
+
+def _storm(base: str, users: list[dict], stop: threading.Event, codes: dict, lock: threading.Lock):
+    with httpx.Client(base_url=base, timeout=60) as client:
+        i = 0
+        while not stop.is_set():
+            try:
+                status = client.post("/auth/login", json=users[i % len(users)]).status_code
+            except httpx.TimeoutException:
+                status = "timeout"
+            with lock:
+                codes[status] = codes.get(status, 0) + 1
+            i += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login storm load test.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent login clients")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--hash-workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = _start_server(args.port, os.path.join(tmp, "bench.db"), args)
+        base = f"http://127.0.0.1:{args.port}"
+        try:
+            users = [
+                {"email": f"storm{i}@example.com", "password": "supersecret"}
+                for i in range(args.users)
+            ]
+            with httpx.Client(base_url=base, timeout=60) as client:
+                for payload in users:
+                    client.post("/auth/register", json=payload)
+                token = client.post("/auth/login", json=users[0]).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            print(f"hash workers={args.hash_workers} max pending={args.max_pending} rounds={args.rounds}")
+            print("idle  /auth/me  ", _percentiles(_probe(base, headers, args.seconds / 2)))
+
+            stop = threading.Event()
+            codes: dict[int, int] = {}
+            lock = threading.Lock()
+            threads = [
+                threading.Thread(target=_storm, args=(base, users, stop, codes, lock), daemon=True)
+                for _ in range(args.concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            time.sleep(1.0)
+            print("storm /auth/me  ", _percentiles(_probe(base, headers, args.seconds)))
+            stop.set()
+            for thread in threads:
+                thread.join(timeout=60)
+            print("login status codes:", codes)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
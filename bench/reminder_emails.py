@@ -0,0 +1,174 @@
+"""Benchmark the reminder email run against a local SMTP sink.
+
+Seeds a temporary SQLite database with `--users` opted-in users (a mix of active, stale and
+inactive), starts bench/smtp_sink.py in-process, then times:
+
+  per-user   - one eligibility lookup and one SMTP connection per user (previous behaviour)
+  batched    - collect_reminder_jobs + send_reminder_jobs (set-based eligibility, pooled
+               connections, SMTP_CONCURRENCY / SMTP_BATCH_SIZE)
+  sharded    - reminder_runner.run with --shards / --workers processes, recording send
+               state; a second run must send nothing (idempotency check)
+
+  python bench/reminder_emails.py --users 2000 --connect-delay-ms 100 --concurrency 4
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from smtp_sink import SMTPSink  # noqa: E402
+
+
+def _configure(args, db_path: str) -> None:
+    os.environ.update(
+        {
+            "DATABASE_URL": f"sqlite:///{db_path}",
+            "SMTP_HOST": "127.0.0.1",
+            "SMTP_PORT": str(args.port),
+            "SMTP_FROM_EMAIL": "bench@example.com",
+            "SMTP_STARTTLS": "false",
+            "SMTP_CONCURRENCY": str(args.concurrency),
+            "SMTP_BATCH_SIZE": str(args.batch_size),
+        }
+    )
+
+
+def _seed(users: int) -> None:
+    from backend.app import models
+    from backend.app.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now(timezone.utc)
+    today = date.today()
+    user_rows, health_rows, finance_rows = [], [], []
+    for i in range(1, users + 1):
+        user_rows.append(
+            {
+                "id": i,
+                "email": f"user{i}@example.com",
+                "hashed_password": "x",
+                "created_at": now,
+                "role": "user",
+                "notification_email": f"user{i}@example.com",
+                "notification_preferences": {"email_reminders": i % 10 != 0},
+            }
+        )
+        # Every third user logged health yesterday; the rest last logged 1-14 days ago.
+        last = today - timedelta(days=1 if i % 3 == 0 else i % 14 + 1)
+        for offset in range(5):
+            day = last - timedelta(days=offset)
+            common = {"user_id": i, "recorded_at": now, "local_date": day, "timezone": "UTC"}
+            health_rows.append(
+                {**common, "entry_type": "day", "sleep_hours": 7.0, "energy_level": 7, "wellbeing": 7}
+            )
+            finance_rows.append(
+                {
+                    **common,
+                    "income": 10.0,
+                    "expense_food": 1.0,
+                    "expense_transport": 0.0,
+                    "expense_health": 0.0,
+                    "expense_other": 0.0,
+                }
+            )
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), user_rows)
+        conn.execute(models.HealthEntry.__table__.insert(), health_rows)
+        conn.execute(models.FinanceEntry.__table__.insert(), finance_rows)
+
+
+def _per_user() -> int:
+    from backend.app import models
+    from backend.app.database import SessionLocal
+    from backend.app.tasks import reminder_emails
+
+    db = SessionLocal()
+    sent = 0
+    try:
+        users = db.query(models.User).filter(models.User.notification_email.isnot(None)).all()
+        for user in users:
+            if not (user.notification_preferences or {}).get("email_reminders"):
+                continue
+            reminders = reminder_emails.get_reminders_for_user(db, user.id)
+            if reminders:
+                body = "\n".join(r["message"] for r in reminders)
+                sent += reminder_emails.send_email(user.notification_email, reminder_emails.SUBJECT, body)
+    finally:
+        db.close()
+    return sent
+
+
+def _batched() -> int:
+    from backend.app.database import SessionLocal
+    from backend.app.tasks import reminder_emails
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        jobs = reminder_emails.collect_reminder_jobs(db)
+        print(f"  eligibility: {len(jobs)} jobs in {time.perf_counter() - started:.3f}s")
+    finally:
+        db.close()
+    return reminder_emails.send_reminder_jobs(jobs)
+
+
+def _sharded(args) -> int:
+    from backend.app.models import ReminderSendState
+    from backend.app.database import engine
+    from backend.app.tasks import reminder_runner
+
+    with engine.begin() as conn:
+        conn.execute(ReminderSendState.__table__.delete())
+    results = reminder_runner.run(shards=args.shards, workers=args.workers, chunk_size=args.chunk_size)
+    rerun = reminder_runner.run(shards=args.shards, workers=args.workers, chunk_size=args.chunk_size)
+    print(f"  rerun sent={sum(r.sent for r in rerun)} already_sent={sum(r.already_sent for r in rerun)}")
+    return sum(r.sent for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reminder email pipeline benchmark.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--connect-delay-ms", type=float, default=50.0, help="Simulated TLS + AUTH cost")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2, help="Processes for the sharded run")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--skip-per-user", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure(args, os.path.join(tmp, "bench.db"))
+        _seed(args.users)
+        logging.getLogger("backend.app.tasks.reminder_emails").setLevel(logging.WARNING)
+        sink = SMTPSink(args.port, args.connect_delay_ms).start()
+        try:
+            modes = [("batched", _batched), ("sharded", lambda: _sharded(args))]
+            if not args.skip_per_user:
+                modes.insert(0, ("per-user", _per_user))
+            for label, fn in modes:
+                before = (sink.stats.connections, sink.stats.messages)
+                started = time.perf_counter()
+                sent = fn()
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{label:<9} sent={sent:6d} in {elapsed:7.2f}s ({sent / elapsed:8.1f} emails/s), "
+                    f"smtp connections={sink.stats.connections - before[0]}, "
+                    f"delivered={sink.stats.messages - before[1]}"
+                )
+        finally:
+            sink.shutdown()
+            sink.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Minimal local SMTP sink for benchmarks: accepts and discards mail, counts it.
+
+`--connect-delay-ms` delays the greeting of every new connection to stand in for the
+STARTTLS handshake + AUTH round trips of a real provider (the sink itself speaks plain SMTP,
+so run the sender with SMTP_STARTTLS=false).
+
+  python bench/smtp_sink.py --port 2525 --connect-delay-ms 150
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+
+
+class SinkStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+
+    def add(self, connections: int = 0, messages: int = 0) -> None:
+        with self.lock:
+            self.connections += connections
+            self.messages += messages
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        server.stats.add(connections=1)
+        if server.connect_delay:
+            time.sleep(server.connect_delay)
+        self._reply("220 sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self._reply("250 sink")
+            elif command.startswith("DATA"):
+                self._reply("354 end with <CRLF>.<CRLF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                server.stats.add(messages=1)
+                self._reply("250 queued")
+            elif command.startswith("QUIT"):
+                self._reply("221 bye")
+                return
+            else:  # MAIL, RCPT, RSET, NOOP
+                self._reply("250 ok")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int, connect_delay_ms: float = 0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.connect_delay = connect_delay_ms / 1000
+        self.stats = SinkStats()
+
+    def start(self) -> "SMTPSink":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SMTP sink.")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--connect-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    sink = SMTPSink(args.port, args.connect_delay_ms)
+    print(f"SMTP sink on 127.0.0.1:{args.port}")
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"connections={sink.stats.connections} messages={sink.stats.messages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Microbenchmark: per-call trend fitting vs the batched closed-form engine.
+
+Builds a synthetic daily frame (`--days` rows, the dashboard's trend metrics with gaps) and
+times weekday_and_trends_payload-style trend fitting both ways:
+
+- per-call: one sort/tail + LinearRegression (np.polyfit without scikit-learn) per metric
+  and window, as linear_trend did before;
+- batched: analytics.linear_trends, all metrics and windows in one NumPy pass.
+
+Both results are compared before timing:
+
+  python bench/trends.py --days 365 --repeat 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app.analytics import TREND_WINDOWS, linear_trends  # noqa: E402
+
+try:
+    from sklearn.linear_model import LinearRegression
+except ImportError:
+    LinearRegression = None
+
+METRICS = [
+    "sleep_hours",
+    "deep_work_hours",
+    "weight_kg",
+    "total_expense",
+    "income",
+    "total_deep_work_hours",
+]
+
+
+def per_call_trend(df: pd.DataFrame, metric: str, days: int, min_points: int = 5) -> dict | None:
+    series = df[["date", metric]].dropna().sort_values("date").tail(days)
+    if len(series) < min_points:
+        return None
+    series = series.reset_index(drop=True)
+    x = np.arange(len(series))
+    y = series[metric].values.astype(float)
+    if np.all(y == y[0]):
+        return {"metric": metric, "slope": 0.0, "direction": "neutral", "days": days}
+    if LinearRegression is not None:
+        slope = float(LinearRegression().fit(x.reshape(-1, 1), y).coef_[0])
+    else:
+        slope = float(np.polyfit(x, y, 1)[0])
+    direction = "neutral" if abs(slope) < 1e-6 else ("up" if slope > 0 else "down")
+    return {"metric": metric, "slope": round(slope, 4), "direction": direction, "days": days}
+
+
+def per_call(df: pd.DataFrame) -> dict[int, list[dict]]:
+    trends: dict[int, list[dict]] = {days: [] for days in TREND_WINDOWS}
+    for metric in METRICS:
+        for days in TREND_WINDOWS:
+            trend = per_call_trend(df, metric, days)
+            if trend:
+                trends[days].append(trend)
+    return trends
+
+
+def batched(df: pd.DataFrame) -> dict[int, list[dict]]:
+    return linear_trends(df, METRICS, TREND_WINDOWS)
+
+
+def synthetic_frame(days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    start = date(2026, 1, 1)
+    df = pd.DataFrame({"date": [start + timedelta(days=i) for i in range(days)]})
+    t = np.arange(days, dtype=float)
+    df["sleep_hours"] = 7 + 0.01 * t + rng.normal(0, 0.8, days)
+    df["deep_work_hours"] = 3 - 0.005 * t + rng.normal(0, 1, days)
+    df["weight_kg"] = 80 - 0.02 * t + rng.normal(0, 0.3, days)
+    df["total_expense"] = rng.gamma(2, 20, days)
+    df["income"] = np.where(rng.random(days) < 0.1, 3000.0, 0.0)
+    df["total_deep_work_hours"] = df["deep_work_hours"] + rng.normal(0.5, 0.2, days)
+    for column in ("sleep_hours", "deep_work_hours", "weight_kg", "total_deep_work_hours"):
+        df.loc[rng.random(days) < 0.3, column] = np.nan  # days without entries
+    return df
+
+
+def _time(fn, df: pd.DataFrame, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(df)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trend fitting microbenchmark.")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    df = synthetic_frame(args.days)
+    expected, actual = per_call(df), batched(df)
+    for days in TREND_WINDOWS:
+        assert [t["metric"] for t in expected[days]] == [t["metric"] for t in actual[days]]
+        for old, new in zip(expected[days], actual[days], strict=True):
+            assert old["direction"] == new["direction"], (old, new)
+            assert abs(old["slope"] - new["slope"]) <= 1e-4, (old, new)
+
+    fit = "LinearRegression" if LinearRegression is not None else "np.polyfit"
+    slow = _time(per_call, df, args.repeat)
+    fast = _time(batched, df, args.repeat)
+    calls = len(METRICS) * len(TREND_WINDOWS)
+    grid = f"{len(METRICS)} metrics x {len(TREND_WINDOWS)} windows"
+    print(f"{args.days} days, {grid} (results match)")
+    print(f"{f'per-call ({calls} fits, {fit}):':40} {slow * 1000:8.3f} ms")
+    print(f"{'batched (one pass):':40} {fast * 1000:8.3f} ms  ({slow / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,11 @@
 import os
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-DWH_DATABASE_URL = os.getenv("DWH_DATABASE_URL", "sqlite:///./data/dwh.db")
+from backend.app.database import create_db_engine
 
-connect_args = {}
-if DWH_DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+DWH_DATABASE_URL = os.getenv("DWH_DATABASE_URL", "sqlite:///./data/dwh.db")
 
-engine = create_engine(DWH_DATABASE_URL, connect_args=connect_args)
+engine = create_db_engine(DWH_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
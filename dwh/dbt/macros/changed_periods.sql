@@ -0,0 +1,43 @@
+{#
+  (user_id, period) pairs whose daily rows were (re)loaded since the last run of the
+  current model. On a full refresh every period is returned. The rollup then
+  recomputes whole periods, so late-arriving days inside an old week/month are
+  picked up too; `unique_key` + delete+insert replaces the stale rows.
+#}
+{% macro changed_periods(source_relation, grain) %}
+    select distinct
+        user_id,
+        date_trunc('{{ grain }}', local_date)::date as period
+    from {{ source_relation }}
+    {% if is_incremental() %}
+    where _loaded_at > (select coalesce(max(_loaded_at), '1970-01-01'::timestamptz) from {{ this }})
+    {% endif %}
+{% endmacro %}
+
+
+{% macro rollup(source_relation, grain, period_column, aggregates) %}
+with changed as (
+    {{ changed_periods(source_relation, grain) }}
+),
+
+daily as (
+    select
+        *,
+        date_trunc('{{ grain }}', local_date)::date as period
+    from {{ source_relation }}
+)
+
+select
+    daily.user_id,
+    daily.period as {{ period_column }},
+    {%- for expr, name in aggregates %}
+    {{ expr }} as {{ name }},
+    {%- endfor %}
+    count(*) as days_logged,
+    max(daily._loaded_at) as _loaded_at
+from daily
+join changed
+    on daily.user_id = changed.user_id
+    and daily.period = changed.period
+group by daily.user_id, daily.period
+{% endmacro %}
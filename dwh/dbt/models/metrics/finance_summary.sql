@@ -1,11 +1,12 @@
-with finance as (
-    select * from read_parquet('{{ var("parquet_path") }}/finance/*.parquet')
-)
+{{
+    config(
+        materialized='incremental',
+        unique_key=['user_id', 'month'],
+        incremental_strategy='delete+insert',
+    )
+}}
 
-select
-    user_id,
-    date_trunc('month', recorded_at) as month,
-    sum(income) as total_income,
-    sum(expense_food + expense_transport + expense_health + expense_other) as total_expense
-from finance
-group by user_id, month
+{{ rollup(source('dwh', 'daily_finance'), 'month', 'month', [
+    ('sum(income)', 'total_income'),
+    ('sum(expense_food + expense_transport + expense_health + expense_other)', 'total_expense'),
+]) }}
@@ -0,0 +1,12 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key=['user_id', 'week'],
+        incremental_strategy='delete+insert',
+    )
+}}
+
+{{ rollup(source('dwh', 'daily_finance'), 'week', 'week', [
+    ('sum(income)', 'total_income'),
+    ('sum(expense_food + expense_transport + expense_health + expense_other)', 'total_expense'),
+]) }}
@@ -1,12 +1,15 @@
-with health as (
-    select * from read_parquet('{{ var("parquet_path") }}/health/*.parquet')
-)
+{{
+    config(
+        materialized='incremental',
+        unique_key=['user_id', 'month'],
+        incremental_strategy='delete+insert',
+    )
+}}
 
-select
-    user_id,
-    date_trunc('month', recorded_at) as month,
-    avg(sleep_hours) as avg_sleep_hours,
-    avg(energy_level) as avg_energy_level,
-    avg(wellbeing) as avg_wellbeing
-from health
-group by user_id, month
+{{ rollup(source('dwh', 'daily_health'), 'month', 'month', [
+    ('avg(sleep_hours)', 'avg_sleep_hours'),
+    ('avg(energy_level)', 'avg_energy_level'),
+    ('avg(wellbeing)', 'avg_wellbeing'),
+    ('sum(steps)', 'total_steps'),
+    ('sum(workout_minutes)', 'total_workout_minutes'),
+]) }}
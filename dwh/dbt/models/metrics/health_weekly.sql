@@ -0,0 +1,15 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key=['user_id', 'week'],
+        incremental_strategy='delete+insert',
+    )
+}}
+
+{{ rollup(source('dwh', 'daily_health'), 'week', 'week', [
+    ('avg(sleep_hours)', 'avg_sleep_hours'),
+    ('avg(energy_level)', 'avg_energy_level'),
+    ('avg(wellbeing)', 'avg_wellbeing'),
+    ('sum(steps)', 'total_steps'),
+    ('sum(workout_minutes)', 'total_workout_minutes'),
+]) }}
@@ -0,0 +1,11 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key=['user_id', 'month'],
+        incremental_strategy='delete+insert',
+    )
+}}
+
+{{ rollup(source('dwh', 'daily_learning'), 'month', 'month', [
+    ('sum(study_hours)', 'total_study_hours'),
+]) }}
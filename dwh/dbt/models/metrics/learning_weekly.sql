@@ -0,0 +1,11 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key=['user_id', 'week'],
+        incremental_strategy='delete+insert',
+    )
+}}
+
+{{ rollup(source('dwh', 'daily_learning'), 'week', 'week', [
+    ('sum(study_hours)', 'total_study_hours'),
+]) }}
@@ -0,0 +1,13 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key=['user_id', 'week'],
+        incremental_strategy='delete+insert',
+    )
+}}
+
+{{ rollup(source('dwh', 'daily_productivity'), 'week', 'week', [
+    ('sum(deep_work_hours)', 'total_deep_work_hours'),
+    ('sum(tasks_completed)', 'total_tasks_completed'),
+    ('avg(focus_level)', 'avg_focus_level'),
+]) }}
@@ -0,0 +1,147 @@
+"""Benchmark the incremental DWH pipeline (Parquet -> DuckDB -> dbt) on synthetic data.
+
+Generates `--users` x `--days` of entries for all four spheres, runs a full
+`build` (+ `dbt run --full-refresh`), then appends one new day as a partition file
+and times `refresh` (+ incremental `dbt run`). dbt steps are skipped when the
+`dbt` executable is not on PATH.
+
+Usage (from repo root):
+  python dwh/duckdb/bench_pipeline.py --users 10000 --days 365
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import build_duckdb  # noqa: E402
+import duckdb  # noqa: E402
+
+DBT_PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dbt")
+
+
+def _frame(rng, sphere: str, user_ids: np.ndarray, days: np.ndarray, first_id: int) -> pd.DataFrame:
+    n = len(user_ids)
+    df = pd.DataFrame(
+        {
+            "id": np.arange(first_id, first_id + n),
+            "user_id": user_ids,
+            "recorded_at": pd.to_datetime(days).tz_localize("UTC"),
+            "local_date": days,
+            "timezone": "UTC",
+        }
+    )
+    if sphere == "health":
+        df["sleep_hours"] = rng.normal(7, 1, n).clip(0, 24)
+        df["energy_level"] = rng.integers(1, 11, n)
+        df["wellbeing"] = rng.integers(1, 11, n)
+        df["weight_kg"] = rng.normal(75, 10, n)
+        df["heart_rate_avg"] = rng.integers(50, 90, n)
+        df["steps"] = rng.integers(0, 20000, n)
+        df["workout_minutes"] = rng.integers(0, 90, n)
+    elif sphere == "finance":
+        df["income"] = rng.exponential(100, n)
+        for col in ("expense_food", "expense_transport", "expense_health", "expense_other"):
+            df[col] = rng.exponential(20, n)
+    elif sphere == "productivity":
+        df["deep_work_hours"] = rng.uniform(0, 8, n)
+        df["tasks_completed"] = rng.integers(0, 15, n)
+        df["focus_level"] = rng.integers(1, 11, n)
+    else:
+        df["study_hours"] = rng.uniform(0, 4, n)
+    return df
+
+
+def generate(parquet_dir: str, users: int, start: date, days: int, suffix: str, seed: int) -> int:
+    rng = np.random.default_rng(seed)
+    user_ids = np.repeat(np.arange(1, users + 1), days)
+    day_values = np.tile(np.array([start + timedelta(days=i) for i in range(days)]), users)
+    rows = 0
+    for offset, sphere in enumerate(build_duckdb.SPHERES):
+        df = _frame(rng, sphere, user_ids, day_values, first_id=seed * 10**9 + offset * 10**8)
+        os.makedirs(os.path.join(parquet_dir, sphere), exist_ok=True)
+        df.to_parquet(os.path.join(parquet_dir, sphere, f"{sphere}-{suffix}.parquet"), index=False)
+        rows += len(df)
+    return rows
+
+
+def _timed(label: str, fn) -> float:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {elapsed:8.2f}s")
+    return elapsed
+
+
+def _dbt(db_path: str, workdir: str, *extra: str) -> None:
+    profiles_dir = os.path.join(workdir, "profiles")
+    os.makedirs(profiles_dir, exist_ok=True)
+    with open(os.path.join(profiles_dir, "profiles.yml"), "w", encoding="utf-8") as handle:
+        handle.write(
+            "personal_dashboard:\n  target: bench\n  outputs:\n    bench:\n"
+            f"      type: duckdb\n      path: {db_path}\n      threads: 4\n"
+        )
+    subprocess.run(
+        ["dbt", "run", "--project-dir", DBT_PROJECT_DIR, "--profiles-dir", profiles_dir, *extra],
+        check=True,
+        capture_output=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental DWH pipeline.")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--workdir", default=None, help="Keep artifacts here (default: temp dir)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="dwh-bench-")
+    parquet_dir = os.path.join(workdir, "parquet")
+    db_path = os.path.join(workdir, "analytics.duckdb")
+    start = date(2025, 1, 1)
+    has_dbt = shutil.which("dbt") is not None
+    try:
+        rows = generate(parquet_dir, args.users, start, args.days, "base", seed=1)
+        print(f"generated {rows:,} rows ({args.users} users x {args.days} days x 4 spheres)")
+
+        con = duckdb.connect(db_path)
+        _timed("duckdb build (full)", lambda: build_duckdb.build(con, parquet_dir))
+        con.close()
+        if has_dbt:
+            _timed("dbt run --full-refresh", lambda: _dbt(db_path, workdir, "--full-refresh"))
+
+        new_rows = generate(
+            parquet_dir, args.users, start + timedelta(days=args.days), 1, "day1", seed=2
+        )
+        print(f"appended {new_rows:,} rows (one new day)")
+        con = duckdb.connect(db_path)
+        _timed("duckdb refresh (incremental)", lambda: build_duckdb.refresh(con, parquet_dir))
+        con.close()
+        if has_dbt:
+            _timed("dbt run (incremental)", lambda: _dbt(db_path, workdir))
+
+        con = duckdb.connect(db_path, read_only=True)
+        _timed(
+            "query: 30-day avg sleep, 1 user",
+            lambda: con.execute(
+                "select avg(sleep_hours) from daily_user where user_id = 1 "
+                "and local_date >= (select max(local_date) from daily_user) - 30"
+            ).fetchall(),
+        )
+        con.close()
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
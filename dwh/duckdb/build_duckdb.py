@@ -1,32 +1,338 @@
+"""Build the analytics DuckDB file from Parquet exports.
+
+Modes:
+  views    Lazy views over the Parquet globs (every query re-scans Parquet).
+  build    Drop and materialize all tables from scratch: raw sphere tables, daily
+           per-user aggregates, dim tables and table statistics.
+  refresh  Ingest only Parquet files that are new or changed since the last run and
+           recompute the affected (user_id, local_date) daily aggregates.
+
+Usage (from repo root):
+  python dwh/duckdb/build_duckdb.py build
+  python dwh/duckdb/build_duckdb.py refresh --interval 900   # re-run every 15 min
+"""
+
 import argparse
+import glob
 import os
+import time
+from datetime import datetime, timezone
 
 import duckdb
 
+SPHERES = ("health", "finance", "productivity", "learning")
 
-def main():
-    parser = argparse.ArgumentParser(description="Build DuckDB views over Parquet data.")
-    parser.add_argument("--parquet-dir", default="dwh/parquet", help="Parquet base directory")
-    parser.add_argument("--db", default="dwh/duckdb/analytics.duckdb", help="DuckDB file")
-    args = parser.parse_args()
+# Daily per-user aggregation per sphere (same rules as analytics.build_daily_dataframe).
+DAILY_AGGREGATES = {
+    "health": {
+        "mean": ["sleep_hours", "energy_level", "wellbeing", "weight_kg", "heart_rate_avg"],
+        "sum": ["steps", "workout_minutes"],
+    },
+    "finance": {
+        "mean": [],
+        "sum": ["income", "expense_food", "expense_transport", "expense_health", "expense_other"],
+    },
+    "productivity": {
+        "mean": ["focus_level"],
+        "sum": ["deep_work_hours", "tasks_completed"],
+    },
+    "learning": {
+        "mean": [],
+        "sum": ["study_hours"],
+    },
+}
 
-    os.makedirs(os.path.dirname(args.db), exist_ok=True)
-    con = duckdb.connect(args.db)
-    parquet_dir = args.parquet_dir
+INGESTED_FILES_DDL = """
+create table if not exists _ingested_files (
+    path varchar primary key,
+    sphere varchar not null,
+    size_bytes bigint not null,
+    mtime double not null,
+    row_count bigint not null,
+    ingested_at timestamptz not null
+)
+"""
+
+TABLE_STATS_DDL = """
+create table if not exists _table_stats (
+    table_name varchar primary key,
+    row_count bigint not null,
+    user_count bigint,
+    min_date date,
+    max_date date,
+    refreshed_at timestamptz not null
+)
+"""
+
+
+def _quote_list(paths: list[str]) -> str:
+    return "[" + ", ".join("'" + p.replace("'", "''") + "'" for p in paths) + "]"
+
+
+def _table_exists(con, name: str) -> bool:
+    row = con.execute(
+        "select count(*) from information_schema.tables where table_name = ?", [name]
+    ).fetchone()
+    return bool(row and row[0])
+
+
+def _daily_select(sphere: str, source: str) -> str:
+    spec = DAILY_AGGREGATES[sphere]
+    cols = [f"avg({c}) as {c}" for c in spec["mean"]] + [f"sum({c}) as {c}" for c in spec["sum"]]
+    # _loaded_at lets downstream incremental models (dbt) pick up only re-aggregated rows.
+    return (
+        f"select user_id, local_date, count(*) as entries, {', '.join(cols)}, "
+        f"current_timestamp as _loaded_at "
+        f"from {source} group by user_id, local_date"
+    )
+
+
+def _ensure_daily_table(con, sphere: str) -> None:
+    """Create an empty daily table so downstream models work before a sphere has data."""
+    spec = DAILY_AGGREGATES[sphere]
+    cols = ", ".join(f"{c} double" for c in spec["mean"] + spec["sum"])
+    con.execute(
+        f"create table if not exists daily_{sphere} ("
+        f"user_id bigint, local_date date, entries bigint, {cols}, _loaded_at timestamptz)"
+    )
+
+
+def build_views(con, parquet_dir: str) -> None:
+    for sphere in SPHERES:
+        con.execute(
+            f"create or replace view {sphere} as "
+            f"select * from read_parquet('{parquet_dir}/{sphere}/*.parquet')"
+        )
+
+
+def _pending_files(con, parquet_dir: str, sphere: str) -> tuple[list[str], list[str]]:
+    """Return (new_files, changed_files) for a sphere by comparing size/mtime with the ledger."""
+    known = {
+        path: (size, mtime)
+        for path, size, mtime in con.execute(
+            "select path, size_bytes, mtime from _ingested_files where sphere = ?", [sphere]
+        ).fetchall()
+    }
+    new_files, changed_files = [], []
+    for path in sorted(glob.glob(os.path.join(parquet_dir, sphere, "*.parquet"))):
+        stat = os.stat(path)
+        if path not in known:
+            new_files.append(path)
+        elif known[path] != (stat.st_size, stat.st_mtime):
+            changed_files.append(path)
+    return new_files, changed_files
+
+
+def _ingest_sphere(con, parquet_dir: str, sphere: str) -> int:
+    """Load new/changed Parquet files into the raw table and refresh affected daily rows."""
+    new_files, changed_files = _pending_files(con, parquet_dir, sphere)
+    files = new_files + changed_files
+    if not files:
+        return 0
 
+    source = f"read_parquet({_quote_list(files)}, filename = true, union_by_name = true)"
+    con.execute("create or replace temp table _affected (user_id bigint, local_date date)")
+    if not _table_exists(con, sphere):
+        con.execute(
+            f"create table {sphere} as select * exclude (filename), filename as _source_file "
+            f"from {source} limit 0"
+        )
+    if changed_files:
+        changed = _quote_list(changed_files)
+        con.execute(
+            f"insert into _affected select distinct user_id, local_date from {sphere} "
+            f"where _source_file in (select unnest({changed}))"
+        )
+        con.execute(f"delete from {sphere} where _source_file in (select unnest({changed}))")
+
+    before = con.execute(f"select count(*) from {sphere}").fetchone()[0]
     con.execute(
-        f"create or replace view health as select * from read_parquet('{parquet_dir}/health/*.parquet')"
+        f"insert into {sphere} by name "
+        f"select * exclude (filename), filename as _source_file from {source}"
     )
+    inserted = con.execute(f"select count(*) from {sphere}").fetchone()[0] - before
     con.execute(
-        f"create or replace view finance as select * from read_parquet('{parquet_dir}/finance/*.parquet')"
+        f"insert into _affected select distinct user_id, local_date from {sphere} "
+        f"where _source_file in (select unnest({_quote_list(files)}))"
+    )
+
+    daily = f"daily_{sphere}"
+    affected_rows = (
+        f"(select {sphere}.* from {sphere} "
+        f"join (select distinct * from _affected) a using (user_id, local_date))"
     )
     con.execute(
-        f"create or replace view productivity as select * from read_parquet('{parquet_dir}/productivity/*.parquet')"
+        f"delete from {daily} using _affected a "
+        f"where {daily}.user_id = a.user_id and {daily}.local_date = a.local_date"
     )
+    con.execute(f"insert into {daily} by name {_daily_select(sphere, affected_rows)}")
+
+    now = datetime.now(timezone.utc)
+    for path in files:
+        stat = os.stat(path)
+        rows = con.execute(
+            f"select count(*) from {sphere} where _source_file = ?", [path]
+        ).fetchone()[0]
+        con.execute(
+            "insert or replace into _ingested_files values (?, ?, ?, ?, ?, ?)",
+            [path, sphere, stat.st_size, stat.st_mtime, rows, now],
+        )
+    return inserted
+
+
+def _rebuild_daily_user(con) -> None:
+    """Wide per-user daily table (one row per user/date across all spheres) plus dims."""
+    dailies = [f"daily_{s}" for s in SPHERES]
+    selects = []
+    for name in dailies:
+        sphere = name.removeprefix("daily_")
+        spec = DAILY_AGGREGATES[sphere]
+        selects.append(
+            f"(select user_id, local_date, {', '.join(spec['mean'] + spec['sum'])} from {name})"
+        )
+    joined = selects[0]
+    for sel in selects[1:]:
+        joined = f"{joined} full outer join {sel} using (user_id, local_date)"
     con.execute(
-        f"create or replace view learning as select * from read_parquet('{parquet_dir}/learning/*.parquet')"
+        f"create or replace table daily_user as select * from {joined} order by user_id, local_date"
+    )
+    con.execute(
+        """
+        create or replace table dim_date as
+        select distinct
+            local_date as date,
+            year(local_date) as year,
+            month(local_date) as month,
+            day(local_date) as day,
+            isodow(local_date) as iso_weekday,
+            weekofyear(local_date) as iso_week,
+            date_trunc('week', local_date)::date as week_start,
+            date_trunc('month', local_date)::date as month_start
+        from daily_user
+        order by date
+        """
+    )
+    con.execute(
+        """
+        create or replace table dim_user as
+        select
+            user_id,
+            min(local_date) as first_date,
+            max(local_date) as last_date,
+            count(*) as active_days
+        from daily_user
+        group by user_id
+        order by user_id
+        """
+    )
+
+
+def _record_stats(con) -> None:
+    now = datetime.now(timezone.utc)
+    tables = [
+        *SPHERES,
+        *(f"daily_{s}" for s in SPHERES),
+        "daily_user",
+    ]
+    for name in tables:
+        if not _table_exists(con, name):
+            continue
+        row_count, user_count, min_date, max_date = con.execute(
+            f"select count(*), count(distinct user_id), min(local_date), max(local_date) from {name}"
+        ).fetchone()
+        con.execute(
+            "insert or replace into _table_stats values (?, ?, ?, ?, ?, ?)",
+            [name, row_count, user_count, min_date, max_date, now],
+        )
+    for name in ("dim_date", "dim_user"):
+        if _table_exists(con, name):
+            row_count = con.execute(f"select count(*) from {name}").fetchone()[0]
+            con.execute(
+                "insert or replace into _table_stats values (?, ?, null, null, null, ?)",
+                [name, row_count, now],
+            )
+    con.execute("analyze")
+
+
+def refresh(con, parquet_dir: str) -> dict[str, int]:
+    """Ingest new/changed Parquet files. Returns inserted row counts per sphere."""
+    con.execute(INGESTED_FILES_DDL)
+    con.execute(TABLE_STATS_DDL)
+    for sphere in SPHERES:
+        # Switching from views mode: drop the lazy view so the table can be created.
+        row = con.execute(
+            "select table_type from information_schema.tables where table_name = ?", [sphere]
+        ).fetchone()
+        if row and row[0] == "VIEW":
+            con.execute(f"drop view {sphere}")
+    inserted = {}
+    con.execute("begin transaction")
+    try:
+        for sphere in SPHERES:
+            _ensure_daily_table(con, sphere)
+            inserted[sphere] = _ingest_sphere(con, parquet_dir, sphere)
+        if any(inserted.values()) or not _table_exists(con, "daily_user"):
+            _rebuild_daily_user(con)
+        con.execute("commit")
+    except Exception:
+        con.execute("rollback")
+        raise
+    _record_stats(con)
+    return inserted
+
+
+def build(con, parquet_dir: str) -> dict[str, int]:
+    """Full rebuild: drop materialized tables and ledger, then ingest everything."""
+    for name in (
+        *SPHERES,
+        *(f"daily_{s}" for s in SPHERES),
+        "daily_user",
+        "dim_date",
+        "dim_user",
+        "_ingested_files",
+        "_table_stats",
+    ):
+        con.execute(f"drop view if exists {name}")
+        con.execute(f"drop table if exists {name}")
+    return refresh(con, parquet_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build DuckDB analytics file from Parquet data.")
+    parser.add_argument(
+        "mode",
+        nargs="?",
+        default="views",
+        choices=["views", "build", "refresh"],
+        help="views (lazy), build (full materialization) or refresh (new files only)",
     )
-    con.close()
+    parser.add_argument("--parquet-dir", default="dwh/parquet", help="Parquet base directory")
+    parser.add_argument("--db", default="dwh/duckdb/analytics.duckdb", help="DuckDB file")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=0,
+        help="With refresh: repeat every N seconds (0 = run once)",
+    )
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.db), exist_ok=True)
+    while True:
+        started = time.perf_counter()
+        con = duckdb.connect(args.db)
+        try:
+            if args.mode == "views":
+                build_views(con, args.parquet_dir)
+                return
+            runner = build if args.mode == "build" else refresh
+            inserted = runner(con, args.parquet_dir)
+        finally:
+            con.close()
+        elapsed = time.perf_counter() - started
+        print(f"{args.mode}: inserted {inserted} in {elapsed:.2f}s")
+        if args.mode != "refresh" or args.interval <= 0:
+            return
+        time.sleep(args.interval)
 
 
 if __name__ == "__main__":
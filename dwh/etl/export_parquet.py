@@ -1,11 +1,33 @@
+"""Export app tables to Parquet for the DuckDB/dbt pipeline.
+
+Full export (default) rewrites `<output>/<sphere>/<sphere>.parquet`. With `--incremental`,
+only rows with an id above the last exported id are written to a new partition file
+`<sphere>-<timestamp>.parquet`; the watermark is kept in `<output>/_export_state.json`.
+The watermark covers all users, so `--incremental` cannot be combined with `--user-id`.
+A full export removes earlier partitions and resets the watermark.
+Entries have no updated_at, so edits and deletes of already exported rows are only
+picked up by a full export (followed by `build_duckdb.py build`).
+"""
+
 import argparse
+import glob
+import json
 import os
+from datetime import datetime, timezone
 
 import pandas as pd
 from sqlalchemy.orm import Session
 
 from backend.app import models
-from backend.app.database import SessionLocal
+from backend.app.database import ReadSessionLocal
+
+TABLES = {
+    "health": models.HealthEntry,
+    "finance": models.FinanceEntry,
+    "productivity": models.ProductivityEntry,
+    "learning": models.LearningEntry,
+}
+STATE_FILE = "_export_state.json"
 
 
 def export_dataframe(df: pd.DataFrame, output_dir: str, name: str):
@@ -16,47 +38,68 @@ def export_dataframe(df: pd.DataFrame, output_dir: str, name: str):
     df.to_parquet(output_path, index=False)
 
 
-def load_table(db: Session, model, user_id: int | None = None):
+def load_table(db: Session, model, user_id: int | None = None, after_id: int | None = None):
     query = db.query(model)
     if user_id is not None:
         query = query.filter(model.user_id == user_id)
-    return pd.read_sql(query.statement, db.bind)
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+    return pd.read_sql(query.order_by(model.id).statement, db.bind)
+
+
+def _load_state(output_dir: str) -> dict:
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _save_state(output_dir: str, state: dict) -> None:
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, STATE_FILE), "w", encoding="utf-8") as handle:
+        json.dump(state, handle, indent=2)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Export app data to Parquet files.")
     parser.add_argument("--output", default="dwh/parquet", help="Output directory")
     parser.add_argument("--user-id", type=int, default=None, help="Filter by user id")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only export rows added since the last run, as new partition files",
+    )
     args = parser.parse_args()
+    if args.incremental and args.user_id is not None:
+        parser.error("--incremental exports all users; it cannot be combined with --user-id")
 
     output_dir = args.output
     user_id = args.user_id
+    state = _load_state(output_dir) if args.incremental else {}
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
 
-    db: Session = SessionLocal()
+    db: Session = ReadSessionLocal()
     try:
-        export_dataframe(
-            load_table(db, models.HealthEntry, user_id=user_id),
-            os.path.join(output_dir, "health"),
-            "health",
-        )
-        export_dataframe(
-            load_table(db, models.FinanceEntry, user_id=user_id),
-            os.path.join(output_dir, "finance"),
-            "finance",
-        )
-        export_dataframe(
-            load_table(db, models.ProductivityEntry, user_id=user_id),
-            os.path.join(output_dir, "productivity"),
-            "productivity",
-        )
-        export_dataframe(
-            load_table(db, models.LearningEntry, user_id=user_id),
-            os.path.join(output_dir, "learning"),
-            "learning",
-        )
+        for name, model in TABLES.items():
+            sphere_dir = os.path.join(output_dir, name)
+            if not args.incremental:
+                for partition in glob.glob(os.path.join(sphere_dir, f"{name}-*.parquet")):
+                    os.remove(partition)
+                df = load_table(db, model, user_id=user_id)
+                export_dataframe(df, sphere_dir, name)
+                if not df.empty:
+                    state[name] = int(df["id"].max())
+                continue
+            df = load_table(db, model, user_id=user_id, after_id=state.get(name))
+            export_dataframe(df, sphere_dir, f"{name}-{stamp}")
+            if not df.empty:
+                state[name] = int(df["id"].max())
     finally:
         db.close()
 
+    _save_state(output_dir, state)
+
 
 if __name__ == "__main__":
     main()
@@ -1,118 +1,185 @@
+"""Export dashboard data to CSV.
+
+Entry categories are streamed from the database (server-side cursor, `yield_per`) straight
+into the csv module, so memory stays flat regardless of table size. Several categories
+(`--category all` or a comma-separated list) are written concurrently, one thread and one
+DB session per category.
+
+Usage (from repo root):
+  python etl/export.py --category all --compress gzip --since 2026-01-01
+"""
+
 import argparse
+import csv
+import gzip
+import io
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from backend.app import analytics, models
-from backend.app.database import SessionLocal
+from backend.app.database import ReadSessionLocal
 
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional runtime dependency
+    zstandard = None
 
-def export_table(entries, fieldnames, output_path):
-    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    with open(output_path, "w", newline="", encoding="utf-8") as handle:
-        handle.write(",".join(fieldnames))
-        handle.write("\n")
-        for entry in entries:
-            row = [str(getattr(entry, field, "")) for field in fieldnames]
-            handle.write(",".join(row))
-            handle.write("\n")
+CATEGORY_MODELS = {
+    "health": models.HealthEntry,
+    "finance": models.FinanceEntry,
+    "productivity": models.ProductivityEntry,
+    "learning": models.LearningEntry,
+}
+LEADING_COLUMNS = ("id", "user_id", "recorded_at", "local_date", "timezone")
+COMPRESSION_SUFFIX = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+BATCH_SIZE = 5000
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Export dashboard data to CSV.")
-    parser.add_argument("--category", default="daily", help="health|finance|productivity|learning|daily")
-    parser.add_argument("--output", default="exports", help="Output directory")
-    parser.add_argument("--user-id", type=int, default=None, help="Filter by user id")
-    args = parser.parse_args()
+@dataclass
+class ExportStats:
+    category: str
+    path: str
+    rows: int
+    bytes_written: int
+    seconds: float
 
-    category = args.category.lower()
-    output_dir = args.output
-    user_id = args.user_id
 
-    db: Session = SessionLocal()
+def _open_output(path: str, compress: str):
+    """Open a text stream for `path`, wrapping it in the requested compressor."""
+    if compress == "gzip":
+        return gzip.open(path, "wt", newline="", encoding="utf-8")
+    if compress == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        raw = open(path, "wb")
+        writer = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(writer, newline="", encoding="utf-8")
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def export_category(
+    category: str,
+    output_dir: str,
+    user_id: int | None = None,
+    since: date | None = None,
+    compress: str = "none",
+) -> ExportStats:
+    started = time.perf_counter()
+    path = os.path.join(output_dir, f"{category}.csv{COMPRESSION_SUFFIX[compress]}")
+    db: Session = ReadSessionLocal()
+    rows = 0
     try:
         if category == "daily":
             df = analytics.build_daily_dataframe(db, user_id=user_id)
-            output_path = os.path.join(output_dir, "daily.csv")
-            os.makedirs(output_dir, exist_ok=True)
-            df.to_csv(output_path, index=False)
-            return
-
-        if category == "health":
-            query = db.query(models.HealthEntry)
-            if user_id is not None:
-                query = query.filter(models.HealthEntry.user_id == user_id)
-            entries = query.all()
-            fieldnames = [
-                "id",
-                "user_id",
-                "recorded_at",
-                "local_date",
-                "timezone",
-                "sleep_hours",
-                "energy_level",
-                "supplements",
-                "weight_kg",
-                "wellbeing",
-                "notes",
-            ]
-        elif category == "finance":
-            query = db.query(models.FinanceEntry)
-            if user_id is not None:
-                query = query.filter(models.FinanceEntry.user_id == user_id)
-            entries = query.all()
-            fieldnames = [
-                "id",
-                "user_id",
-                "recorded_at",
-                "local_date",
-                "timezone",
-                "income",
-                "expense_food",
-                "expense_transport",
-                "expense_health",
-                "expense_other",
-                "notes",
-            ]
-        elif category == "productivity":
-            query = db.query(models.ProductivityEntry)
-            if user_id is not None:
-                query = query.filter(models.ProductivityEntry.user_id == user_id)
-            entries = query.all()
-            fieldnames = [
-                "id",
-                "user_id",
-                "recorded_at",
-                "local_date",
-                "timezone",
-                "deep_work_hours",
-                "tasks_completed",
-                "focus_level",
-                "notes",
+            if since is not None and not df.empty:
+                df = df[df["date"] >= since]
+            with _open_output(path, compress) as handle:
+                df.to_csv(handle, index=False)
+            rows = len(df)
+        else:
+            model = CATEGORY_MODELS[category]
+            table_columns = model.__table__.columns
+            columns = [table_columns[name] for name in LEADING_COLUMNS] + [
+                column for column in table_columns if column.name not in LEADING_COLUMNS
             ]
-        elif category == "learning":
-            query = db.query(models.LearningEntry)
+            stmt = select(*columns)
             if user_id is not None:
-                query = query.filter(models.LearningEntry.user_id == user_id)
-            entries = query.all()
-            fieldnames = [
-                "id",
-                "user_id",
-                "recorded_at",
-                "local_date",
-                "timezone",
-                "study_hours",
-                "topics",
-                "projects",
-                "notes",
-            ]
-        else:
-            raise ValueError("Unsupported category.")
-
-        output_path = os.path.join(output_dir, f"{category}.csv")
-        export_table(entries, fieldnames, output_path)
+                stmt = stmt.where(model.user_id == user_id)
+            if since is not None:
+                stmt = stmt.where(model.local_date >= since)
+            stmt = stmt.order_by(model.id)
+            result = db.execute(stmt, execution_options={"yield_per": BATCH_SIZE})
+            with _open_output(path, compress) as handle:
+                writer = csv.writer(handle)
+                writer.writerow([column.name for column in columns])
+                for partition in result.partitions():
+                    writer.writerows(partition)
+                    rows += len(partition)
     finally:
         db.close()
+    return ExportStats(
+        category=category,
+        path=path,
+        rows=rows,
+        bytes_written=os.path.getsize(path),
+        seconds=time.perf_counter() - started,
+    )
+
+
+def _parse_categories(value: str) -> list[str]:
+    categories = []
+    for item in value.lower().split(","):
+        item = item.strip()
+        if item == "all":
+            categories.extend(CATEGORY_MODELS)
+        elif item in CATEGORY_MODELS or item == "daily":
+            categories.append(item)
+        elif item:
+            raise argparse.ArgumentTypeError(f"Unsupported category '{item}'.")
+    return list(dict.fromkeys(categories))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export dashboard data to CSV.")
+    parser.add_argument(
+        "--category",
+        type=_parse_categories,
+        default=["daily"],
+        help="health|finance|productivity|learning|daily|all, or a comma-separated list",
+    )
+    parser.add_argument("--output", default="exports", help="Output directory")
+    parser.add_argument("--user-id", type=int, default=None, help="Filter by user id")
+    parser.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        default=None,
+        help="Only rows with local_date >= YYYY-MM-DD (incremental exports)",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=list(COMPRESSION_SUFFIX),
+        default="none",
+        help="Output compression",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Categories exported in parallel")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(args.category)))) as pool:
+        futures = [
+            pool.submit(
+                export_category,
+                category,
+                args.output,
+                user_id=args.user_id,
+                since=args.since,
+                compress=args.compress,
+            )
+            for category in args.category
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    total_rows = sum(item.rows for item in results)
+    total_bytes = sum(item.bytes_written for item in results)
+    for item in results:
+        rate = item.rows / item.seconds if item.seconds else 0.0
+        print(
+            f"{item.category:<13} {item.rows:>10,} rows {item.bytes_written / 1e6:>9.2f} MB "
+            f"{item.seconds:>7.2f}s {rate:>12,.0f} rows/s  {item.path}"
+        )
+    rate = total_rows / elapsed if elapsed else 0.0
+    print(
+        f"{'total':<13} {total_rows:>10,} rows {total_bytes / 1e6:>9.2f} MB "
+        f"{elapsed:>7.2f}s {rate:>12,.0f} rows/s"
+    )
 
 
 if __name__ == "__main__":
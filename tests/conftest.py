@@ -6,14 +6,16 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from backend.app.api.deps import get_db_session
+from backend.app.api.deps import get_db_session, get_read_db_session
 from backend.app.database import Base
 from backend.app.main import app
+from backend.app.services.principals import clear_principal_cache
 
 
 @pytest.fixture()
 def client():
     os.environ["SECRET_KEY"] = "test-secret"
+    clear_principal_cache()
     engine = create_engine(
         "sqlite://",
         connect_args={"check_same_thread": False},
@@ -30,6 +32,7 @@ def client():
             db.close()
 
     app.dependency_overrides[get_db_session] = override_get_db
+    app.dependency_overrides[get_read_db_session] = override_get_db
     app.state.testing_db_factory = TestingSessionLocal
 
     with TestClient(app) as test_client:
@@ -0,0 +1,368 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.app import analytics
+
+
+def _auth_headers(client, email):
+    payload = {"email": email, "password": "supersecret"}
+    assert client.post("/auth/register", json=payload).status_code == 201
+    token = client.post("/auth/login", json=payload).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_linear_trends_match_per_metric_fit():
+    rng = np.random.default_rng(1)
+    days = 60
+    df = pd.DataFrame({"date": [date(2026, 1, 1) + timedelta(days=i) for i in range(days)]})
+    df["sleep_hours"] = 7 + 0.02 * np.arange(days) + rng.normal(0, 0.5, days)
+    df.loc[rng.random(days) < 0.4, "sleep_hours"] = np.nan
+    df["weight_kg"] = 80.0
+    df["steps"] = np.nan
+    df.loc[days - 3:, "steps"] = [1000.0, 2000.0, 3000.0]
+
+    metrics = ["sleep_hours", "weight_kg", "steps"]
+    trends = analytics.linear_trends(df.sample(frac=1, random_state=0), metrics)
+    for window in (14, 30):
+        sample = df[["sleep_hours"]].dropna().tail(window)["sleep_hours"].to_numpy()
+        expected = round(float(np.polyfit(np.arange(len(sample)), sample, 1)[0]), 4)
+        sleep, weight = trends[window]  # steps has too few points
+        assert sleep["slope"] == expected
+        assert sleep["direction"] == ("up" if expected > 0 else "down")
+        assert weight == {
+            "metric": "weight_kg", "slope": 0.0, "direction": "neutral", "days": window
+        }
+    assert analytics.linear_trend(df, "sleep_hours", days=14) == trends[14][0]
+
+
+def test_insight_and_recommendation_rules_share_statistics(monkeypatch):
+    from backend.app.ml import rules
+    from backend.app.ml.recommender import generate_recommendations
+
+    days = 42
+    df = pd.DataFrame({"date": [date(2026, 1, 5) + timedelta(days=i) for i in range(days)]})
+    df["sleep_hours"] = [5.0 if i % 7 == 0 else 7.5 for i in range(days)]  # Mondays are short
+    df["income"] = 100.0 + np.arange(days)
+    df["expense_food"] = 50.0 + 3 * np.arange(days)
+
+    calls = []
+
+    def counted(name, fn):
+        return lambda stats, *args: calls.append((name, *args)) or fn(stats, *args)
+
+    for name, fn in list(rules.STATISTICS.items()):
+        monkeypatch.setitem(rules.STATISTICS, name, counted(name, fn))
+    stats = rules.FrameStats(df.iloc[::-1])
+    insights = [i["message"] for i in analytics.generate_insights(df, stats)]
+    recs = [r["message"] for r in generate_recommendations(df, stats=stats)]
+
+    assert insights[0].startswith("Expenses are growing faster than income")
+    assert insights[1].startswith("Sleep is worse after weekends: Monday avg 5.0h vs 7.5h")
+    assert any(r.startswith("Расходы растут быстрее дохода") for r in recs)
+    assert any(r.startswith("После выходных сон") for r in recs)
+    assert len(calls) == len(set(calls))  # every statistic computed once for both rule sets
+    assert ("expense_income_slopes", 30) in calls and ("weekday",) in calls
+
+
+def test_weekday_aggregate_matches_groupby():
+    from backend.app.ml.rules import weekday_aggregate
+
+    rng = np.random.default_rng(2)
+    days = 50
+    df = pd.DataFrame({"date": pd.date_range("2026-03-02", periods=days)})
+    df["sleep_hours"] = rng.normal(7, 1, days)
+    df["steps"] = rng.integers(0, 20000, days).astype(float)
+    df.loc[rng.random(days) < 0.3, "sleep_hours"] = np.nan
+    df.loc[df["date"].dt.dayofweek == 6, "steps"] = np.nan  # never logged on Sundays
+
+    counts, sums, means = weekday_aggregate(
+        df["date"].dt.dayofweek.to_numpy(), df[["sleep_hours", "steps"]].to_numpy()
+    )
+    for column, name in enumerate(("sleep_hours", "steps")):
+        expected = df.groupby(df["date"].dt.dayofweek)[name].agg(["count", "sum", "mean"])
+        assert counts[:, column].tolist() == expected["count"].tolist()
+        assert np.allclose(sums[:, column], expected["sum"])
+        assert np.allclose(means[:, column], expected["mean"], equal_nan=True)
+
+    best = analytics.best_worst_weekday(df.assign(date=df["date"].dt.date), "steps")
+    assert best["best_value"] == round(expected["mean"].max(), 2)
+    assert best["worst_weekday"] != "Sunday"
+
+
+def test_payload_windows_and_bundle(client, db_session, monkeypatch):
+    from datetime import datetime, timezone
+
+    from backend.app import models
+
+    today = date(2026, 10, 19)
+    window_start = analytics.payload_window_start
+    assert window_start(["trend_this_month"], today) == date(2026, 9, 1)
+    assert window_start(["trend_this_month", "weekly_report"], today) == date(2026, 9, 1)
+    assert window_start(["trend_this_month", "correlations"], today) is None
+
+    headers = _auth_headers(client, "bundle@example.com")
+    user = db_session.query(models.User).filter_by(email="bundle@example.com").one()
+    for offset in range(0, 120, 2):
+        db_session.add(
+            models.HealthEntry(
+                user_id=user.id,
+                recorded_at=datetime.now(timezone.utc),
+                local_date=date.today() - timedelta(days=offset),
+                timezone="UTC",
+                sleep_hours=6 + offset % 5 * 0.5,
+                energy_level=5 + offset % 3,
+                wellbeing=7,
+            )
+        )
+    db_session.commit()
+
+    loads = []
+    original = analytics.build_daily_dataframe
+
+    def build(*args, **kwargs):
+        loads.append(kwargs.get("start"))
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(analytics, "build_daily_dataframe", build)
+    response = client.get(
+        "/analytics/bundle?include=trend_this_month,weekday_trends", headers=headers
+    )
+    assert response.status_code == 200
+    bundle = response.json()
+    assert loads == [None]  # one load covering both windows
+    trend = client.get("/analytics/trend-this-month", headers=headers).json()
+    assert bundle["trend_this_month"] == trend
+    weekday = client.get("/analytics/weekday-trends", headers=headers).json()
+    assert bundle["weekday_trends"] == weekday
+    assert bundle["correlations"] is None
+    assert loads[1] == analytics.payload_window_start(["trend_this_month"])  # the single endpoint
+
+    response = client.get("/analytics/bundle?include=nope", headers=headers)
+    assert response.status_code == 422
+
+
+def test_recommendations_batch_score_stored_feature_vectors():
+    from backend.app.ml.recommender import (
+        feature_vector,
+        features_from_dict,
+        features_to_dict,
+        generate_recommendations,
+        score_recommendations,
+    )
+    from backend.app.ml.rules import FrameStats
+
+    rng = np.random.default_rng(3)
+    days = 40
+    frames = []
+    for user in range(4):
+        df = pd.DataFrame({"date": [date(2026, 2, 2) + timedelta(days=i) for i in range(days)]})
+        df["sleep_hours"] = rng.normal(6 + user * 0.5, 1, days)
+        df["energy_level"] = df["sleep_hours"] + rng.normal(0, 0.5 + user, days)
+        df["study_hours"] = rng.exponential(1 + user, days)
+        if user % 2:
+            df["income"] = 100.0
+            df["expense_food"] = rng.normal(90 + user * 10, 5, days)
+        frames.append(df)
+
+    stored = [features_to_dict(feature_vector(FrameStats(df))) for df in frames]
+    assert stored[0]["income_days"] is None and stored[1]["income_days"] == days
+    X = np.vstack([features_from_dict(values) for values in stored])
+    batch = score_recommendations(X)
+    assert batch == [generate_recommendations(df) for df in frames]
+    assert any(r["message"].startswith("Средний сон") for r in batch[0])
+
+
+def test_population_payloads_match_single_user_analytics(db_session):
+    from datetime import datetime, timezone
+
+    from backend.app import models
+
+    rng = np.random.default_rng(4)
+    now = datetime.now(timezone.utc)
+    start = date(2026, 6, 1)
+    coverage = [
+        ("health", "finance", "productivity", "sessions", "learning"),
+        ("health",),
+        ("finance", "sessions"),
+        ("productivity", "sessions"),
+        ("health", "learning"),
+    ]
+
+    def entry(model, user, day, **values):
+        stamp = {"recorded_at": now, "local_date": start + timedelta(days=int(day))}
+        if model is not models.FocusSession:
+            stamp["timezone"] = "UTC"
+        return model(user_id=user.id, **stamp, **values)
+
+    users = []
+    for n, sources in enumerate(coverage):
+        user = models.User(email=f"pop{n}@example.com", hashed_password="x", created_at=now)
+        db_session.add(user)
+        db_session.flush()
+        users.append(user)
+        days = rng.choice(80, size=4 if n == 4 else 50, replace=False)
+        for day in days:
+            sleep = float(rng.normal(6.5, 1))
+            if "health" in sources:
+                db_session.add(entry(
+                    models.HealthEntry, user, day, sleep_hours=sleep, energy_level=int(sleep),
+                    wellbeing=int(rng.integers(4, 9)), weight_kg=None if day % 3 else 80 - day / 50,
+                ))
+            if "finance" in sources and day % 2:
+                db_session.add(entry(
+                    models.FinanceEntry, user, day, income=float(day * 10),
+                    expense_food=float(rng.gamma(2, 20)), expense_transport=5.0,
+                    expense_health=0.0, expense_other=float(day),
+                ))
+            if "productivity" in sources:
+                db_session.add(entry(
+                    models.ProductivityEntry, user, day, deep_work_hours=float(rng.uniform(0, 5)),
+                    tasks_completed=int(rng.integers(0, 8)),
+                    focus_level=int(sleep + rng.integers(-1, 2)),
+                ))
+            if "sessions" in sources and day % 3:
+                minutes = int(rng.integers(10, 90))
+                db_session.add(entry(models.FocusSession, user, day + 1, duration_minutes=minutes))
+            if "learning" in sources and day % 4:
+                hours = float(rng.exponential(1))
+                db_session.add(entry(models.LearningEntry, user, day, study_hours=hours))
+    db_session.commit()
+    sleep_goal = {
+        "sphere": "health", "title": "Sleep", "target_value": 9.0, "target_metric": "sleep_hours"
+    }
+    goals = {users[0].id: [sleep_goal]}
+
+    population = analytics.build_population_dataframe(db_session, [u.id for u in users])
+    payloads = analytics.population_payloads(population, goals)
+
+    assert sorted(payloads) == [u.id for u in users]
+    from backend.app.ml.recommender import generate_recommendations
+
+    for user in users:
+        df = analytics.build_daily_dataframe(db_session, user_id=user.id)
+        user_goals = goals.get(user.id)
+        payload = payloads[user.id]
+        assert sorted(population.columns[user.id]) == sorted(c for c in df.columns if c != "date")
+        assert payload["correlations"]["correlations"] == analytics.compute_correlations(df)
+        assert payload["insights"]["insights"] == analytics.generate_insights(df)
+        assert payload["weekday_trends"] == analytics.weekday_and_trends_payload(df)
+        insight = analytics.insight_of_the_week(df, user_goals)
+        assert payload["insight_of_the_week"]["insight"] == insight
+        recommendations = generate_recommendations(df, user_goals)
+        assert payload["recommendations"]["recommendations"] == recommendations
+    first = payloads[users[0].id]
+    assert first["recommendations"]["recommendations"][0]["message"].startswith("Цель «Sleep»")
+    assert first["correlations"]["correlations"] and first["weekday_trends"]["trends_30"]
+    assert payloads[users[4].id]["correlations"]["correlations"] == []  # fewer than 5 days
+
+
+def test_admin_analytics_refresh_runs_out_of_process(client, db_session, monkeypatch):
+    from backend.app import models
+    from backend.app.api.routes import admin
+
+    payload = {"email": "refresh-admin@example.com", "password": "supersecret"}
+    client.post("/auth/register", json=payload)
+    db_session.query(models.User).filter(models.User.email == payload["email"]).one().role = "admin"
+    db_session.commit()
+    token = client.post("/auth/login", json=payload).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    spawned = []
+    monkeypatch.setattr(
+        admin, "spawn_population_analytics", lambda *a, **kw: spawned.append((a, kw)) or 4321
+    )
+
+    monkeypatch.setattr(admin, "get_cache_client", lambda: None)
+    response = client.post("/admin/analytics/refresh", json={"user_ids": [1]}, headers=headers)
+    assert response.status_code == 503 and not spawned
+
+    monkeypatch.setattr(admin, "get_cache_client", lambda: object())
+    too_many = {"user_ids": list(range(10_001))}
+    response = client.post("/admin/analytics/refresh", json=too_many, headers=headers)
+    assert response.status_code == 422
+
+    body = {"user_ids": [1, 2], "workers": 4, "chunk_size": 500, "ttl_seconds": 3600}
+    response = client.post("/admin/analytics/refresh", json=body, headers=headers)
+    assert response.status_code == 202 and response.json()["pid"] == 4321
+    assert spawned == [(([1, 2],), {"chunk_size": 500, "workers": 4, "ttl_seconds": 3600})]
+
+
+def test_weekly_report_precomputed(client, db_session, monkeypatch):
+    from backend.app import models
+    from backend.app.tasks import weekly_digest
+
+    headers = _auth_headers(client, "weekly@example.com")
+    health = {"sleep_hours": 7, "energy_level": 8, "wellbeing": 7}
+    client.post("/health", json=health, headers=headers)
+    other = _auth_headers(client, "idle@example.com")
+
+    # On demand while nothing is stored
+    response = client.get("/analytics/weekly-report", headers=other)
+    assert response.status_code == 200
+
+    monkeypatch.setattr(weekly_digest, "SessionLocal", client.app.state.testing_db_factory)
+    stats = weekly_digest.run_weekly_digest(date.today(), use_llm=False, chunk_size=1)
+    assert stats == {"users": 1, "llm_insights": 0}
+
+    report = db_session.query(models.WeeklyReport).one()
+    assert report.period_end == date.today() and "health" in report.summary
+    report.insight = "stored"
+    db_session.commit()
+    response = client.get("/analytics/weekly-report", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["insight"] == "stored"
+
+
+def test_productivity_dashboard_focus_aggregates(client):
+    from sqlalchemy.dialects import postgresql
+
+    from backend.app import models
+    from backend.app.database import iso_weekday, local_hour
+
+    headers = _auth_headers(client, "focus@example.com")
+    sessions = [
+        ("2026-10-19T23:30:00+00:00", "Europe/Moscow", 50),  # Tuesday 02:30 local
+        ("2026-10-20T00:10:00+00:00", "Europe/Moscow", 25),  # Tuesday 03:10 local
+        ("2026-10-19T07:00:00+00:00", "UTC", 30),  # Monday 07:00
+        ("2026-10-26T07:45:00+00:00", "UTC", 20),  # Monday 07:45
+    ]
+    for recorded_at, tz, minutes in sessions:
+        response = client.post(
+            "/productivity/sessions",
+            json={"recorded_at": recorded_at, "timezone": tz, "duration_minutes": minutes},
+            headers=headers,
+        )
+        assert response.status_code == 200 and response.json()["timezone"] == tz
+    for category, hours in [("code", 2), ("code", 1.5), ("meetings", 1)]:
+        client.post(
+            "/productivity",
+            json={
+                "deep_work_hours": hours,
+                "tasks_completed": 1,
+                "focus_level": 7,
+                "focus_category": category,
+            },
+            headers=headers,
+        )
+
+    payload = client.get("/analytics/productivity-dashboard", headers=headers).json()
+    assert payload["focus_heatmap"] == [
+        {"weekday": 0, "hour": 7, "sessions": 2, "minutes": 50},
+        {"weekday": 1, "hour": 2, "sessions": 1, "minutes": 50},
+        {"weekday": 1, "hour": 3, "sessions": 1, "minutes": 25},
+    ]
+    assert payload["top_hours"] == [7, 2, 3]
+    assert payload["session_deep_work_hours_total"] == 2.1
+    assert payload["focus_by_category"] == [
+        {"category": "code", "hours": 3.5},
+        {"category": "meetings", "hours": 1.0},
+    ]
+
+    dialect = postgresql.dialect()
+    hour = local_hour(models.FocusSession.recorded_at, models.FocusSession.timezone)
+    assert str(hour.compile(dialect=dialect)) == (
+        "CAST(EXTRACT(HOUR FROM timezone(focus_sessions.timezone, focus_sessions.recorded_at))"
+        " AS INTEGER)"
+    )
+    assert "ISODOW" in str(iso_weekday(models.FocusSession.local_date).compile(dialect=dialect))
@@ -1,4 +1,8 @@
+import pytest
+
 from backend.app import models
+from backend.app.core import security
+from backend.app.core.config import get_settings
 
 
 def test_register_and_login(client):
@@ -38,3 +42,120 @@ def test_admin_role_required(client, db_session):
 
     response = client.get("/admin/users", headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
+
+
+def _login(client, payload):
+    token = client.post("/auth/login", json=payload).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_profile_update_refreshes_cached_principal(client):
+    payload = {"email": "cache@example.com", "password": "supersecret"}
+    client.post("/auth/register", json=payload)
+    headers = _login(client, payload)
+
+    assert client.get("/auth/me", headers=headers).json()["full_name"] is None
+    response = client.patch("/auth/me", json={"full_name": "Cached"}, headers=headers)
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=headers).json()["full_name"] == "Cached"
+
+
+def test_reset_password_revokes_issued_tokens(client, db_session):
+    payload = {"email": "reset@example.com", "password": "supersecret"}
+    client.post("/auth/register", json=payload)
+    headers = _login(client, payload)
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    client.post("/auth/forgot-password", json={"email": payload["email"]})
+    user = db_session.query(models.User).filter(models.User.email == payload["email"]).first()
+    response = client.post(
+        "/auth/reset-password",
+        json={"token": user.password_reset_token, "new_password": "newsecret1"},
+    )
+    assert response.status_code == 204
+
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    new_headers = _login(client, {"email": payload["email"], "password": "newsecret1"})
+    assert client.get("/auth/me", headers=new_headers).status_code == 200
+
+
+@pytest.fixture()
+def password_settings(monkeypatch):
+    """Set PASSWORD_HASH_* / BCRYPT_ROUNDS env vars via the returned function."""
+
+    def apply(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        get_settings.cache_clear()
+        security.get_pwd_context.cache_clear()
+
+    yield apply
+    security.shutdown_password_hasher()
+    monkeypatch.undo()
+    get_settings.cache_clear()
+    security.get_pwd_context.cache_clear()
+
+
+def test_password_hasher_busy_returns_503(client, password_settings, monkeypatch):
+    password_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=2, BCRYPT_ROUNDS=4)
+    monkeypatch.setattr(security, "_pending", 2)
+
+    response = client.post(
+        "/auth/register", json={"email": "busy@example.com", "password": "supersecret"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert security._pending == 2
+
+
+def test_login_rehashes_weaker_password_hash(client, db_session, password_settings):
+    payload = {"email": "rehash@example.com", "password": "supersecret"}
+    password_settings(PASSWORD_HASH_WORKERS=0, BCRYPT_ROUNDS=4)
+    client.post("/auth/register", json=payload)
+    user = db_session.query(models.User).filter(models.User.email == payload["email"]).first()
+    assert user.hashed_password.startswith("$2b$04$")
+
+    password_settings(BCRYPT_ROUNDS=5)
+    assert client.post("/auth/login", json=payload).status_code == 200
+    db_session.refresh(user)
+    assert user.hashed_password.startswith("$2b$05$")
+    assert security.verify_password(payload["password"], user.hashed_password)
+
+    assert client.post("/auth/login", json={**payload, "password": "wrongpass"}).status_code == 401
+
+
+def test_async_principal_lookup_keeps_redis_off_the_event_loop(monkeypatch):
+    import asyncio
+    import threading
+    from datetime import datetime, timezone
+
+    from backend.app.services import cache, principals
+
+    user = models.User(
+        id=7, email="async@example.com", hashed_password="x", role="user", token_version=0,
+        created_at=datetime.now(timezone.utc),
+    )
+
+    class FakeAsyncSession:
+        async def get(self, model, user_id):
+            return user
+
+    calls = []
+    monkeypatch.setattr(cache, "get_cache_client", lambda: object())
+    monkeypatch.setattr(cache, "get_json", lambda key: calls.append(("get", threading.get_ident())))
+    monkeypatch.setattr(
+        cache, "set_json", lambda key, payload, ttl: calls.append(("set", threading.get_ident()))
+    )
+    principals.clear_principal_cache()
+
+    async def lookup():
+        principal = await principals.get_principal_async(FakeAsyncSession(), user.id)
+        return principal, threading.get_ident()
+
+    try:
+        principal, loop_thread = asyncio.run(lookup())
+    finally:
+        principals.clear_principal_cache()
+    assert principal.email == "async@example.com"
+    assert [name for name, _ in calls] == ["get", "set"]
+    assert all(thread != loop_thread for _, thread in calls)
@@ -0,0 +1,47 @@
+from dataclasses import replace
+
+from sqlalchemy import text
+
+from backend.app import database, models
+from backend.app.api.routes import admin
+from backend.app.core.config import get_settings
+
+
+def test_file_sqlite_engine_uses_wal(tmp_path):
+    settings = replace(get_settings(), sqlite_journal_mode="wal", sqlite_synchronous="normal")
+    engine = database.create_db_engine(f"sqlite:///{tmp_path / 'wal.db'}", settings)
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    finally:
+        engine.dispose()
+
+
+def test_admin_db_pool_metrics(client, db_session, monkeypatch, tmp_path):
+    payload = {"email": "pool-admin@example.com", "password": "supersecret"}
+    client.post("/auth/register", json=payload)
+    db_session.query(models.User).filter(models.User.email == payload["email"]).one().role = "admin"
+    db_session.commit()
+    token = client.post("/auth/login", json=payload).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    primary = database.create_db_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(admin, "engine", primary)
+    monkeypatch.setattr(admin, "read_engine", primary)
+    response = client.get("/admin/metrics/db-pool", headers=headers)
+    assert response.status_code == 200
+    metrics = response.json()
+    assert set(metrics) == {"primary"}
+    assert metrics["primary"]["pool_class"] == "QueuePool"
+    assert {"status", "size", "checkedin", "checkedout", "overflow"} <= set(metrics["primary"])
+    assert metrics["primary"]["checkedout"] == 0
+
+    replica = database.create_db_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(admin, "read_engine", replica)
+    with replica.connect():
+        metrics = client.get("/admin/metrics/db-pool", headers=headers).json()
+    assert set(metrics) == {"primary", "replica"}
+    assert metrics["replica"]["checkedout"] == 1
+    primary.dispose()
+    replica.dispose()
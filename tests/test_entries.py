@@ -28,3 +28,193 @@ def test_user_isolation(client):
     )
     assert response.status_code == 200
     assert response.json() == []
+
+
+def test_async_entry_routes(tmp_path):
+    import asyncio
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import sessionmaker
+
+    from backend.app.api.deps import get_async_db_session, get_db_session
+    from backend.app.api.router import build_api_router
+    from backend.app.database import (
+        Base,
+        create_async_db_engine,
+        create_db_engine,
+        to_async_url,
+    )
+    from backend.app.services.principals import clear_principal_cache
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    clear_principal_cache()
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_db_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    SyncSession = sessionmaker(bind=sync_engine, autoflush=False)
+    async_engine = create_async_db_engine(to_async_url(url))
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    def override_get_db():
+        with SyncSession() as db:
+            yield db
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(build_api_router(async_api=True))
+    app.dependency_overrides[get_db_session] = override_get_db
+    app.dependency_overrides[get_async_db_session] = override_get_async_db
+
+    with TestClient(app) as client:
+        headers = {"Authorization": f"Bearer {register_and_login(client, 'async@example.com')}"}
+        task = client.post("/productivity/tasks", json={"title": "Ship"}, headers=headers).json()
+
+        response = client.post(
+            "/productivity",
+            json={
+                "deep_work_hours": 3,
+                "tasks_completed": 0,
+                "focus_level": 7,
+                "completed_task_ids": [task["id"]],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        entry = response.json()
+        assert entry["tasks_completed"] == 1
+        assert entry["completed_task_ids"] == [task["id"]]
+
+        response = client.put(
+            f"/productivity/{entry['id']}",
+            json={"focus_level": 9, "completed_task_ids": []},
+            headers=headers,
+        )
+        assert response.json()["focus_level"] == 9
+        assert response.json()["tasks_completed"] == 0
+
+        payload = {"sleep_hours": 7, "energy_level": 8, "wellbeing": 7}
+        assert client.post("/health", json=payload, headers=headers).status_code == 200
+        response = client.get("/health", headers=headers)
+        assert response.headers["X-Total-Count"] == "1"
+        assert response.json()[0]["entry_type"] == "day"
+
+        assert client.delete(f"/productivity/{entry['id']}", headers=headers).status_code == 200
+        assert client.get("/productivity", headers=headers).json() == []
+        assert client.get("/analytics/correlations", headers=headers).json() == {"correlations": []}
+
+    asyncio.run(async_engine.dispose())
+    sync_engine.dispose()
+
+
+def test_reads_use_replica_except_right_after_a_write(client, tmp_path, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+
+    from backend.app import database
+    from backend.app.api.deps import get_read_db_session
+    from backend.app.services.read_routing import clear_recent_writes
+
+    # Second SQLite file standing in for a replica that has not caught up yet.
+    replica_engine = database.create_db_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    database.Base.metadata.create_all(bind=replica_engine)
+    monkeypatch.setattr(database, "read_engine", replica_engine)
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(bind=replica_engine))
+    client.app.dependency_overrides.pop(get_read_db_session)
+    clear_recent_writes()
+
+    headers = {"Authorization": f"Bearer {register_and_login(client, 'replica@example.com')}"}
+    payload = {"sleep_hours": 7, "energy_level": 8, "wellbeing": 7}
+    assert client.post("/health", json=payload, headers=headers).status_code == 200
+
+    # Sticky primary: the write is visible immediately.
+    assert len(client.get("/health", headers=headers).json()) == 1
+
+    # After the read-your-writes window reads go to the (lagging) replica.
+    clear_recent_writes()
+    assert client.get("/health", headers=headers).json() == []
+    replica_engine.dispose()
+
+
+def test_bulk_entry_ingestion(client):
+    headers = {"Authorization": f"Bearer {register_and_login(client, 'bulk@example.com')}"}
+    health = [
+        {"sleep_hours": 7, "energy_level": 6, "wellbeing": 7, "recorded_at": "2026-10-18T22:30:00+00:00",
+         "timezone": "Europe/Moscow"},
+        {"sleep_hours": 30, "energy_level": 6, "wellbeing": 7},
+        {"sleep_hours": 6, "energy_level": 5, "wellbeing": 6, "timezone": "Mars/Base"},
+        {"sleep_hours": 8, "energy_level": 8, "wellbeing": 8, "recorded_at": "2026-10-17T08:00:00+00:00"},
+    ]
+
+    atomic = client.post("/health/bulk?atomic=true", json=health, headers=headers)
+    assert atomic.status_code == 422
+    assert [r["status"] for r in atomic.json()["results"]] == ["skipped", "invalid", "invalid", "skipped"]
+    assert client.get("/health", headers=headers).headers["X-Total-Count"] == "0"
+
+    response = client.post("/health/bulk", json=health, headers=headers)
+    body = response.json()
+    assert response.status_code == 200 and (body["created"], body["failed"]) == (2, 2)
+    assert body["results"][1]["errors"][0]["loc"] == ["sleep_hours"]
+    assert body["results"][2]["errors"][0]["loc"] == ["timezone"]
+    stored = {e["id"]: e for e in client.get("/health", headers=headers).json()}
+    first = stored[body["results"][0]["id"]]
+    assert first["local_date"] == "2026-10-19" and first["timezone"] == "Europe/Moscow"
+    assert stored[body["results"][3]["id"]]["sleep_hours"] == 8
+
+    task = client.post("/productivity/tasks", json={"title": "Ship"}, headers=headers).json()
+    ndjson = "\n".join(
+        [
+            f'{{"deep_work_hours": 3, "tasks_completed": 0, "focus_level": 7, "completed_task_ids": [{task["id"]}]}}',
+            "not json",
+            "",
+            '{"deep_work_hours": 1, "tasks_completed": 2, "focus_level": 5}',
+        ]
+    )
+    response = client.post(
+        "/productivity/bulk",
+        content=ndjson,
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    body = response.json()
+    assert [r["status"] for r in body["results"]] == ["created", "invalid", "created"]
+    entries = {e["id"]: e for e in client.get("/productivity", headers=headers).json()}
+    linked = entries[body["results"][0]["id"]]
+    assert linked["tasks_completed"] == 1 and linked["completed_task_ids"] == [task["id"]]
+
+
+def test_bulk_entry_limit(client, monkeypatch):
+    from dataclasses import replace
+
+    from backend.app.api.routes import bulk
+    from backend.app.core.config import get_settings
+
+    monkeypatch.setattr(bulk, "get_settings", lambda: replace(get_settings(), bulk_max_entries=2))
+    headers = {"Authorization": f"Bearer {register_and_login(client, 'limit@example.com')}"}
+    ndjson_headers = {**headers, "Content-Type": "application/x-ndjson"}
+    entry = b'{"deep_work_hours": 1, "tasks_completed": 0, "focus_level": 5}'
+
+    def chunks(*parts):
+        yield from parts
+
+    # Blank lines do not count; a line split across chunks counts once
+    response = client.post(
+        "/productivity/bulk",
+        content=chunks(entry[:10], entry[10:] + b"\n\n  \n", entry),
+        headers=ndjson_headers,
+    )
+    assert response.status_code == 200 and response.json()["created"] == 2
+
+    # NDJSON is cut off while streaming, before the body is decoded
+    with monkeypatch.context() as patched:
+        patched.setattr(bulk, "read_bulk_items", None)
+        response = client.post(
+            "/productivity/bulk",
+            content=chunks(entry + b"\n", entry + b"\n" + entry[:5]),
+            headers=ndjson_headers,
+        )
+    assert response.status_code == 413 and response.json()["detail"] == "Too many entries (max 2)"
+    response = client.post("/productivity/bulk", content=b"[1, 2, 3]", headers=headers)
+    assert response.status_code == 413
+    assert client.get("/productivity", headers=headers).headers["X-Total-Count"] == "2"
@@ -0,0 +1,51 @@
+from backend.app.core.timezones import local_buckets
+
+
+def _auth_headers(client, email):
+    payload = {"email": email, "password": "supersecret"}
+    assert client.post("/auth/register", json=payload).status_code == 201
+    token = client.post("/auth/login", json=payload).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_apple_health_import_buckets_in_user_timezone(client):
+    def import_export(headers, export):
+        return client.post(
+            "/integrations/apple-health/import",
+            files={"file": ("export.xml", export, "application/xml")},
+            headers=headers,
+        )
+
+    headers = _auth_headers(client, "tokyo@example.com")
+    client.patch("/auth/me", json={"default_timezone": "Asia/Tokyo"}, headers=headers)
+    export = b"""<HealthData>
+    <Record type="HKQuantityTypeIdentifierStepCount" startDate="2026-10-18 20:30:00 +0000" value="1200"/>
+    <Record type="HKQuantityTypeIdentifierStepCount" startDate="2026-10-19 09:00:00 +0900" value="800.9"/>
+    <Record type="HKQuantityTypeIdentifierStepCount" startDate="2026-10-18 23:30:00" value="5"/>
+    <Record type="HKQuantityTypeIdentifierBodyMass" startDate="2026-10-18 13:00:00 +0000" value="70.5"/>
+    </HealthData>"""
+    response = import_export(headers, export)
+    assert response.status_code == 200 and response.json()["stats"]["days"] == 2
+
+    entries = {e["local_date"]: e for e in client.get("/health", headers=headers).json()}
+    assert entries["2026-10-19"]["steps"] == 2000  # 20:30 UTC is 05:30 next day in Tokyo
+    assert entries["2026-10-18"]["steps"] == 5  # no offset: Tokyo wall-clock time
+    assert entries["2026-10-18"]["weight_kg"] == 70.5
+    assert entries["2026-10-19"]["timezone"] == "Asia/Tokyo"
+    assert entries["2026-10-19"]["recorded_at"].startswith("2026-10-18T15:00:00")  # local midnight
+
+    # No zone chosen (UTC default): records keep the device's own wall-clock date
+    headers = _auth_headers(client, "device@example.com")
+    export = b"""<HealthData>
+    <Record type="HKQuantityTypeIdentifierStepCount" startDate="2026-10-18 21:30:00 -0500" value="300"/>
+    <Record type="HKQuantityTypeIdentifierStepCount" startDate="2026-10-18 23:45:00" value="20"/>
+    </HealthData>"""
+    assert import_export(headers, export).status_code == 200
+    entries = client.get("/health", headers=headers).json()
+    assert [(e["local_date"], e["steps"], e["timezone"]) for e in entries] == [("2026-10-18", 320, "UTC")]
+
+    dates, hours = local_buckets(
+        ["2026-03-29T00:30:00Z", "2026-03-29T01:30:00Z", "bad"], ["Europe/Berlin", "Europe/Berlin", None]
+    )
+    assert [str(d) for d in dates] == ["2026-03-29", "2026-03-29", "NaT"]
+    assert hours.tolist() == [1, 3, -1]  # DST starts at 01:00 UTC
@@ -0,0 +1,273 @@
+"""LLM response cache: repeated and near-duplicate contexts skip the provider."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.core.config import get_settings
+from backend.app.llm import cache, client
+from backend.app.llm.limits import LlmUserBusy
+
+
+class FakeProvider:
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, max_tokens):
+        self.calls += 1
+        message = SimpleNamespace(content=f"insight #{self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], model=model)
+
+
+@pytest.fixture()
+def provider(monkeypatch):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    fake = FakeProvider()
+    monkeypatch.setattr(client, "_client", lambda: fake)
+    get_settings.cache_clear()
+    cache.get_cache_client.cache_clear()
+    cache.clear_llm_cache()
+    yield fake
+    cache.clear_llm_cache()
+    get_settings.cache_clear()
+
+
+def test_insight_cache_normalizes_context(provider):
+    first, _ = client.llm_insight("Sleep avg 7.2345 h\nSpending up 12%")
+    again, _ = client.llm_insight("  sleep avg 7.23 h\n\nSpending   up 12%  ")
+    assert again == first and provider.calls == 1
+
+    client.llm_insight("Sleep avg 6.1 h\nSpending up 12%")
+    assert provider.calls == 2
+
+
+def test_near_duplicate_context(provider, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_SIMILARITY", "0.8")
+    get_settings.cache_clear()
+    context = "\n".join(f"metric {i} stable" for i in range(10))
+    first, _ = client.llm_insight(context, user_id=1)
+    near, _ = client.llm_insight(context + "\nmetric 10 stable", user_id=1)
+    assert near == first and provider.calls == 1
+
+    client.llm_insight("completely different data", user_id=1)
+    assert provider.calls == 2
+
+
+def test_near_duplicate_context_is_not_shared_across_users(provider, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_SIMILARITY", "0.8")
+    get_settings.cache_clear()
+    context = "\n".join(f"metric {i} stable" for i in range(10))
+    mine, _ = client.llm_insight(context, user_id=1)
+    theirs, _ = client.llm_insight(context + "\nmetric 10 stable", user_id=2)
+    assert theirs != mine and provider.calls == 2
+
+    # Same context exactly: the reply was generated from identical input and is shared
+    same, _ = client.llm_insight(context, user_id=2)
+    assert same == mine and provider.calls == 2
+
+
+def test_chat_stream_sse(client, monkeypatch):
+    from bench.fake_openai import FakeOpenAI
+
+    server = FakeOpenAI(tokens=5).start()
+    monkeypatch.setenv("LLM_BASE_URL", server.base_url)
+    monkeypatch.setenv("LLM_CACHE_TTL_SECONDS", "0")
+    get_settings.cache_clear()
+    try:
+        payload = {"email": "llm@example.com", "password": "supersecret"}
+        client.post("/auth/register", json=payload)
+        token = client.post("/auth/login", json=payload).json()["access_token"]
+        with client.stream(
+            "POST",
+            "/llm/chat/stream",
+            json={"message": "hi", "use_data_context": False},
+            headers={"Authorization": f"Bearer {token}"},
+        ) as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join(response.iter_text())
+    finally:
+        server.shutdown()
+        server.server_close()
+        get_settings.cache_clear()
+
+    events = [block for block in body.split("\n\n") if block]
+    deltas = [json.loads(block[len("data: "):])["delta"] for block in events[:-1]]
+    assert "".join(deltas).split() == [f"w{i}({len('hi')})" for i in range(5)]
+    assert events[-1].startswith("event: done")
+    assert server.stats.completed == 1
+
+
+def test_insights_batch_and_limits(monkeypatch):
+    from bench.fake_openai import FakeOpenAI
+
+    server = FakeOpenAI(tokens=3, latency_ms=50).start()
+    monkeypatch.setenv("LLM_BASE_URL", server.base_url)
+    monkeypatch.setenv("LLM_CACHE_TTL_SECONDS", "0")
+    monkeypatch.setenv("LLM_BATCH_CONCURRENCY", "3")
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY_PER_USER", "2")
+    get_settings.cache_clear()
+
+    async def batch():
+        try:
+            return await client.llm_insights_batch({i: f"context {i % 4}" for i in range(10)})
+        finally:
+            await client.close_llm_clients()
+
+    async def same_user():
+        calls = [client.llm_insight_async(f"context {i}", user_id=1) for i in range(3)]
+        try:
+            return await asyncio.gather(*calls, return_exceptions=True)
+        finally:
+            await client.close_llm_clients()
+
+    try:
+        results = asyncio.run(batch())
+        assert len(results) == 10 and all(text for text, _ in results.values())
+        assert results[0] == results[4]
+        assert server.stats.requests == 4 and server.stats.max_in_flight <= 3
+
+        outcomes = asyncio.run(same_user())
+        assert sum(isinstance(o, LlmUserBusy) for o in outcomes) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        get_settings.cache_clear()
+
+
+def test_async_calls_use_the_cache_off_the_event_loop(monkeypatch):
+    import threading
+
+    async def create(model, messages, max_tokens):
+        message = SimpleNamespace(content="async insight")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], model=model)
+
+    provider = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(client, "_async_client", lambda: provider)
+    threads = []
+    monkeypatch.setattr(client, "get_reply", lambda *args: threads.append(threading.get_ident()))
+    monkeypatch.setattr(client, "store_reply", lambda *args: threads.append(threading.get_ident()))
+
+    async def insight():
+        return await client.llm_insight_async("context", user_id=1), threading.get_ident()
+
+    (text, _model), loop_thread = asyncio.run(insight())
+    assert text == "async insight"
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+def test_data_context_summary_and_dirty_days(client, db_session, monkeypatch):
+    from datetime import date, datetime, timedelta, timezone
+
+    from backend.app import models
+    from backend.app.llm import context
+
+    today = date(2026, 10, 19)
+    user = models.User(
+        email="ctx@example.com", hashed_password="x", created_at=datetime.now(timezone.utc)
+    )
+    db_session.add(user)
+    db_session.flush()
+    for offset in range(20):
+        db_session.add(
+            models.HealthEntry(
+                user_id=user.id,
+                recorded_at=datetime.now(timezone.utc),
+                local_date=today - timedelta(days=offset),
+                timezone="UTC",
+                sleep_hours=3.0 if offset == 1 else 7.0 + offset % 2 * 0.5,
+                energy_level=6,
+                wellbeing=7,
+            )
+        )
+    db_session.add(
+        models.HealthEntry(
+            user_id=user.id,
+            recorded_at=datetime.now(timezone.utc),
+            local_date=today - timedelta(days=90),
+            timezone="UTC",
+            sleep_hours=1.0,
+            energy_level=1,
+            wellbeing=1,
+        )
+    )
+    marked = []
+    monkeypatch.setattr(context, "mark_dirty", lambda changes: marked.extend(changes))
+    db_session.commit()
+    assert (user.id, today) in marked and (user.id, today - timedelta(days=90)) in marked
+
+    text = context.get_llm_context(db_session, user.id, today)
+    lines = text.splitlines()
+    assert lines[0].startswith("Данные за 20 дн.")
+    assert any(line.startswith("! 10-18 sleep_hours 3") for line in lines)
+    assert any(line.startswith("sleep_hours: 7d") and "[3..7.5]" in line for line in lines)
+    assert context.estimate_tokens(text) <= get_settings().llm_context_max_tokens
+
+    rollup = context.load_rollup(db_session, user.id, today)
+    short = context.render_context(rollup, today, max_tokens=40)
+    assert context.estimate_tokens(short) <= 40 and len(short.splitlines()) < len(lines)
+
+
+def test_bulk_dml_invalidates_every_affected_user(client, db_session, monkeypatch):
+    from datetime import date, datetime, timezone
+
+    from sqlalchemy import delete, update
+
+    from backend.app import models
+    from backend.app.llm import context
+
+    now = datetime.now(timezone.utc)
+    users = [
+        models.User(email=f"dml{i}@example.com", hashed_password="x", created_at=now)
+        for i in range(3)
+    ]
+    db_session.add_all(users)
+    db_session.flush()
+    for user, sleep in zip(users, (4.0, 8.0, 4.5), strict=True):
+        db_session.add(
+            models.HealthEntry(
+                user_id=user.id,
+                recorded_at=now,
+                local_date=date(2026, 10, 18),
+                timezone="UTC",
+                sleep_hours=sleep,
+                energy_level=6,
+                wellbeing=7,
+            )
+        )
+    db_session.commit()
+    a, b, c = (user.id for user in users)
+    marked = []
+    monkeypatch.setattr(context, "mark_dirty", lambda changes: marked.append(set(changes)))
+    entry = models.HealthEntry
+
+    db_session.execute(
+        update(entry).where(entry.user_id == a, entry.sleep_hours < 6).values(wellbeing=5)
+    )
+    db_session.commit()
+    db_session.execute(update(entry).where(entry.user_id.in_([b, c])).values(wellbeing=6))
+    db_session.commit()
+    db_session.execute(delete(entry).where(entry.sleep_hours < 6))
+    db_session.commit()
+    assert marked == [{(a, None)}, {(b, None), (c, None)}, {(a, None), (c, None)}]
+
+
+def test_insight_without_llm_skips_the_data_context(client, monkeypatch):
+    from backend.app.api.routes import llm as llm_routes
+
+    monkeypatch.delenv("LLM_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_BASE_URL", raising=False)
+    get_settings.cache_clear()
+
+    def no_context(*args):
+        raise AssertionError("data context built without an LLM")
+
+    monkeypatch.setattr(llm_routes, "get_llm_context", no_context)
+    payload = {"email": "no-llm@example.com", "password": "supersecret"}
+    client.post("/auth/register", json=payload)
+    token = client.post("/auth/login", json=payload).json()["access_token"]
+    response = client.get("/llm/insight", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 503
+    get_settings.cache_clear()
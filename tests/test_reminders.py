@@ -0,0 +1,169 @@
+"""Reminder run: eligibility and idempotent, resumable sharded sends."""
+
+import smtplib
+from dataclasses import replace
+from datetime import date, datetime, timedelta, timezone
+
+from backend.app import models
+from backend.app.core.config import get_settings
+from backend.app.tasks import reminder_emails, reminder_runner
+
+
+def _user(db, email, opted_in=True, last_health=None, last_finance=None):
+    user = models.User(
+        email=email,
+        hashed_password="x",
+        created_at=datetime.now(timezone.utc),
+        role="user",
+        notification_email=email,
+        notification_preferences={"email_reminders": opted_in},
+    )
+    db.add(user)
+    db.flush()
+    if last_health:
+        db.add(
+            models.HealthEntry(
+                user_id=user.id,
+                recorded_at=datetime.now(timezone.utc),
+                local_date=last_health,
+                timezone="UTC",
+                sleep_hours=7,
+                energy_level=7,
+                wellbeing=7,
+            )
+        )
+    if last_finance:
+        db.add(
+            models.FinanceEntry(
+                user_id=user.id,
+                recorded_at=datetime.now(timezone.utc),
+                local_date=last_finance,
+                timezone="UTC",
+                income=0,
+                expense_food=10,
+                expense_transport=0,
+                expense_health=0,
+                expense_other=0,
+            )
+        )
+    return user
+
+
+def test_sharded_run_is_idempotent(client, db_session, monkeypatch):
+    today = date(2026, 10, 19)
+    active = _user(db_session, "active@example.com", last_health=today - timedelta(days=1))
+    stale = _user(db_session, "stale@example.com", last_health=today - timedelta(days=6))
+    never = _user(db_session, "never@example.com")
+    _user(db_session, "optout@example.com", opted_in=False)
+    db_session.commit()
+
+    jobs = {job.user_id: job for job in reminder_emails.collect_reminder_jobs(db_session, today)}
+    assert set(jobs) == {stale.id, never.id}
+    assert [r["type"] for r in jobs[stale.id].reminders] == ["health_yesterday", "inactive_days"]
+    assert reminder_emails.get_reminders_for_user(db_session, active.id, today) == []
+
+    delivered = []
+
+    def fake_send(self, batch):
+        delivered.extend(job.user_id for job in batch)
+        return [job.user_id for job in batch]
+
+    monkeypatch.setattr(reminder_runner, "SessionLocal", client.app.state.testing_db_factory)
+    monkeypatch.setattr(reminder_emails.ReminderSender, "send", fake_send)
+
+    dry = reminder_runner.run(shards=2, run_date=today, dry_run=True)
+    assert sum(r.jobs for r in dry) == 2 and delivered == []
+
+    first = reminder_runner.run(shards=2, run_date=today, chunk_size=1)
+    assert sum(r.sent for r in first) == 2
+    assert sorted(delivered) == sorted([stale.id, never.id])
+
+    again = reminder_runner.run(shards=2, run_date=today, partition="range")
+    assert sum(r.sent for r in again) == 0
+    assert sum(r.already_sent for r in again) == 2
+
+
+def test_inactive_cutoff_uses_last_entry_in_any_sphere(client, db_session):
+    today = date(2026, 10, 19)
+    spender = _user(
+        db_session,
+        "spender@example.com",
+        last_health=today - timedelta(days=10),
+        last_finance=today - timedelta(days=2),
+    )
+    edge = _user(db_session, "edge@example.com", last_finance=today - timedelta(days=3))
+    lapsed = _user(db_session, "lapsed@example.com", last_finance=today - timedelta(days=4))
+    db_session.commit()
+
+    jobs = {job.user_id: job for job in reminder_emails.collect_reminder_jobs(db_session, today)}
+    assert [r["type"] for r in jobs[spender.id].reminders] == ["health_yesterday"]
+    assert [r["type"] for r in jobs[edge.id].reminders] == ["health_yesterday"]
+    assert [r["type"] for r in jobs[lapsed.id].reminders] == ["health_yesterday", "inactive_days"]
+    assert "4 days" in jobs[lapsed.id].reminders[1]["message"]
+
+
+class FakeSMTP:
+    """smtplib.SMTP stand-in: rejects some recipients and drops the connection once."""
+
+    connections = 0
+    delivered: list = []
+    drop_before: set = set()
+
+    def __init__(self, host, port, timeout=None):
+        FakeSMTP.connections += 1
+        self.open = True
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, msg):
+        to = msg["To"]
+        if not self.open:
+            raise smtplib.SMTPServerDisconnected("closed")
+        if to in FakeSMTP.drop_before:
+            FakeSMTP.drop_before.discard(to)
+            self.open = False
+            raise smtplib.SMTPServerDisconnected("dropped")
+        if to.startswith("refused"):
+            raise smtplib.SMTPRecipientsRefused({to: (550, b"no such user")})
+        if to.startswith("rejected"):
+            raise smtplib.SMTPDataError(554, b"message rejected")
+        FakeSMTP.delivered.append(to)
+
+    def quit(self):
+        if not self.open:
+            raise smtplib.SMTPServerDisconnected("closed")
+        self.open = False
+
+    def close(self):
+        self.open = False
+
+
+def test_rejected_messages_do_not_stop_the_batch(monkeypatch):
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(FakeSMTP, "connections", 0)
+    monkeypatch.setattr(FakeSMTP, "delivered", [])
+    monkeypatch.setattr(FakeSMTP, "drop_before", {"d@example.com"})
+    settings = replace(get_settings(), smtp_host="smtp.test", smtp_from_email="from@example.com")
+    emails = [
+        "a@example.com",
+        "rejected@example.com",
+        "refused@example.com",
+        "d@example.com",
+        "e@example.com",
+    ]
+    jobs = [
+        reminder_emails.ReminderJob(user_id=i, email=email, reminders=[{"message": "Log today?"}])
+        for i, email in enumerate(emails)
+    ]
+
+    with reminder_emails.ReminderSender(settings, concurrency=1, batch_size=10) as sender:
+        sent = sender.send(jobs)
+
+    assert sent == [0, 3, 4]
+    assert FakeSMTP.delivered == ["a@example.com", "d@example.com", "e@example.com"]
+    # One connection for the batch plus one reconnect after the drop; rejections reuse it
+    assert FakeSMTP.connections == 2
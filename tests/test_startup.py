@@ -0,0 +1,37 @@
+"""Cold-start budget: importing the app must not pull in the numeric/LLM stack."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Loaded lazily on first use (core/lazy.py); importing any of them at startup is a regression
+HEAVY_MODULES = ("pandas", "numpy", "scipy", "statsmodels", "sklearn", "openai")
+# Measured ~1.2s with lazy imports and ~4s without; raise via env on slow CI runners
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2500"))
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """{module: cumulative microseconds} from `python -X importtime -c "import <module>"`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_app_import_time_budget():
+    times = _import_times("backend.app.main")
+    heavy = sorted(name for name in times if name.split(".")[0] in HEAVY_MODULES)
+    assert not heavy, f"imported at startup: {heavy[:10]}"
+    assert times["backend.app.main"] / 1000 <= IMPORT_BUDGET_MS